@@ -3,13 +3,15 @@ Analyzia - AI-Powered Data Analysis Platform
 Main application entry point
 """
 
+import uuid
+
 import streamlit as st
-import pandas as pd
-from tempfile import NamedTemporaryFile
 
 from src.agents import DataAnalysisAgent, ResponseProcessor
 from src.utils import DataFrameUtils
-from src.config import AVAILABLE_MODELS
+from src.data import CSVIngestor, get_dataset_store, enable_copy_on_write
+from src.config import AVAILABLE_MODELS, STREAMING_INGEST_MIN_BYTES
+from src.cache import DatasetCache, get_dataset_cache, AgentCache, get_agent_cache
 
 
 class DataApp:
@@ -18,6 +20,7 @@ class DataApp:
     def __init__(self):
         self.df = None
         self.file_path = None
+        self.fingerprint = None
         self.response_processor = None
         self.analysis_agent = None
 
@@ -25,22 +28,50 @@ class DataApp:
         """Process the uploaded CSV file and return dataframe and file path."""
         with st.spinner("Loading dataset..."):
             try:
-                # Create temporary file
-                with NamedTemporaryFile(delete=False) as f:
-                    f.write(file.getbuffer())
-                    self.file_path = f.name
-
-                # Load dataframe with error handling
+                self.fingerprint = self.get_file_fingerprint(file)
+
+                dataset_store = get_dataset_store()
+
+                def load_dataframe():
+                    # Memory-map the columnar copy if this upload was converted before
+                    df = dataset_store.load(self.fingerprint)
+                    if df is None and dataset_store.enabled and file.size >= STREAMING_INGEST_MIN_BYTES:
+                        # Too large for pandas: stream straight into the store and query it lazily
+                        file.seek(0)
+                        dataset_store.save_csv(self.fingerprint, file)
+                        df = dataset_store.load(self.fingerprint, lazy_min_columns=0)
+                    if df is None:
+                        file.seek(0)
+                        df = CSVIngestor.load(file)
+                        try:
+                            dataset_store.save(self.fingerprint, df)
+                        except Exception as e:
+                            print(f"[STORE] Could not persist dataset {self.fingerprint}: {str(e)}")
+                            return df
+                        # Reopen from the store so wide datasets come back as lazy frames
+                        stored_df = dataset_store.load(self.fingerprint)
+                        return stored_df if stored_df is not None else df
+                    return df
+
+                # Load dataframe with error handling, parsing each distinct upload only once
                 try:
-                    self.df = pd.read_csv(self.file_path)
+                    cached_df = get_dataset_cache().get_or_load(self.fingerprint, load_dataframe)
                 except Exception as e:
                     st.error(f"Error reading CSV file: {str(e)}")
                     st.info("Make sure your file is a valid CSV with proper formatting.")
                     return None
 
+                if dataset_store.contains(self.fingerprint):
+                    self.file_path = dataset_store.path_for(self.fingerprint)
+
+                # Shallow copy so column assignments in one session never leak into the shared cache
+                self.df = cached_df.copy(deep=False)
+
                 # Initialize components
                 self.response_processor = ResponseProcessor(self.df)
-                self.analysis_agent = DataAnalysisAgent(self.df, self.response_processor, openrouter_api_key, model)
+                self.analysis_agent = DataAnalysisAgent(
+                    self.df, self.response_processor, openrouter_api_key, model, fingerprint=self.fingerprint
+                )
 
                 return self.df
 
@@ -48,6 +79,34 @@ class DataApp:
                 st.error(f"Error processing file: {str(e)}")
                 return None
 
+    def get_file_fingerprint(self, file):
+        """Return the content hash of an upload, hashing its bytes once per session."""
+        upload_key = (getattr(file, 'file_id', None), file.name, file.size)
+        fingerprints = st.session_state.setdefault('upload_fingerprints', {})
+        if upload_key not in fingerprints:
+            fingerprints[upload_key] = DatasetCache.fingerprint(file.getbuffer())
+        return fingerprints[upload_key]
+
+    def setup_analysis_agent(self, openrouter_api_key, model):
+        """Reuse this session's built agent for the dataset, model and key, or build and cache one."""
+        agent_cache = get_agent_cache()
+        # Agents keep a REPL namespace and dataset snapshot, so each browser session gets its own
+        session_id = st.session_state.setdefault('agent_session_id', uuid.uuid4().hex)
+        cache_key = AgentCache.make_key(session_id, self.fingerprint, model, openrouter_api_key)
+
+        cached_agent = agent_cache.get(cache_key)
+        if cached_agent is not None:
+            self.analysis_agent = cached_agent
+            self.response_processor = cached_agent.response_processor
+            return
+
+        if self.analysis_agent and self.analysis_agent.agent is None:
+            # Update API key and model if changed
+            self.analysis_agent.openrouter_api_key = openrouter_api_key
+            self.analysis_agent.model = model
+            if self.analysis_agent.setup_agent(self.file_path):
+                agent_cache.put(cache_key, self.analysis_agent)
+
     def configure_page(self):
         """Configure Streamlit page settings"""
         st.set_page_config(
@@ -164,7 +223,7 @@ class DataApp:
             )
 
             # Rate limit info
-            st.caption("💡 All models are free. Try different ones if you encounter rate limits.")
+            st.caption("💡 All models are free. Rate-limited requests fail over to the fastest available model.")
 
             st.markdown("---")
 
@@ -283,21 +342,19 @@ If the problem persists, please check that your API key is valid and your CSV fi
         if 'messages' not in st.session_state:
             st.session_state.messages = []
 
-        # Process file if uploaded
-        if uploaded_file and (self.df is None or uploaded_file.name != getattr(st.session_state, 'last_file', None)):
+        # Process file if uploaded (served from the dataset cache after the first parse)
+        if uploaded_file:
             self.process_uploaded_file(uploaded_file, openrouter_api_key, selected_model)
             st.session_state.last_file = uploaded_file.name if self.df is not None else None
 
-            # Reset chat history when new file is uploaded
-            st.session_state.messages = []
+            # Reset chat history only when a different dataset is uploaded
+            if self.fingerprint != st.session_state.get('last_fingerprint'):
+                st.session_state.messages = []
+                st.session_state.last_fingerprint = self.fingerprint
 
         # Setup agent if conditions are met
         if self.df is not None and openrouter_api_key:
-            if self.analysis_agent and self.analysis_agent.agent is None:
-                # Update API key and model if changed
-                self.analysis_agent.openrouter_api_key = openrouter_api_key
-                self.analysis_agent.model = selected_model
-                self.analysis_agent.setup_agent(self.file_path)
+            self.setup_analysis_agent(openrouter_api_key, selected_model)
 
         # Render header
         self.render_header()
@@ -306,6 +363,12 @@ If the problem persists, please check that your API key is valid and your CSV fi
         if self.df is not None:
             DataFrameUtils.display_dataframe_info(self.df)
 
+        # Live view of the intermediates the analysis session keeps in memory
+        repl_tool = self.analysis_agent.python_repl_tool if self.analysis_agent else None
+        if repl_tool is not None and repl_tool.namespace_manager is not None:
+            namespace = repl_tool.namespace_manager
+            DataFrameUtils.display_namespace_memory(namespace.report(), namespace.stats())
+
         # Display status information if setup is incomplete
         self.render_status_messages(uploaded_file, openrouter_api_key)
 
@@ -335,5 +398,7 @@ If the problem persists, please check that your API key is valid and your CSV fi
 
 # Run the application
 if __name__ == "__main__":
+    # Dataset snapshots and the values the execution cache hands back are copy-on-write views
+    enable_copy_on_write()
     app = DataApp()
     app.run()
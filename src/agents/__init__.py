@@ -1,8 +1,14 @@
 """Agent modules for Analyzia"""
 
-from .openrouter_llm import OpenRouterLLM
+from .openrouter_llm import OpenRouterLLM, OpenRouterError
+from .model_router import ModelRouter, get_model_router
 from .base_agent import LLMAgent
+from .tool_calling_agent import ToolCallingAgentExecutor
+from .query_router import QueryRouter, FastAnswer
 from .data_analysis_agent import DataAnalysisAgent
 from .response_processor import ResponseProcessor
 
-__all__ = ['OpenRouterLLM', 'LLMAgent', 'DataAnalysisAgent', 'ResponseProcessor']
+__all__ = [
+    'OpenRouterLLM', 'OpenRouterError', 'ModelRouter', 'get_model_router', 'LLMAgent', 'ToolCallingAgentExecutor',
+    'QueryRouter', 'FastAnswer', 'DataAnalysisAgent', 'ResponseProcessor',
+]
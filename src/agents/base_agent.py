@@ -2,7 +2,7 @@
 
 import streamlit as st
 from .openrouter_llm import OpenRouterLLM
-from ..config import DEFAULT_MODEL
+from ..config import DEFAULT_MODEL, LLM_STREAMING
 
 
 class LLMAgent:
@@ -24,7 +24,8 @@ class LLMAgent:
                 openrouter_api_key=self.openrouter_api_key,
                 model=self.model,
                 temperature=0.7,
-                max_tokens=4000
+                max_tokens=4000,
+                streaming=LLM_STREAMING
             )
             return True
         except Exception as e:
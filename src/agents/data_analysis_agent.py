@@ -1,31 +1,91 @@
 """Data analysis agent with CSV capabilities"""
 
+import os
 import re
+import time
+import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
+from langchain_core.tools import ToolException
 from langchain_experimental.agents import create_pandas_dataframe_agent
 
 from .base_agent import LLMAgent
-from ..config import SYSTEM_TEMPLATE
+from .openrouter_llm import OpenRouterError
+from .tool_calling_agent import ToolCallingAgentExecutor
+from .query_router import QueryRouter
+from ..config import (
+    SYSTEM_TEMPLATE, TOOL_CALLING_SYSTEM_TEMPLATE, ANSWER_TOOL_TEMPLATE, SQL_TOOL_TEMPLATE, SQL_TOOL_PREFER_HINT,
+    SQL_TOOL_OPTIONAL_HINT, SQL_TOOL_MAX_ROWS, SQL_TOOL_PREFER_MIN_BYTES, WIDE_SCHEMA_TEMPLATE, RELEVANT_COLUMNS_TEMPLATE,
+    SCHEMA_PRUNE_MIN_COLUMNS, SCHEMA_PRUNE_MAX_COLUMNS, SCHEMA_PRUNE_SAMPLE_ROWS, AGENT_EXECUTOR,
+    AGENT_MAX_ITERATIONS, AGENT_MAX_EXECUTION_SECONDS, ANSWER_TEMPLATE_ENABLED, FAST_PATH_ENABLED,
+    CODE_VALIDATION_ENABLED, SNAPSHOT_ISOLATION_ENABLED, SNAPSHOT_COMMIT_CHANGES,
+)
+from ..cache import (
+    get_profile_cache, get_answer_cache, CachedAnswer, PlanCache, get_plan_cache, ExecutionCache, ExecutionLedger,
+)
+from ..data import LazyDataFrame, DatasetProfiler, SchemaIndex, DatasetSnapshot
 from ..utils import VisualizationHandler
-from ..tools import CustomStreamlitCallbackHandler, CustomPythonAstREPLTool
+from ..tools import (
+    CustomStreamlitCallbackHandler, CustomPythonAstREPLTool, DuckDBSQLTool, AnswerWithCodeTool, CodeValidator,
+    NamespaceManager,
+)
 
 
 class DataAnalysisAgent(LLMAgent):
     """Class to handle LLM agent interactions for data analysis"""
 
-    def __init__(self, df, response_processor, openrouter_api_key=None, model=None):
+    def __init__(self, df, response_processor, openrouter_api_key=None, model=None, fingerprint=None):
         super().__init__(openrouter_api_key, model)
         self.df = df
+        self.fingerprint = fingerprint
         self.response_processor = response_processor
         self.agent = None
         self.python_repl_tool = None
+        self.answer_tool = None
+        self.sql_tool = None
+        self.profile = None
+        self.schema_index = None
+        self.df_schema = None
+        self.sql_prompt = ""
+        self.query_router = None
+        self.schema_signature = None
+        self.execution_ledger = None
+        # Each question runs against a copy-on-write view of df, so its column changes stay isolated
+        self.snapshot = DatasetSnapshot(df) if SNAPSHOT_ISOLATION_ENABLED else None
 
     def setup_agent(self, file_path):
         """Set up the CSV agent with OpenRouter LLM."""
-        # Create system prompt with dataframe schema
-        df_schema = "\n".join([f"- {col} ({self.df[col].dtype})" for col in self.df.columns])
-        system_prompt = SYSTEM_TEMPLATE.format(df_schema=df_schema)
+        # Create system prompt with the cached dataset profile, or the plain schema if profiling fails
+        try:
+            self.profile = get_profile_cache().get_or_compute(self.fingerprint, self.df)
+            df_schema = DatasetProfiler.format_for_prompt(self.profile)
+        except Exception as e:
+            print(f"[DEBUG] Profiling failed, using plain schema: {str(e)}")
+            self.profile = None
+            df_schema = "\n".join([f"- {col} ({dtype})" for col, dtype in self.df.dtypes.items()])
+
+        # Wide datasets list only the columns relevant to each question, so the prompt size stays fixed
+        column_count = len(self.df.columns)
+        if self.profile and column_count > SCHEMA_PRUNE_MIN_COLUMNS:
+            self.schema_index = SchemaIndex.build(self.profile, self.df.head(SCHEMA_PRUNE_SAMPLE_ROWS))
+            df_schema = WIDE_SCHEMA_TEMPLATE.format(column_count=column_count)
+        self.df_schema = df_schema
+        # Taken before any generated code can add columns, so it matches other exports of the same table
+        self.schema_signature = PlanCache.schema_signature(self.df)
+
+        # Answers simple factual questions from the data before they reach the LLM
+        self.query_router = QueryRouter(self.df, self.profile) if FAST_PATH_ENABLED else None
+
+        # Offer DuckDB SQL over the stored file and tell the model when to prefer it
+        self.sql_tool = self._create_sql_tool(file_path)
+        self.sql_prompt = ""
+        if self.sql_tool:
+            dataset_bytes = self._dataset_bytes(file_path)
+            size_hint = SQL_TOOL_PREFER_HINT if dataset_bytes >= SQL_TOOL_PREFER_MIN_BYTES else SQL_TOOL_OPTIONAL_HINT
+            self.sql_prompt = SQL_TOOL_TEMPLATE.format(
+                max_rows=SQL_TOOL_MAX_ROWS,
+                size_hint=size_hint.format(size_mb=dataset_bytes / (1024 * 1024)),
+            )
 
         # Make sure LLM is initialized
         if not self.llm and not self.initialize_llm():
@@ -37,39 +97,190 @@ class DataAnalysisAgent(LLMAgent):
             # Set locals after initialization to avoid Pydantic issues
             self.python_repl_tool.locals = VisualizationHandler.get_execution_context(self.df)
             self.python_repl_tool.name = "python_repl_ast"
+            # Checks column names, attributes and imports against the live schema before each run
+            self.python_repl_tool.validator = CodeValidator() if CODE_VALIDATION_ENABLED else None
+            # Replays snippets the agent runs again on unchanged data, figures included
+            self.python_repl_tool.execution_cache = ExecutionCache()
+            # Keeps intermediates (df_clean, word_df, figures) under a memory budget across questions;
+            # a variable spilled or dropped is also let go by the execution cache, so its memory is freed
+            self.python_repl_tool.namespace_manager = NamespaceManager(
+                on_evict=self.python_repl_tool.execution_cache.forget
+            )
+            # Shared with the response processor so code in the final answer that already ran is not run again
+            self.execution_ledger = ExecutionLedger()
+            self.python_repl_tool.execution_ledger = self.execution_ledger
+            self.response_processor.execution_ledger = self.execution_ledger
             self.python_repl_tool.description = (
                 "A Python shell. Use this to execute python commands. "
                 "Input should be a valid python command. "
                 "When using this tool, you can access the pandas DataFrame 'df'."
             )
+            # Runs code in the same REPL and fills the final answer from its variables (tool calling only)
+            self.answer_tool = AnswerWithCodeTool(repl_tool=self.python_repl_tool) if ANSWER_TEMPLATE_ENABLED else None
 
-            # Create agent using pandas dataframe agent with ONLY our custom tool
-            # The trick: pass empty extra_tools and modify the agent's tools list after creation
-            self.agent = create_pandas_dataframe_agent(
-                self.llm,
-                self.df,
-                verbose=True,
-                agent_type="zero-shot-react-description",
-                handle_parsing_errors=True,
-                prefix=system_prompt,
-                allow_dangerous_code=True,
-                extra_tools=[],
-                max_iterations=8,
-                max_execution_time=60,
-                early_stopping_method="generate"
-            )
-
-            # Replace the built-in PythonAstREPLTool with our custom one
-            self.agent.tools = [self.python_repl_tool]
-
+            if AGENT_EXECUTOR == "react":
+                self.agent = self._create_react_agent()
+            else:
+                self.agent = self._create_tool_calling_agent()
             return self.agent
 
         except Exception as e:
             st.error(f"Error setting up the agent: {str(e)}")
             return None
 
+    def _agent_tools(self):
+        """Return the tools the agent may call"""
+        return [self.python_repl_tool] + ([self.sql_tool] if self.sql_tool else [])
+
+    def _create_tool_calling_agent(self):
+        """Create the executor that calls tools through the model's native tool-calling API"""
+        # The profile in the schema stands in for df.head(); wide datasets get pruned sample rows per question
+        system_prompt = TOOL_CALLING_SYSTEM_TEMPLATE.format(df_schema=self.df_schema, row_count=len(self.df))
+        tools = self._agent_tools()
+        if self.answer_tool:
+            # The ReAct loop passes a single string to tools, so only tool calling gets the two-argument tool
+            tools.append(self.answer_tool)
+            system_prompt += ANSWER_TOOL_TEMPLATE
+        return ToolCallingAgentExecutor(self.llm, tools, system_prompt + self.sql_prompt)
+
+    def _create_react_agent(self):
+        """Create the text ReAct executor, for models without tool calling"""
+        system_prompt = SYSTEM_TEMPLATE.format(df_schema=self.df_schema, row_count=len(self.df)) + self.sql_prompt
+
+        # Create agent using pandas dataframe agent with ONLY our custom tools
+        # The trick: pass the SQL tool as an extra tool so it is listed in the prompt,
+        # then swap the built-in PythonAstREPLTool for ours after creation
+        # The executor only renders df.head() into its prompt; the REPL tool above owns the full df
+        extra_tools = [self.sql_tool] if self.sql_tool else []
+        agent = create_pandas_dataframe_agent(
+            self.llm,
+            self.df.head(),
+            verbose=True,
+            agent_type="zero-shot-react-description",
+            handle_parsing_errors=True,
+            prefix=system_prompt,
+            allow_dangerous_code=True,
+            extra_tools=extra_tools,
+            max_iterations=AGENT_MAX_ITERATIONS,
+            max_execution_time=AGENT_MAX_EXECUTION_SECONDS,
+            early_stopping_method="generate",
+            # The df.head() markdown spans every column; wide datasets get pruned sample rows per question
+            include_df_in_prompt=self.schema_index is None
+        )
+
+        # Replace the built-in PythonAstREPLTool with our custom one
+        agent.tools = self._agent_tools()
+        return agent
+
+    def _run_agent(self, prompt, callback):
+        """Run the agent, moving to the ReAct loop if the model turns out not to support tool calling"""
+        try:
+            return self.agent.run(prompt, callbacks=[callback])
+        except OpenRouterError as e:
+            if (not isinstance(self.agent, ToolCallingAgentExecutor) or e.retryable
+                    or "tool" not in str(e).lower()):
+                raise
+            print(f"[DEBUG] {self.model} rejected tool calling, switching to ReAct: {str(e)[:120]}")
+            self.agent = self._create_react_agent()
+            callback.react_format = True
+            return self.agent.run(prompt, callbacks=[callback])
+
+    def _answer_completed(self, callback, elapsed):
+        """Whether the agent finished on its own rather than being stopped by its turn or time limit"""
+        if isinstance(self.agent, ToolCallingAgentExecutor):
+            return self.agent.last_run_completed
+        # The ReAct executor takes one step per tool call and generates a forced answer once out of steps
+        return len(callback.tools_used) < AGENT_MAX_ITERATIONS and elapsed < AGENT_MAX_EXECUTION_SECONDS
+
+    def _add_relevant_columns(self, prompt):
+        """Attach the columns and sample rows relevant to the question for wide datasets"""
+        if self.schema_index is None:
+            return prompt
+
+        columns = self.schema_index.search(prompt, SCHEMA_PRUNE_MAX_COLUMNS)
+        if not columns:
+            # Nothing matched lexically; show the leading columns so the model has a starting point
+            columns = list(self.df.columns[:SCHEMA_PRUNE_MAX_COLUMNS])
+        columns = [col for col in columns if col in self.profile['columns']]
+
+        sample_rows = self.df.head(SCHEMA_PRUNE_SAMPLE_ROWS)[columns].to_csv(index=False)
+        return RELEVANT_COLUMNS_TEMPLATE.format(
+            question=prompt,
+            column_count=len(self.df.columns),
+            columns=DatasetProfiler.format_for_prompt(self.profile, columns=columns),
+            sample_rows=sample_rows,
+        )
+
+    def _create_sql_tool(self, file_path):
+        """Create the DuckDB tool over the stored Arrow file, or the in-memory frame"""
+        if not DuckDBSQLTool.is_available():
+            return None
+        if file_path:
+            return DuckDBSQLTool(file_path=file_path)
+        if isinstance(self.df, LazyDataFrame):
+            return None
+        return DuckDBSQLTool(df=self.df)
+
+    def _dataset_bytes(self, file_path):
+        """Return the dataset size used to decide whether SQL should be preferred"""
+        if file_path and os.path.exists(file_path):
+            return os.path.getsize(file_path)
+        if isinstance(self.df, LazyDataFrame):
+            return self.df.loaded_bytes()
+        return int(self.df.memory_usage(deep=True).sum())
+
     def handle_chat_input(self, prompt):
         """Process chat input and handle agent responses."""
+        fast_answer = self.query_router.answer(prompt) if self.query_router else None
+        if fast_answer is not None:
+            st.write(fast_answer.text)
+            st.caption(f"Answered instantly from the data with `{fast_answer.code}`")
+            return fast_answer.text
+
+        # A similar question about the same upload was answered before: replay it without the LLM
+        cached = get_answer_cache().get(self.fingerprint, prompt, self.df.columns)
+        if cached is not None:
+            for figure in cached.figures:
+                VisualizationHandler.display_artifact(figure)
+            st.write(cached.display_text)
+            st.caption(f"Reused the answer to a similar earlier question: \"{cached.question}\"")
+            return cached.answer
+
+        self._begin_question()
+        try:
+            plan_answer = self._answer_from_plan(prompt)
+            if plan_answer is not None:
+                return plan_answer
+            return self._answer_with_agent(prompt)
+        finally:
+            self._end_question()
+
+    def _begin_question(self):
+        """Point the REPL and the response processor at a fresh view of the dataset"""
+        if self.snapshot is None or self.python_repl_tool is None:
+            return
+        view = self.snapshot.begin()
+        self.python_repl_tool.locals['df'] = view
+        self.response_processor.df = view
+        if self.python_repl_tool.execution_cache is not None:
+            # Every question's view holds the same data until a question's changes are committed
+            self.python_repl_tool.execution_cache.reset_frame('df', f"{self.fingerprint}:{self.snapshot.commits}")
+
+    def _end_question(self):
+        """Commit or discard the column changes the question made to df"""
+        if self.snapshot is None or self.python_repl_tool is None:
+            return
+        # Code may have rebound df (df = df.dropna()); what it ends up naming is what the question changed
+        view = self.python_repl_tool.locals.get('df')
+        if not isinstance(view, (pd.DataFrame, LazyDataFrame)):
+            view = self.snapshot.view
+        if SNAPSHOT_COMMIT_CHANGES:
+            self.snapshot.commit(view)
+        else:
+            self.snapshot.discard(view)
+
+    def _answer_with_agent(self, prompt):
+        """Run the agent on a question, show the processed answer and remember how it was reached"""
         try:
             # Create a container for the reasoning steps
             reasoning_container = st.container()
@@ -81,10 +292,19 @@ class DataAnalysisAgent(LLMAgent):
                     status_container = st.empty()
 
                     # Custom callback handler with clean UI
-                    custom_callback = CustomStreamlitCallbackHandler()
-
-                    # Run the agent
-                    raw_response = self.agent.run(prompt, callbacks=[custom_callback])
+                    custom_callback = CustomStreamlitCallbackHandler(
+                        react_format=not isinstance(self.agent, ToolCallingAgentExecutor)
+                    )
+
+                    # Run the agent, recording the code it runs and the figures it shows
+                    self.python_repl_tool.start_question()
+                    if self.execution_ledger:
+                        self.execution_ledger.start_question()
+                    if self.answer_tool:
+                        self.answer_tool.start_question()
+                    started = time.monotonic()
+                    raw_response = self._run_agent(self._add_relevant_columns(prompt), custom_callback)
+                    completed = self._answer_completed(custom_callback, time.monotonic() - started)
 
                     # Clear status messages
                     status_container.empty()
@@ -95,12 +315,24 @@ class DataAnalysisAgent(LLMAgent):
             # Display the processed response
             st.write(processed_response)
 
+            # An answer forced out at the turn or time limit is a best effort; only finished answers are reused
+            if raw_response and completed:
+                executed_code = list(self.python_repl_tool.executed_code)
+                get_answer_cache().put(self.fingerprint, prompt, CachedAnswer(
+                    prompt, raw_response, processed_response, executed_code, list(self.python_repl_tool.figures),
+                ), self.df.columns)
+                # Only plans made of Python alone can be replayed; SQL results reach the code through the model
+                python_tools = {self.python_repl_tool.name} | ({self.answer_tool.name} if self.answer_tool else set())
+                if executed_code and set(custom_callback.tools_used) <= python_tools:
+                    answer_template = self.answer_tool.last_template if self.answer_tool else None
+                    get_plan_cache().put(self.schema_signature, prompt, executed_code, answer_template)
+
             return raw_response
 
         except Exception as e:
             error_msg = str(e)
 
-            # Try to extract the answer from parsing errors
+            # Try to extract the answer from parsing errors (ReAct executor only)
             if "OUTPUT_PARSING_FAILURE" in error_msg or "Final Answer:" in error_msg:
                 # Extract Final Answer from the error message
                 import re
@@ -121,6 +353,55 @@ class DataAnalysisAgent(LLMAgent):
 
             return f"I encountered an error processing your request: {error_msg}"
 
+    def _answer_from_plan(self, prompt):
+        """Re-run the code that answered this question on an earlier dataset with the same schema.
+
+        Returns the answer, or None when there is no plan or it did not run
+        cleanly here, in which case the plan is dropped and the LLM answers.
+        """
+        plan_cache = get_plan_cache()
+        plan = plan_cache.get(self.schema_signature, prompt)
+        if plan is None:
+            return None
+
+        print(f"[PLAN CACHE] Re-running {len(plan.code)} saved snippet(s) for {prompt!r}")
+        self.python_repl_tool.start_question()
+        if self.execution_ledger:
+            self.execution_ledger.start_question()
+        outputs = [self.python_repl_tool.run(code) for code in plan.code]
+        figures = list(self.python_repl_tool.figures)
+        result = str(outputs[-1]).replace("Visualization successfully displayed.", "").strip()
+
+        # Every snippet must run, and the plan must still produce something to show
+        failure = None
+        if len(self.python_repl_tool.executed_code) != len(plan.code):
+            failure = str(outputs[-1])
+        elif plan.answer_template is not None:
+            try:
+                templated_answer = AnswerWithCodeTool.fill_template(plan.answer_template, self.python_repl_tool.locals)
+            except ToolException as e:
+                failure = str(e)
+        elif not (result or figures):
+            failure = "the code produced no output"
+        if failure is not None:
+            print(f"[PLAN CACHE] Saved plan failed on this dataset, asking the LLM: {failure[:120]}")
+            plan_cache.discard(self.schema_signature, prompt)
+            return None
+
+        if plan.answer_template is not None:
+            answer = templated_answer
+        elif result:
+            answer = f"Result of the saved analysis for this question:\n\n```\n{result}\n```"
+        else:
+            answer = "Recreated the chart from the saved analysis for this question."
+        st.write(answer)
+        st.caption("Re-ran code from an earlier dataset with the same columns; no LLM call was needed")
+
+        get_answer_cache().put(
+            self.fingerprint, prompt, CachedAnswer(prompt, answer, answer, plan.code, figures), self.df.columns
+        )
+        return answer
+
     def _extract_response_from_error(self, error_msg):
         """Extract meaningful response from parsing error messages."""
         # Strategy 1: Look for content between backticks
@@ -0,0 +1,65 @@
+"""Shared pooled HTTP clients for OpenRouter requests"""
+
+import asyncio
+import threading
+import weakref
+
+import httpx
+
+from ..config import (
+    HTTP_TIMEOUT_SECONDS, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS, HTTP_ENABLE_HTTP2,
+)
+
+try:
+    import h2  # noqa: F401  (only needed so httpx can negotiate HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+_lock = threading.Lock()
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _client_options():
+    """Return the pool, timeout and protocol options shared by both clients"""
+    return {
+        'http2': HTTP_ENABLE_HTTP2 and HTTP2_AVAILABLE,
+        'timeout': httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=10.0),
+        'limits': httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    }
+
+
+def get_http_client():
+    """Return the process-wide keep-alive client used by synchronous calls.
+
+    httpx.Client is thread-safe, so every Streamlit script thread shares one
+    connection pool and pays the TCP/TLS handshake once per connection
+    instead of once per LLM call.
+    """
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+def get_async_http_client():
+    """Return the keep-alive async client bound to the running event loop.
+
+    Async connections belong to the loop that opened them, so each loop gets
+    its own pool; it is dropped together with the loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**_client_options())
+            _async_clients[loop] = client
+        return client
@@ -0,0 +1,178 @@
+"""Latency-aware model selection with circuit breakers for OpenRouter calls"""
+
+import random
+import threading
+import time
+from collections import deque
+
+from ..config import (
+    AVAILABLE_MODELS, ROUTER_WINDOW, ROUTER_FAILURE_THRESHOLD, ROUTER_ERROR_RATE_THRESHOLD,
+    ROUTER_COOLDOWN_SECONDS, ROUTER_BACKOFF_BASE_SECONDS, ROUTER_BACKOFF_MAX_SECONDS,
+)
+
+
+class ModelHealth:
+    """Rolling latency and outcome window of one model, with its circuit state"""
+
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)
+        self.response_times = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        # While half-open, when the trial request's slot frees up if its outcome is never recorded
+        self.trial_until = 0.0
+
+    @property
+    def mean_latency(self):
+        return sum(self.latencies) / len(self.latencies) if self.latencies else None
+
+    @property
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class ModelRouter:
+    """Track how each model behaves and pick where the next request goes.
+
+    Every call records its latency and outcome per model. A model's circuit
+    opens after failure_threshold consecutive failures, or when its error
+    rate over the window reaches error_rate_threshold, and stays open for
+    cooldown_seconds; after that a single trial request is let through (the
+    slot frees up again after another cooldown if its outcome is never
+    recorded) and its outcome closes or reopens the circuit. Failover goes
+    to the healthy model with the lowest error-weighted mean latency.
+    """
+
+    MIN_ERROR_RATE_SAMPLES = 5
+
+    def __init__(self, models=AVAILABLE_MODELS, window=ROUTER_WINDOW, failure_threshold=ROUTER_FAILURE_THRESHOLD,
+                 error_rate_threshold=ROUTER_ERROR_RATE_THRESHOLD, cooldown_seconds=ROUTER_COOLDOWN_SECONDS,
+                 backoff_base=ROUTER_BACKOFF_BASE_SECONDS, backoff_max=ROUTER_BACKOFF_MAX_SECONDS):
+        self.models = list(models)
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def record_success(self, model, latency):
+        """Record a completed call and close the model's circuit"""
+        with self._lock:
+            health = self._get_health(model)
+            health.latencies.append(latency)
+            health.outcomes.append(True)
+            health.consecutive_failures = 0
+            health.open_until = 0.0
+            health.trial_until = 0.0
+
+    def record_failure(self, model):
+        """Record a failed call and open the model's circuit if it keeps failing"""
+        with self._lock:
+            health = self._get_health(model)
+            health.outcomes.append(False)
+            health.consecutive_failures += 1
+            now = time.monotonic()
+            failed_trial = health.open_until and now >= health.open_until
+            too_many_errors = (len(health.outcomes) >= self.MIN_ERROR_RATE_SAMPLES
+                               and health.error_rate >= self.error_rate_threshold)
+            health.trial_until = 0.0
+            if failed_trial or health.consecutive_failures >= self.failure_threshold or too_many_errors:
+                health.open_until = now + self.cooldown_seconds
+                print(f"[DEBUG] Circuit opened for {model} for {self.cooldown_seconds:.0f}s")
+
+    def record_response_time(self, model, seconds):
+        """Record how long a request took to produce its first output"""
+        with self._lock:
+            self._get_health(model).response_times.append(seconds)
+
+    def response_time_percentile(self, model, percentile, min_samples):
+        """Return the given percentile of recent time-to-first-output, or None with too few samples"""
+        with self._lock:
+            health = self._health.get(model)
+            if health is None or len(health.response_times) < min_samples:
+                return None
+            times = sorted(health.response_times)
+            return times[min(len(times) - 1, int(percentile * len(times)))]
+
+    def is_available(self, model):
+        """Check whether the model's circuit is closed, or half-open with no trial request in flight"""
+        with self._lock:
+            return self._available(model, time.monotonic())
+
+    def _available(self, model, now):
+        health = self._health.get(model)
+        if health is None or not health.open_until:
+            return True
+        return now >= health.open_until and now >= health.trial_until
+
+    def _claim(self, model, now):
+        """Take the trial slot of a half-open model, so concurrent requests go elsewhere until it reports"""
+        health = self._health.get(model)
+        if health is not None and health.open_until:
+            health.trial_until = now + self.cooldown_seconds
+            print(f"[DEBUG] Sending a trial request to {model}")
+        return model
+
+    def select(self, preferred, exclude=()):
+        """Return the model for the next attempt.
+
+        The preferred model is kept while its circuit is closed and it has not
+        failed in this request; otherwise the fastest healthy alternative is
+        used. When every model is excluded or open, the preferred model is
+        tried anyway.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if preferred not in exclude and self._available(preferred, now):
+                return self._claim(preferred, now)
+
+            candidates = [model for model in self.models
+                          if model != preferred and model not in exclude and self._available(model, now)]
+            if not candidates:
+                return preferred
+            # Unmeasured models rank after measured ones, in configuration order
+            choice = min(candidates, key=lambda model: (self._score(model), self.models.index(model)))
+            return self._claim(choice, now)
+
+    def backoff(self, attempt):
+        """Return a full-jitter exponential delay before retry number attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _score(self, model):
+        """Mean latency inflated by the error rate; unmeasured models score infinity"""
+        health = self._health.get(model)
+        if health is None or health.mean_latency is None:
+            return float("inf")
+        return health.mean_latency / max(0.1, 1.0 - health.error_rate)
+
+    def _get_health(self, model):
+        health = self._health.get(model)
+        if health is None:
+            health = self._health[model] = ModelHealth(self.window)
+        return health
+
+    def stats(self):
+        """Return per-model latency, error rate and circuit state for display or logging"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                model: {
+                    'calls': len(health.outcomes),
+                    'mean_latency': health.mean_latency,
+                    'error_rate': health.error_rate,
+                    'circuit_open': now < health.open_until,
+                }
+                for model, health in self._health.items()
+            }
+
+
+_model_router = ModelRouter()
+
+
+def get_model_router():
+    """Return the process-wide model router"""
+    return _model_router
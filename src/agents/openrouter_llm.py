@@ -1,9 +1,68 @@
 """OpenRouter LLM wrapper for LangChain"""
 
-import requests
+import asyncio
+import json
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import httpx
+from langchain_core.callbacks import CallbackManager, CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
-from pydantic import Field
-from typing import Optional, List, Any
+from langchain_core.outputs import Generation, GenerationChunk, LLMResult
+from langchain_core.pydantic_v1 import Field
+from typing import Optional, List, Any, Iterator, AsyncIterator
+
+from .http_client import get_http_client, get_async_http_client
+from .model_router import get_model_router
+from .token_budget import StopSequenceFilter, get_token_budget, estimate_tokens, TOOL_CALLING_STEP
+from ..cache import get_llm_cache
+from ..config import (
+    OPENROUTER_API_URL, ROUTER_FAILOVER, ROUTER_MAX_ATTEMPTS, HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES,
+    HEDGE_MAX_PER_SESSION,
+)
+
+# What one API call asks for; prefix is assistant text the model should continue from.
+# Chat turns send their own messages and tool definitions instead of a prompt.
+CompletionRequest = namedtuple(
+    'CompletionRequest', ['prompt', 'stop', 'max_tokens', 'prefix', 'messages', 'tools', 'tool_choice'],
+    defaults=(None, None, None),
+)
+# What one API call returned, after client-side stop handling, and the model that answered it
+Completion = namedtuple(
+    'Completion', ['text', 'finish_reason', 'completion_tokens', 'trimmed_tokens', 'tool_calls', 'model'],
+    defaults=(None, None),
+)
+
+# OpenRouter accepts at most this many stop sequences
+MAX_STOP_SEQUENCES = 4
+
+
+class OpenRouterError(Exception):
+    """OpenRouter request failure with the HTTP status when there is one"""
+
+    RETRYABLE_STATUS_CODES = {408, 429}
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+        # Rate limits, timeouts, server errors and network failures (no status) say something about the model's
+        # health and are worth retrying; a bad key or an unsupported request does not and is not
+        self.transient = status_code is None or status_code in self.RETRYABLE_STATUS_CODES or status_code >= 500
+        self.retryable = self.transient
+
+    @staticmethod
+    def counts_against_model(error):
+        """Whether an error should count towards opening the model's circuit"""
+        return isinstance(error, OpenRouterError) and error.transient
+
+    @classmethod
+    def from_error_body(cls, error):
+        """Build the error from an "error" object returned with a 200 response or inside a stream"""
+        code = error.get('code') if isinstance(error, dict) else None
+        status_code = code if isinstance(code, int) else 500
+        return cls(f"OpenRouter API error: {error}", status_code=status_code)
 
 
 class OpenRouterLLM(LLM):
@@ -13,6 +72,12 @@ class OpenRouterLLM(LLM):
     model: str = Field(default="x-ai/grok-4.1-fast:free")
     temperature: float = Field(default=0.7)
     max_tokens: Optional[int] = Field(default=None)
+    streaming: bool = Field(default=False)
+    use_response_cache: bool = Field(default=True)
+    failover: bool = Field(default=ROUTER_FAILOVER)
+    hedging: bool = Field(default=HEDGE_ENABLED)
+    max_hedges: int = Field(default=HEDGE_MAX_PER_SESSION)
+    hedges_sent: int = Field(default=0)
 
     @property
     def _llm_type(self) -> str:
@@ -22,9 +87,538 @@ class OpenRouterLLM(LLM):
         self,
         prompt: str,
         stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> str:
         """Call OpenRouter API"""
+        cache, cache_key = self._response_cache(prompt, stop)
+        cached = cache.get(cache_key) if cache else None
+        if cached is not None:
+            if run_manager and self.streaming:
+                run_manager.on_llm_new_token(cached)
+            return cached
+
+        budget = get_token_budget()
+        max_tokens = budget.max_tokens_for(self.model, self.max_tokens, stop)
+        completion = self._request(CompletionRequest(prompt, stop, max_tokens, ""), run_manager)
+
+        continuation = None
+        if self._needs_continuation(completion, max_tokens):
+            # The step outgrew its budget: let the model carry on from where it was cut off
+            request = CompletionRequest(prompt, stop, self.max_tokens - completion.completion_tokens, completion.text)
+            continuation = self._request(request, run_manager)
+
+        text = self._record_step(stop, max_tokens, completion, continuation)
+        self._cache_response(cache, prompt, stop, text, completion, continuation)
+        return text
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call OpenRouter API without blocking a thread while waiting on the network"""
+        cache, cache_key = self._response_cache(prompt, stop)
+        cached = cache.get(cache_key) if cache else None
+        if cached is not None:
+            if run_manager and self.streaming:
+                await run_manager.on_llm_new_token(cached)
+            return cached
+
+        budget = get_token_budget()
+        max_tokens = budget.max_tokens_for(self.model, self.max_tokens, stop)
+        completion = await self._arequest(CompletionRequest(prompt, stop, max_tokens, ""), run_manager)
+
+        continuation = None
+        if self._needs_continuation(completion, max_tokens):
+            request = CompletionRequest(prompt, stop, self.max_tokens - completion.completion_tokens, completion.text)
+            continuation = await self._arequest(request, run_manager)
+
+        text = self._record_step(stop, max_tokens, completion, continuation)
+        self._cache_response(cache, prompt, stop, text, completion, continuation)
+        return text
+
+    def chat(self, messages, tools=None, tool_choice=None, callbacks=None):
+        """Run one chat turn with OpenAI-style tool definitions.
+
+        Returns the assistant message as a dict with "role", "content" and,
+        when the model called tools, "tool_calls" with JSON-encoded arguments,
+        ready to be appended to messages for the next turn. Callbacks see the
+        turn like any other LLM call, including streamed answer tokens.
+        """
+        run_manager = CallbackManager.configure(callbacks).on_llm_start(
+            {'name': self._llm_type}, [messages[-1].get('content') or ""]
+        )[0]
+
+        try:
+            request_body = json.dumps([messages, tools, tool_choice], ensure_ascii=False, sort_keys=True)
+            cache, cache_key = self._response_cache(request_body, None)
+            cached = cache.get(cache_key) if cache else None
+            if cached is not None:
+                message = json.loads(cached)
+                if self.streaming and message.get('content'):
+                    run_manager.on_llm_new_token(message['content'])
+            else:
+                max_tokens = get_token_budget().max_tokens_for(self.model, self.max_tokens, None, TOOL_CALLING_STEP)
+                request = CompletionRequest(None, None, max_tokens, "", messages, tools, tool_choice)
+                completion = self._request(request, run_manager)
+
+                continuation = None
+                if self._needs_continuation(completion, max_tokens):
+                    if completion.tool_calls:
+                        # Arguments cut off mid-JSON cannot be continued: ask again with the full ceiling
+                        completion = self._request(request._replace(max_tokens=self.max_tokens), run_manager)
+                    else:
+                        request = request._replace(
+                            max_tokens=self.max_tokens - completion.completion_tokens, prefix=completion.text
+                        )
+                        continuation = self._request(request, run_manager)
+
+                text = self._record_step(None, max_tokens, completion, continuation, TOOL_CALLING_STEP)
+                message = {'role': 'assistant', 'content': text or None}
+                tool_calls = (continuation.tool_calls if continuation is not None else None) or completion.tool_calls
+                if tool_calls:
+                    message['tool_calls'] = tool_calls
+                self._cache_response(
+                    cache, request_body, None, json.dumps(message, ensure_ascii=False), completion, continuation
+                )
+        except BaseException as e:
+            run_manager.on_llm_error(e)
+            raise
+
+        run_manager.on_llm_end(LLMResult(generations=[[Generation(text=message.get('content') or "")]]))
+        return message
+
+    def _response_cache(self, prompt, stop):
+        """Return the response cache and this request's key, or (None, None) when caching is off"""
+        cache = get_llm_cache()
+        if not self.use_response_cache or not cache.enabled:
+            return None, None
+        return cache, cache.make_key(self.model, prompt, self.temperature, stop)
+
+    def _cache_response(self, cache, prompt, stop, text, completion, continuation=None):
+        """Record a response under the model that answered it, which failover may have changed"""
+        if not cache:
+            return
+        model = completion.model or self.model
+        if continuation is not None and (continuation.model or self.model) != model:
+            # Two models wrote parts of this text; neither would answer it that way alone
+            return
+        cache.put(cache.make_key(model, prompt, self.temperature, stop), model, text)
+
+    def _needs_continuation(self, completion, max_tokens):
+        """Check whether a completion was cut by a budget below the configured max_tokens"""
+        return (completion.finish_reason == "length" and bool(self.max_tokens)
+                and max_tokens < self.max_tokens and completion.completion_tokens < self.max_tokens)
+
+    def _record_step(self, stop, max_tokens, completion, continuation, step=None):
+        """Record token usage of a step and return its full text"""
+        text, used, trimmed = completion.text, completion.completion_tokens, completion.trimmed_tokens
+        if continuation is not None:
+            text += continuation.text
+            used += continuation.completion_tokens
+            trimmed += continuation.trimmed_tokens
+        get_token_budget().record(
+            self.model, stop, self.max_tokens, max_tokens, used, trimmed, continued=continuation is not None, step=step
+        )
+        return text
+
+    def _request(self, request, run_manager):
+        """Send the completion request, retrying and failing over on rate limits and server errors"""
+        router = get_model_router()
+        failed_models = []
+
+        for attempt in range(self._max_attempts()):
+            if attempt:
+                time.sleep(router.backoff(attempt))
+            # Skips models whose circuit is open, and models that already failed this request
+            model = router.select(self.model, exclude=failed_models) if self.failover else self.model
+
+            start = time.perf_counter()
+            try:
+                if self.hedging:
+                    # Records the outcome of every request it races
+                    return self._send_hedged(request, model, run_manager)
+                completion = self._send(request, model, run_manager)
+            except OpenRouterError as e:
+                if not self.hedging and e.transient:
+                    router.record_failure(model)
+                if not e.retryable or attempt + 1 == self._max_attempts():
+                    raise
+                failed_models.append(model)
+                print(f"[DEBUG] {model} failed ({str(e)[:120]}), retrying")
+                continue
+
+            router.record_success(model, time.perf_counter() - start)
+            return completion
+
+    async def _arequest(self, request, run_manager):
+        """Send the completion request without blocking the event loop, with the same failover"""
+        router = get_model_router()
+        failed_models = []
+
+        for attempt in range(self._max_attempts()):
+            if attempt:
+                await asyncio.sleep(router.backoff(attempt))
+            # Skips models whose circuit is open, and models that already failed this request
+            model = router.select(self.model, exclude=failed_models) if self.failover else self.model
+
+            start = time.perf_counter()
+            try:
+                if self.hedging:
+                    # Records the outcome of every request it races
+                    return await self._asend_hedged(request, model, run_manager)
+                completion = await self._asend(request, model, run_manager)
+            except OpenRouterError as e:
+                if not self.hedging and e.transient:
+                    router.record_failure(model)
+                if not e.retryable or attempt + 1 == self._max_attempts():
+                    raise
+                failed_models.append(model)
+                print(f"[DEBUG] {model} failed ({str(e)[:120]}), retrying")
+                continue
+
+            router.record_success(model, time.perf_counter() - start)
+            return completion
+
+    def _max_attempts(self):
+        return max(1, ROUTER_MAX_ATTEMPTS) if self.failover else 1
+
+    def _send(self, request, model, run_manager):
+        """Make one completion request to the given model"""
+        if self.streaming:
+            # Agents call generate(), not stream(); stream anyway so callbacks see each token
+            chunks = []
+            try:
+                for chunk in self._stream_model(request, model, run_manager):
+                    chunks.append(chunk)
+            except OpenRouterError as e:
+                # Tokens already reached the UI; a retry would repeat them
+                e.retryable = e.retryable and not any(chunk.text for chunk in chunks)
+                raise
+            return self._completion_from_chunks(chunks)._replace(model=model)
+
+        headers, payload = self._build_request(request, model)
+
+        try:
+            # Shared keep-alive pool: no new TCP/TLS handshake per agent iteration
+            response = get_http_client().post(OPENROUTER_API_URL, headers=headers, json=payload)
+        except httpx.HTTPError as e:
+            raise OpenRouterError(f"OpenRouter API request failed: {str(e)}")
+
+        return self._apply_stop(request, *self._parse_response(response))._replace(model=model)
+
+    async def _asend(self, request, model, run_manager):
+        """Make one completion request to the given model without blocking the event loop"""
+        if self.streaming:
+            chunks = []
+            try:
+                async for chunk in self._astream_model(request, model, run_manager):
+                    chunks.append(chunk)
+            except OpenRouterError as e:
+                e.retryable = e.retryable and not any(chunk.text for chunk in chunks)
+                raise
+            return self._completion_from_chunks(chunks)._replace(model=model)
+
+        headers, payload = self._build_request(request, model)
+
+        try:
+            response = await get_async_http_client().post(OPENROUTER_API_URL, headers=headers, json=payload)
+        except httpx.HTTPError as e:
+            raise OpenRouterError(f"OpenRouter API request failed: {str(e)}")
+
+        return self._apply_stop(request, *self._parse_response(response))._replace(model=model)
+
+    def _send_hedged(self, request, model, run_manager):
+        """Send the request and, if it is slow to answer, race a duplicate against it.
+
+        Both requests run in worker threads and report their output through a
+        queue; tokens are forwarded to the callbacks from this thread, which
+        owns the Streamlit script context. The first request to produce
+        output wins and the other is cancelled.
+        """
+        router = get_model_router()
+        events = queue.Queue()
+        models, cancelled = {}, {}
+        start = time.perf_counter()
+
+        def launch(tag, target_model):
+            models[tag] = target_model
+            cancelled[tag] = threading.Event()
+            threading.Thread(
+                target=self._race_worker, args=(request, target_model, tag, events, cancelled[tag]), daemon=True
+            ).start()
+
+        launch('primary', model)
+        hedge_delay = router.response_time_percentile(model, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+        winner, chunks, failed = None, [], set()
+
+        while True:
+            timeout = None
+            if hedge_delay is not None and 'hedge' not in models:
+                timeout = max(0.0, start + hedge_delay - time.perf_counter())
+            try:
+                tag, kind, value = events.get(timeout=timeout)
+            except queue.Empty:
+                hedge_delay = self._start_hedge(model, hedge_delay)
+                if hedge_delay is not None:
+                    launch('hedge', router.select(model, exclude=[model]))
+                continue
+
+            if winner is not None and tag != winner:
+                continue
+            if kind == 'error':
+                if OpenRouterError.counts_against_model(value):
+                    router.record_failure(models[tag])
+                failed.add(tag)
+                if winner is None and len(failed) < len(models):
+                    # The other request may still answer
+                    continue
+                if isinstance(value, OpenRouterError) and chunks:
+                    value.retryable = False
+                raise value
+            if winner is None:
+                winner = tag
+                router.record_response_time(models[tag], time.perf_counter() - start)
+                for other, event in cancelled.items():
+                    if other != tag:
+                        event.set()
+            if kind == 'done':
+                router.record_success(models[tag], time.perf_counter() - start)
+                return value
+            chunks.append(value)
+            if run_manager and self.streaming:
+                run_manager.on_llm_new_token(value, chunk=GenerationChunk(text=value))
+
+    def _start_hedge(self, model, hedge_delay):
+        """Count a hedge against the session budget; returns None when the budget is spent"""
+        if self.hedges_sent >= self.max_hedges:
+            return None
+        self.hedges_sent += 1
+        print(f"[DEBUG] No answer from {model} after {hedge_delay:.1f}s, hedging "
+              f"({self.hedges_sent}/{self.max_hedges})")
+        return hedge_delay
+
+    def _race_worker(self, request, model, tag, events, cancelled):
+        """Run one request of a hedged race and report its output as (tag, kind, value) events"""
+        try:
+            if self.streaming:
+                chunks = []
+                for chunk in self._stream_model(request, model, None):
+                    if cancelled.is_set():
+                        # Leaving the generator closes the response and its connection
+                        return
+                    chunks.append(chunk)
+                    if chunk.text:
+                        events.put((tag, 'token', chunk.text))
+                completion = self._completion_from_chunks(chunks)._replace(model=model)
+            else:
+                # A non-streamed request cannot be interrupted; its late result is dropped
+                completion = self._send(request, model, None)
+                events.put((tag, 'token', completion.text))
+            events.put((tag, 'done', completion))
+        except Exception as e:
+            events.put((tag, 'error', e))
+
+    async def _asend_hedged(self, request, model, run_manager):
+        """Send the request and, if it is slow to answer, race a duplicate and cancel the loser"""
+        router = get_model_router()
+        start = time.perf_counter()
+        tasks = {asyncio.ensure_future(self._asend(request, model, None)): model}
+
+        hedge_delay = router.response_time_percentile(model, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done and self._start_hedge(model, hedge_delay) is not None:
+                hedge_model = router.select(model, exclude=[model])
+                tasks[asyncio.ensure_future(self._asend(request, hedge_model, None))] = hedge_model
+
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        if OpenRouterError.counts_against_model(task.exception()):
+                            router.record_failure(tasks[task])
+                        if not pending:
+                            raise task.exception()
+                        continue
+                    elapsed = time.perf_counter() - start
+                    router.record_response_time(tasks[task], elapsed)
+                    router.record_success(tasks[task], elapsed)
+                    completion = task.result()
+                    if run_manager and self.streaming and completion.text:
+                        text = completion.text
+                        await run_manager.on_llm_new_token(text, chunk=GenerationChunk(text=text))
+                    return completion
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        """Stream the completion as server-sent events, one chunk per content delta"""
+        request = CompletionRequest(prompt, stop, self.max_tokens, "")
+        yield from self._stream_model(request, self.model, run_manager)
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Stream the completion as server-sent events without blocking the event loop"""
+        request = CompletionRequest(prompt, stop, self.max_tokens, "")
+        async for chunk in self._astream_model(request, self.model, run_manager):
+            yield chunk
+
+    def _stream_model(self, request, model, run_manager):
+        """Yield the content deltas of one streamed request to the given model.
+
+        Text is cut at the first stop sequence even if the provider ignores
+        the stop parameter, and the stream is closed there so generation
+        stops. The last chunk is empty and carries the finish reason and
+        token usage in generation_info.
+        """
+        headers, payload = self._build_request(request, model, stream=True)
+        stop_filter = StopSequenceFilter(request.stop)
+        received, finish_reason, completion_tokens, tool_calls = [], None, None, {}
+
+        try:
+            with get_http_client().stream("POST", OPENROUTER_API_URL, headers=headers, json=payload) as response:
+                if response.status_code != 200:
+                    response.read()
+                    self._parse_response(response)
+
+                for line in response.iter_lines():
+                    event = self._parse_stream_line(line)
+                    if event is None:
+                        break
+                    content, reason, usage, tool_call_deltas = self._parse_stream_event(event)
+                    finish_reason = reason or finish_reason
+                    completion_tokens = usage or completion_tokens
+                    self._merge_tool_call_deltas(tool_calls, tool_call_deltas)
+                    received.append(content)
+                    text = stop_filter.feed(content)
+                    if text:
+                        yield self._emit_chunk(text, run_manager)
+                    if stop_filter.stopped:
+                        finish_reason = "stop"
+                        break
+        except httpx.HTTPError as e:
+            raise OpenRouterError(f"OpenRouter API request failed: {str(e)}")
+
+        text = stop_filter.flush()
+        if text:
+            yield self._emit_chunk(text, run_manager)
+        yield self._final_chunk(stop_filter, received, finish_reason, completion_tokens, tool_calls)
+
+    async def _astream_model(self, request, model, run_manager):
+        """Yield the content deltas of one streamed request to the given model without blocking"""
+        headers, payload = self._build_request(request, model, stream=True)
+        stop_filter = StopSequenceFilter(request.stop)
+        received, finish_reason, completion_tokens, tool_calls = [], None, None, {}
+
+        try:
+            client = get_async_http_client()
+            async with client.stream("POST", OPENROUTER_API_URL, headers=headers, json=payload) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    self._parse_response(response)
+
+                async for line in response.aiter_lines():
+                    event = self._parse_stream_line(line)
+                    if event is None:
+                        break
+                    content, reason, usage, tool_call_deltas = self._parse_stream_event(event)
+                    finish_reason = reason or finish_reason
+                    completion_tokens = usage or completion_tokens
+                    self._merge_tool_call_deltas(tool_calls, tool_call_deltas)
+                    received.append(content)
+                    text = stop_filter.feed(content)
+                    if text:
+                        chunk = GenerationChunk(text=text)
+                        if run_manager:
+                            await run_manager.on_llm_new_token(text, chunk=chunk)
+                        yield chunk
+                    if stop_filter.stopped:
+                        finish_reason = "stop"
+                        break
+        except httpx.HTTPError as e:
+            raise OpenRouterError(f"OpenRouter API request failed: {str(e)}")
+
+        text = stop_filter.flush()
+        if text:
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        yield self._final_chunk(stop_filter, received, finish_reason, completion_tokens, tool_calls)
+
+    def _emit_chunk(self, text, run_manager):
+        """Wrap streamed text in a chunk and pass it to the callbacks"""
+        chunk = GenerationChunk(text=text)
+        if run_manager:
+            run_manager.on_llm_new_token(text, chunk=chunk)
+        return chunk
+
+    def _final_chunk(self, stop_filter, received, finish_reason, completion_tokens, tool_calls):
+        """Return the empty chunk that closes a stream with its finish reason, usage and tool calls"""
+        return GenerationChunk(text="", generation_info={
+            'finish_reason': finish_reason,
+            'completion_tokens': completion_tokens or estimate_tokens("".join(received)),
+            'trimmed_tokens': estimate_tokens(stop_filter.trimmed),
+            'tool_calls': [tool_calls[index] for index in sorted(tool_calls)] or None,
+        })
+
+    def _merge_tool_call_deltas(self, tool_calls, deltas):
+        """Assemble streamed tool calls; names and arguments arrive in fragments keyed by index"""
+        for delta in deltas or []:
+            call = tool_calls.setdefault(delta.get('index', len(tool_calls)), {
+                'id': None, 'type': 'function', 'function': {'name': "", 'arguments': ""},
+            })
+            if delta.get('id'):
+                call['id'] = delta['id']
+            function = delta.get('function') or {}
+            call['function']['name'] += function.get('name') or ""
+            call['function']['arguments'] += function.get('arguments') or ""
+
+    def _completion_from_chunks(self, chunks):
+        """Join streamed chunks into a Completion"""
+        info = (chunks[-1].generation_info or {}) if chunks else {}
+        return Completion(
+            "".join(chunk.text for chunk in chunks),
+            info.get('finish_reason'),
+            info.get('completion_tokens', 0),
+            info.get('trimmed_tokens', 0),
+            info.get('tool_calls'),
+        )
+
+    def _apply_stop(self, request, content, finish_reason, completion_tokens, tool_calls=None):
+        """Cut a whole completion at its first stop sequence"""
+        stop_filter = StopSequenceFilter(request.stop)
+        text = stop_filter.feed(content) + stop_filter.flush()
+        if stop_filter.stopped:
+            finish_reason = "stop"
+        return Completion(
+            text,
+            finish_reason,
+            completion_tokens or estimate_tokens(content),
+            estimate_tokens(stop_filter.trimmed),
+            tool_calls,
+        )
+
+    def _build_request(self, request, model=None, stream=False):
+        """Build the headers and JSON payload of a chat completion request"""
         headers = {
             "Authorization": f"Bearer {self.openrouter_api_key}",
             "Content-Type": "application/json",
@@ -32,39 +626,80 @@ class OpenRouterLLM(LLM):
             "X-Title": "Analyzia Data Analysis"
         }
 
+        messages = list(request.messages or [{"role": "user", "content": request.prompt}])
+        if request.prefix:
+            # Assistant prefill: the model continues this text instead of starting over
+            messages.append({"role": "assistant", "content": request.prefix})
+
         payload = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
+            "model": model or self.model,
+            "messages": messages,
             "temperature": self.temperature,
         }
 
-        if self.max_tokens:
-            payload["max_tokens"] = self.max_tokens
+        if request.max_tokens:
+            payload["max_tokens"] = request.max_tokens
 
-        try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
+        if request.stop:
+            # Stop server-side so the model does not generate its own "Observation:" text
+            payload["stop"] = list(request.stop)[:MAX_STOP_SEQUENCES]
 
-            # Get response text before raising for better error messages
-            response_text = response.text
+        if request.tools:
+            # Native tool calling: arguments come back as JSON, no ReAct text to parse
+            payload["tools"] = request.tools
+            if request.tool_choice:
+                payload["tool_choice"] = request.tool_choice
 
-            if response.status_code != 200:
-                error_detail = f"Status {response.status_code}: {response_text}"
-                raise Exception(f"OpenRouter API error: {error_detail}")
+        if stream:
+            payload["stream"] = True
 
+        return headers, payload
+
+    def _parse_response(self, response):
+        """Return (text, finish reason, completion tokens, tool calls) or raise with the API's error details"""
+        if response.status_code != 200:
+            error_detail = f"Status {response.status_code}: {response.text}"
+            raise OpenRouterError(f"OpenRouter API error: {error_detail}", status_code=response.status_code)
+
+        try:
             result = response.json()
 
             # Check if there's an error in the response
             if 'error' in result:
-                raise Exception(f"OpenRouter API error: {result['error']}")
+                raise OpenRouterError.from_error_body(result['error'])
+
+            choice = result['choices'][0]
+            completion_tokens = (result.get('usage') or {}).get('completion_tokens')
+            message = choice['message']
+            return (message.get('content') or "", choice.get('finish_reason'), completion_tokens,
+                    message.get('tool_calls') or None)
+
+        except (KeyError, IndexError, ValueError) as e:
+            raise Exception(f"Unexpected API response format: {str(e)}. Response: {response.text}")
+
+    def _parse_stream_line(self, line):
+        """Return the event of one SSE line, {} for keep-alives and None at the end"""
+        # Blank lines separate events; lines starting with ":" are comments such as "OPENROUTER PROCESSING"
+        if not line.startswith("data:"):
+            return {}
+
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return None
+
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return {}
 
-            return result['choices'][0]['message']['content']
+        # Errors after the response started arrive as an event instead of a status code
+        if 'error' in event:
+            raise OpenRouterError.from_error_body(event['error'])
+        return event
 
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"OpenRouter API request failed: {str(e)}")
-        except (KeyError, IndexError) as e:
-            raise Exception(f"Unexpected API response format: {str(e)}. Response: {response_text if 'response_text' in locals() else 'N/A'}")
+    def _parse_stream_event(self, event):
+        """Return (content delta, finish reason, completion tokens, tool call deltas) of a stream event"""
+        choice = (event.get('choices') or [{}])[0]
+        delta = choice.get('delta') or {}
+        completion_tokens = (event.get('usage') or {}).get('completion_tokens')
+        return delta.get('content') or "", choice.get('finish_reason'), completion_tokens, delta.get('tool_calls')
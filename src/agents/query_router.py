@@ -0,0 +1,281 @@
+"""Local answers to simple factual questions, without calling the LLM"""
+
+import re
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from ..config import FAST_PATH_MIN_CONFIDENCE, FAST_PATH_MAX_LISTED_VALUES, FAST_PATH_MAX_TOP_ROWS
+from ..data import LazyDataFrame
+from ..utils import DataFrameUtils
+
+# A local answer: the text shown in the chat and the equivalent pandas expression
+FastAnswer = namedtuple('FastAnswer', ['text', 'code', 'confidence'])
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_CAMEL_CASE_PATTERN = re.compile(r"([a-z0-9])([A-Z])")
+
+# Words that carry no meaning for the supported questions
+_FILLER = {
+    'a', 'an', 'the', 'what', 'whats', 's', 'is', 'are', 'was', 'were', 'of', 'in', 'on', 'for', 'to', 'me',
+    'tell', 'show', 'give', 'list', 'please', 'how', 'does', 'do', 'did', 'there', 'this', 'that', 'it', 'its',
+    'dataset', 'data', 'df', 'table', 'file', 'value', 'values', 'overall', 'entire', 'whole', 'all', 'across',
+    'i', 'can', 'you', 'find', 'get', 'we', 'have', 'has', 'be', 'number', 'count', 'many', 'much', 'rows', 'row',
+    'records', 'record', 'entries', 'column', 'columns', 'field', 'fields', 'with', 'contain',
+}
+
+_COUNT_WORDS = {'many', 'number', 'count', 'total'}
+_ROW_WORDS = {'rows', 'row', 'records', 'record', 'entries', 'observations', 'samples', 'lines'}
+_COLUMN_WORDS = {'columns', 'column', 'fields', 'features', 'variables'}
+_SHAPE_WORDS = {'shape', 'dimensions', 'dimension', 'size'}
+_COLUMN_LIST_WORDS = {'names', 'name', 'list', 'which', 'what'}
+_MISSING_WORDS = {'missing', 'null', 'nulls', 'nan', 'nans', 'na', 'blank'}
+_UNIQUE_WORDS = {'unique', 'distinct'}
+_TOP_WORDS = {'top': False, 'highest': False, 'largest': False, 'bottom': True, 'lowest': True, 'smallest': True}
+
+# Aggregation words, the Series method they map to and how the answer names the result
+_AGGREGATIONS = {
+    'highest': ('max', 'highest'), 'max': ('max', 'highest'), 'maximum': ('max', 'highest'),
+    'largest': ('max', 'largest'), 'biggest': ('max', 'largest'), 'greatest': ('max', 'highest'),
+    'latest': ('max', 'latest'), 'newest': ('max', 'latest'),
+    'lowest': ('min', 'lowest'), 'min': ('min', 'lowest'), 'minimum': ('min', 'lowest'),
+    'smallest': ('min', 'smallest'), 'earliest': ('min', 'earliest'), 'oldest': ('min', 'earliest'),
+    'average': ('mean', 'average'), 'mean': ('mean', 'average'), 'avg': ('mean', 'average'),
+    'median': ('median', 'median'),
+    'sum': ('sum', 'total'), 'total': ('sum', 'total'),
+}
+# Aggregation words that only make sense for dates
+_DATETIME_AGGREGATION_WORDS = {'latest', 'newest', 'earliest', 'oldest'}
+
+
+def _tokens(text):
+    """Split text into lowercase word tokens, separating camelCase"""
+    return _TOKEN_PATTERN.findall(_CAMEL_CASE_PATTERN.sub(r"\1 \2", str(text)).lower())
+
+
+class QueryRouter:
+    """Answer simple factual questions from the data, before they reach the LLM.
+
+    Recognizes row and column counts, the dataset shape and column names,
+    missing values, unique counts and values, min/max/mean/median/sum of
+    one column, and top-N rows by a column. Column names are matched as
+    whole phrases against the question. Every word that is neither filler,
+    part of the recognized pattern nor a matched column lowers the
+    confidence, so questions with filters, groupings or anything else
+    unrecognized fall through to the agent.
+    """
+
+    # Confidence lost per word of the question that the pattern does not explain
+    UNEXPLAINED_WORD_PENALTY = 0.25
+
+    def __init__(self, df, profile=None, min_confidence=FAST_PATH_MIN_CONFIDENCE):
+        self.df = df
+        self.profile = profile
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def answer(self, question):
+        """Return a FastAnswer, or None when the question needs the agent"""
+        try:
+            result = self._answer(_tokens(question))
+        except Exception as e:
+            # Unexpected dtypes or values: the agent handles these
+            print(f"[FAST PATH] Declined after error: {str(e)}")
+            result = None
+
+        if result is not None and result.confidence < self.min_confidence:
+            result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if result is not None:
+            print(f"[FAST PATH] Answered locally with {result.code} (confidence {result.confidence:.2f})")
+        return result
+
+    def _answer(self, tokens):
+        """Match the question against each supported pattern in turn"""
+        words = set(tokens)
+        columns, used = self._match_columns(tokens)
+        if columns is None:
+            return None
+
+        for matcher in (self._top_n, self._missing, self._unique, self._dataset_shape, self._aggregate):
+            match = matcher(tokens, words, columns)
+            if match is None:
+                continue
+            pattern_words, text, code = match
+            unexplained = [
+                i for i, token in enumerate(tokens)
+                if i not in used and token not in pattern_words and token not in _FILLER
+            ]
+            confidence = max(0.0, 1.0 - self.UNEXPLAINED_WORD_PENALTY * len(unexplained))
+            return FastAnswer(text, code, confidence)
+        return None
+
+    def _match_columns(self, tokens):
+        """Find columns named in the question.
+
+        Returns ({column: start position}, matched positions), or (None, None)
+        when the question names columns that cannot be told apart.
+        """
+        spans = []
+        for col in self.df.columns:
+            col_tokens = _tokens(col)
+            # Names made only of filler ("a", "value", "count") would match ordinary words
+            if not col_tokens or all(token in _FILLER for token in col_tokens):
+                continue
+            size = len(col_tokens)
+            for start in range(len(tokens) - size + 1):
+                window = tokens[start:start + size]
+                # Allow a plural on the last word ("ratings" for RATING)
+                if window[:-1] == col_tokens[:-1] and window[-1] in (col_tokens[-1], col_tokens[-1] + 's'):
+                    spans.append((start, start + size, col))
+
+        # Two columns whose names read the same ("Rating" and "rating") cannot be told apart
+        if len({(start, end) for start, end, _ in spans}) != len(spans):
+            return None, None
+
+        # Prefer the longest name where matches overlap ("review date" over "date")
+        spans.sort(key=lambda span: span[0] - span[1])
+        used, columns = set(), {}
+        for start, end, col in spans:
+            positions = set(range(start, end))
+            if positions & used:
+                continue
+            used |= positions
+            columns.setdefault(col, start)
+        return columns, used
+
+    def _dataset_shape(self, tokens, words, columns):
+        """Row count, column count, shape or column names of the dataset"""
+        if columns:
+            return None
+        rows, cols = len(self.df), len(self.df.columns)
+
+        if words & _SHAPE_WORDS or (words & _ROW_WORDS and words & _COLUMN_WORDS and words & _COUNT_WORDS):
+            return (_SHAPE_WORDS | _ROW_WORDS | _COLUMN_WORDS | _COUNT_WORDS | {'and'},
+                    f"The dataset has {rows:,} rows and {cols:,} columns.", "df.shape")
+        if words & _ROW_WORDS and words & _COUNT_WORDS and not words & _COLUMN_WORDS:
+            return _ROW_WORDS | _COUNT_WORDS, f"The dataset has {rows:,} rows.", "len(df)"
+        if words & _COLUMN_WORDS and words & _COUNT_WORDS and not words & _ROW_WORDS:
+            return _COLUMN_WORDS | _COUNT_WORDS, f"The dataset has {cols:,} columns.", "len(df.columns)"
+        if words & _COLUMN_WORDS and words & _COLUMN_LIST_WORDS:
+            names = ", ".join(f"`{col}`" for col in list(self.df.columns)[:FAST_PATH_MAX_LISTED_VALUES])
+            if cols > FAST_PATH_MAX_LISTED_VALUES:
+                names += f" and {cols - FAST_PATH_MAX_LISTED_VALUES:,} more"
+            return _COLUMN_WORDS | _COLUMN_LIST_WORDS, f"The dataset has {cols:,} columns: {names}.", "list(df.columns)"
+        return None
+
+    def _missing(self, tokens, words, columns):
+        """Missing values in one column or across the dataset"""
+        if not words & _MISSING_WORDS or len(columns) > 1:
+            return None
+        rows = len(self.df)
+
+        if columns:
+            col, = columns
+            nulls = int(self.df[col].isna().sum())
+            share = f" ({nulls / rows:.2%} of {rows:,} rows)" if rows else ""
+            return (_MISSING_WORDS, f"`{col}` has {nulls:,} missing values{share}.",
+                    f"df['{col}'].isna().sum()")
+
+        if isinstance(self.df, LazyDataFrame) and self.profile:
+            # Counting nulls directly would load every column of a wide dataset
+            nulls = pd.Series({col: stats['nulls'] for col, stats in self.profile['columns'].items()})
+        else:
+            nulls = self.df.isna().sum()
+        nulls = nulls[nulls > 0].sort_values(ascending=False)
+        if nulls.empty:
+            return _MISSING_WORDS, "There are no missing values in the dataset.", "df.isna().sum()"
+
+        lines = [f"- `{col}`: {int(count):,} ({count / rows:.2%})"
+                 for col, count in nulls.head(FAST_PATH_MAX_LISTED_VALUES).items()]
+        if len(nulls) > FAST_PATH_MAX_LISTED_VALUES:
+            lines.append(f"- ... and {len(nulls) - FAST_PATH_MAX_LISTED_VALUES:,} more columns")
+        text = (f"{len(nulls):,} of {len(self.df.columns):,} columns have missing values "
+                f"({int(nulls.sum()):,} in total):\n\n" + "\n".join(lines))
+        return _MISSING_WORDS, text, "df.isna().sum()"
+
+    def _unique(self, tokens, words, columns):
+        """Unique count or unique values of one column"""
+        if not words & _UNIQUE_WORDS or len(columns) != 1:
+            return None
+        col, = columns
+        series = self.df[col]
+        unique_count = int(series.nunique(dropna=True))
+
+        if words & _COUNT_WORDS or unique_count > FAST_PATH_MAX_LISTED_VALUES:
+            return (_UNIQUE_WORDS | _COUNT_WORDS, f"`{col}` has {unique_count:,} unique values.",
+                    f"df['{col}'].nunique()")
+        values = ", ".join(DataFrameUtils.format_value(value) for value in series.dropna().unique())
+        return (_UNIQUE_WORDS, f"`{col}` has {unique_count:,} unique values: {values}.",
+                f"df['{col}'].dropna().unique()")
+
+    def _aggregate(self, tokens, words, columns):
+        """min/max/mean/median/sum of one column"""
+        aggregation_words = words & set(_AGGREGATIONS)
+        aggregations = {_AGGREGATIONS[word] for word in aggregation_words}
+        if len(aggregations) != 1 or len(columns) != 1:
+            return None
+        (method, label), = aggregations
+        col, = columns
+        series = self.df[col]
+
+        numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+        datetime = pd.api.types.is_datetime64_any_dtype(series)
+        if not (numeric or (datetime and method in ('min', 'max', 'median'))):
+            # Text and category columns need interpretation the agent is better at
+            return None
+        if aggregation_words & _DATETIME_AGGREGATION_WORDS and not datetime:
+            return None
+
+        if isinstance(series.dtype, pd.SparseDtype):
+            series = series.sparse.to_dense()
+        value = getattr(series, method)()
+        return (set(_AGGREGATIONS), f"The {label} `{col}` is {DataFrameUtils.format_value(value)}.",
+                f"df['{col}'].{method}()")
+
+    def _top_n(self, tokens, words, columns):
+        """Top or bottom N rows by one column, optionally showing one other column"""
+        direction = [(i, token) for i, token in enumerate(tokens) if token in _TOP_WORDS]
+        if not direction or 'by' not in words or not columns or len(columns) > 2:
+            return None
+        index, word = direction[0]
+        if index + 1 >= len(tokens) or not tokens[index + 1].isdigit():
+            return None
+        n = int(tokens[index + 1])
+        if not 0 < n <= FAST_PATH_MAX_TOP_ROWS:
+            return None
+
+        # "top 5 products by sales": the column right after "by" ranks, the other one is shown
+        by_position = tokens.index('by')
+        rank_col = next((col for col, start in columns.items() if start == by_position + 1), None)
+        if rank_col is None:
+            return None
+        rank_series = self.df[rank_col]
+        if not (pd.api.types.is_numeric_dtype(rank_series) or pd.api.types.is_datetime64_any_dtype(rank_series)):
+            return None
+        shown = [col for col in columns if col != rank_col] + [rank_col]
+        if len(columns) == 1:
+            if len(self.df.columns) > FAST_PATH_MAX_LISTED_VALUES:
+                return None
+            shown = list(self.df.columns)
+
+        ascending = _TOP_WORDS[word]
+        ranked = rank_series.dropna()
+        index_values = (ranked.nsmallest(n) if ascending else ranked.nlargest(n)).index
+        rows = self.df[shown].loc[index_values]
+        method = 'nsmallest' if ascending else 'nlargest'
+        label = 'Bottom' if ascending else 'Top'
+        text = f"{label} {len(rows):,} rows by `{rank_col}`:\n\n{rows.to_markdown(index=False)}"
+        return set(_TOP_WORDS) | {'by', tokens[index + 1]}, text, f"df.{method}({n}, '{rank_col}')[{shown!r}]"
+
+    def stats(self):
+        """Return router counters for display or logging"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
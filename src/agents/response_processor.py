@@ -11,6 +11,8 @@ class ResponseProcessor:
     def __init__(self, df):
         self.df = df
         self.visualization_executed = False
+        # ExecutionLedger of the code the REPL tool already ran for this question, or None
+        self.execution_ledger = None
 
     def process_response(self, response):
         """Process agent response to execute Python code visualizations and clean output."""
@@ -29,7 +31,12 @@ class ResponseProcessor:
 
         if python_code:
             try:
-                success, message = VisualizationHandler.execute_visualization_code(python_code, self.df)
+                entry = self.execution_ledger.lookup(python_code) if self.execution_ledger is not None else None
+                if entry is not None:
+                    # The agent already ran this code for this question and the REPL displayed its figures
+                    success = True
+                else:
+                    success, message = VisualizationHandler.execute_visualization_code(python_code, self.df)
 
                 if success:
                     self.visualization_executed = True
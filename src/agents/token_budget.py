@@ -0,0 +1,154 @@
+"""Per-step max_tokens sizing and stop-sequence handling for agent completions"""
+
+import threading
+from collections import deque
+
+from ..config import (
+    TOKEN_BUDGET_ENABLED, TOKEN_BUDGET_WINDOW, TOKEN_BUDGET_MIN_SAMPLES, TOKEN_BUDGET_PERCENTILE,
+    TOKEN_BUDGET_HEADROOM, TOKEN_BUDGET_MIN_TOKENS,
+)
+
+# Step name of native tool-calling turns, which carry no stop sequences
+TOOL_CALLING_STEP = "tool-calling"
+
+# Rough size of a token, used when the API does not report usage
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Estimate the token count of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class StopSequenceFilter:
+    """Cut a completion at the first stop sequence, chunk by chunk.
+
+    The end of the text seen so far is held back while it could still be the
+    beginning of a stop sequence, so no part of one is ever emitted.
+    """
+
+    def __init__(self, stop):
+        self.stop = [sequence for sequence in stop or [] if sequence]
+        self.hold = max((len(sequence) for sequence in self.stop), default=1) - 1
+        self.buffer = ""
+        self.stopped = False
+        self.trimmed = ""
+
+    def feed(self, text):
+        """Add text and return the part that is safe to emit"""
+        if self.stopped:
+            self.trimmed += text
+            return ""
+        self.buffer += text
+
+        positions = [self.buffer.find(sequence) for sequence in self.stop]
+        positions = [position for position in positions if position >= 0]
+        if positions:
+            cut = min(positions)
+            emitted, self.trimmed, self.buffer = self.buffer[:cut], self.buffer[cut:], ""
+            self.stopped = True
+            return emitted
+
+        if not self.hold:
+            emitted, self.buffer = self.buffer, ""
+            return emitted
+        emitted, self.buffer = self.buffer[:-self.hold], self.buffer[-self.hold:]
+        return emitted
+
+    def flush(self):
+        """Return whatever is still held back once the completion has ended"""
+        emitted, self.buffer = self.buffer, ""
+        return emitted
+
+
+class TokenBudget:
+    """Size max_tokens of agent steps to the completions seen so far.
+
+    Agent steps (ReAct requests that carry stop sequences, and native
+    tool-calling turns, named by step) are short: a thought and a tool call.
+    Requesting the full ceiling for each one makes providers reserve, and
+    slow models generate, far more than needed. The budget is a high
+    percentile of recent completion lengths for the model and kind of step
+    plus headroom, never below min_tokens and never above the ceiling. A
+    step that hits the budget is continued by the caller with the rest of
+    the ceiling; a tool call cut off mid-arguments is requested again with
+    the full ceiling instead.
+    """
+
+    def __init__(self, enabled=TOKEN_BUDGET_ENABLED, window=TOKEN_BUDGET_WINDOW, min_samples=TOKEN_BUDGET_MIN_SAMPLES,
+                 percentile=TOKEN_BUDGET_PERCENTILE, headroom=TOKEN_BUDGET_HEADROOM, min_tokens=TOKEN_BUDGET_MIN_TOKENS):
+        self.enabled = enabled
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_tokens = min_tokens
+        self._completions = {}
+        self._lock = threading.Lock()
+        self.steps = 0
+        self.budgeted_steps = 0
+        self.continuations = 0
+        self.completion_tokens = 0
+        self.max_tokens_saved = 0
+        self.stop_trimmed_tokens = 0
+
+    def max_tokens_for(self, model, ceiling, stop, step=None):
+        """Return max_tokens for the next request to model"""
+        key = self._step_key(model, stop, step)
+        if not self.enabled or key is None or not ceiling:
+            return ceiling
+        with self._lock:
+            lengths = self._completions.get(key)
+            if lengths is None or len(lengths) < self.min_samples:
+                return ceiling
+            ordered = sorted(lengths)
+            expected = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        return max(self.min_tokens, min(ceiling, int(expected * self.headroom)))
+
+    def record(self, model, stop, ceiling, max_tokens, completion_tokens, trimmed_tokens=0, continued=False,
+               step=None):
+        """Record one completed step and its savings against the ceiling"""
+        key = self._step_key(model, stop, step)
+        with self._lock:
+            self.steps += 1
+            self.completion_tokens += completion_tokens
+            self.stop_trimmed_tokens += trimmed_tokens
+            if continued:
+                self.continuations += 1
+            if ceiling and max_tokens < ceiling:
+                self.budgeted_steps += 1
+                self.max_tokens_saved += ceiling - max_tokens
+            if key is not None:
+                lengths = self._completions.setdefault(key, deque(maxlen=self.window))
+                lengths.append(completion_tokens)
+
+        print(f"[TOKENS] {model}: max_tokens {max_tokens}/{ceiling}, used {completion_tokens}"
+              + (f", trimmed {trimmed_tokens} past stop" if trimmed_tokens else "")
+              + (", continued" if continued else ""))
+
+    @staticmethod
+    def _step_key(model, stop, step):
+        """Key of the completion lengths a request is sized by, or None if it is not an agent step"""
+        if step is None and stop:
+            step = "react"
+        return None if step is None else (model, step)
+
+    def stats(self):
+        """Return budget counters for display or logging"""
+        with self._lock:
+            return {
+                'steps': self.steps,
+                'budgeted_steps': self.budgeted_steps,
+                'continuations': self.continuations,
+                'completion_tokens': self.completion_tokens,
+                'max_tokens_saved': self.max_tokens_saved,
+                'stop_trimmed_tokens': self.stop_trimmed_tokens,
+            }
+
+
+_token_budget = TokenBudget()
+
+
+def get_token_budget():
+    """Return the process-wide token budget"""
+    return _token_budget
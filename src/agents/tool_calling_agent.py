@@ -0,0 +1,151 @@
+"""Agent executor that uses the OpenAI-compatible tool-calling API"""
+
+import json
+import threading
+import time
+
+from ..config import TOOL_CALLING_FINAL_ANSWER_PROMPT, AGENT_MAX_ITERATIONS, AGENT_MAX_EXECUTION_SECONDS
+
+
+class ToolCallingAgentExecutor:
+    """Answer questions by letting the model call tools with structured arguments.
+
+    Tools are sent as JSON schemas and the model replies with either tool
+    calls, whose JSON arguments go straight to the tools, or a plain-text
+    answer. There is no "Action:"/"Final Answer:" text to parse, so a
+    malformed step can no longer cost an extra round trip, and several tool
+    calls can come back in one turn. Once max_iterations turns or
+    max_execution_time seconds are used up, the model is asked to answer
+    from the tool results it already has. A tool with return_direct set
+    (answer_with_code) ends the question with its own output when it
+    succeeds, so no second LLM call is needed to phrase the answer.
+    """
+
+    def __init__(self, llm, tools, system_prompt, max_iterations=AGENT_MAX_ITERATIONS,
+                 max_execution_time=AGENT_MAX_EXECUTION_SECONDS):
+        self.llm = llm
+        self.tools = list(tools)
+        self.system_prompt = system_prompt
+        self.max_iterations = max_iterations
+        self.max_execution_time = max_execution_time
+        self._lock = threading.Lock()
+        self.questions = 0
+        self.iterations = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.direct_answers = 0
+        # Whether the last run ended with the model's own answer rather than one forced out of it at the limit
+        self.last_run_completed = False
+
+    @property
+    def tools(self):
+        return list(self._tools.values())
+
+    @tools.setter
+    def tools(self, tools):
+        self._tools = {tool.name: tool for tool in tools}
+        self._tool_specs = [self.tool_spec(tool) for tool in tools]
+
+    @staticmethod
+    def tool_spec(tool):
+        """Describe a LangChain tool as an OpenAI function definition"""
+        properties = {
+            name: {key: value for key, value in schema.items() if key != 'title'}
+            for name, schema in tool.args.items()
+        }
+        return {
+            'type': 'function',
+            'function': {
+                'name': tool.name,
+                'description': tool.description,
+                'parameters': {'type': 'object', 'properties': properties, 'required': list(properties)},
+            },
+        }
+
+    def run(self, question, callbacks=None):
+        """Answer a question, calling tools as the model requests, and return the answer text"""
+        messages = [
+            {'role': 'system', 'content': self.system_prompt},
+            {'role': 'user', 'content': question},
+        ]
+        start = time.monotonic()
+        iterations, tool_calls = 0, 0
+        self.last_run_completed = False
+
+        try:
+            while iterations < self.max_iterations and time.monotonic() - start < self.max_execution_time:
+                iterations += 1
+                message = self.llm.chat(messages, self._tool_specs, callbacks=callbacks)
+                if not message.get('tool_calls'):
+                    self.last_run_completed = True
+                    return message.get('content') or ""
+
+                messages.append(message)
+                for call in message['tool_calls']:
+                    tool_calls += 1
+                    output, succeeded = self._call_tool(call, callbacks)
+                    tool = self._tools.get((call.get('function') or {}).get('name'))
+                    if succeeded and getattr(tool, 'return_direct', False):
+                        with self._lock:
+                            self.direct_answers += 1
+                        self.last_run_completed = True
+                        return output
+                    messages.append({'role': 'tool', 'tool_call_id': call.get('id'), 'content': output})
+
+            # Out of turns: the tools stay declared, since earlier messages refer to them
+            messages.append({'role': 'user', 'content': TOOL_CALLING_FINAL_ANSWER_PROMPT})
+            iterations += 1
+            message = self.llm.chat(messages, self._tool_specs, tool_choice="none", callbacks=callbacks)
+            return message.get('content') or ""
+
+        finally:
+            self._record(iterations, tool_calls, time.monotonic() - start)
+
+    def _call_tool(self, call, callbacks):
+        """Run one tool call and return (output, succeeded); a failed call's output is an error the model can act on"""
+        function = call.get('function') or {}
+        name = function.get('name')
+        tool = self._tools.get(name)
+        if tool is None:
+            self._count_tool_error()
+            return f"Error: there is no tool named {name!r}. Available tools: {', '.join(self._tools)}", False
+
+        raw_arguments = function.get('arguments') or "{}"
+        try:
+            arguments = json.loads(raw_arguments)
+        except ValueError:
+            # Some models send the bare code or query instead of a JSON object
+            arguments = raw_arguments
+        if isinstance(arguments, dict) and len(arguments) == 1 and len(tool.args) == 1:
+            # Single-input tools take the value whatever the model named the argument
+            arguments = next(iter(arguments.values()))
+
+        try:
+            return str(tool.run(arguments, callbacks=callbacks)), True
+        except Exception as e:
+            self._count_tool_error()
+            return f"Error calling {name}: {str(e)}", False
+
+    def _count_tool_error(self):
+        with self._lock:
+            self.tool_errors += 1
+
+    def _record(self, iterations, tool_calls, elapsed):
+        """Count one answered question"""
+        with self._lock:
+            self.questions += 1
+            self.iterations += iterations
+            self.tool_calls += tool_calls
+        print(f"[AGENT] {iterations} LLM turn(s), {tool_calls} tool call(s) in {elapsed:.1f}s")
+
+    def stats(self):
+        """Return executor counters for display or logging"""
+        with self._lock:
+            return {
+                'questions': self.questions,
+                'iterations': self.iterations,
+                'tool_calls': self.tool_calls,
+                'tool_errors': self.tool_errors,
+                'direct_answers': self.direct_answers,
+                'iterations_per_question': self.iterations / self.questions if self.questions else 0.0,
+            }
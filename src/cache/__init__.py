@@ -0,0 +1,17 @@
+"""Caching modules for Analyzia"""
+
+from .dataset_cache import DatasetCache, get_dataset_cache
+from .agent_cache import AgentCache, get_agent_cache
+from .profile_cache import ProfileCache, get_profile_cache
+from .llm_cache import LLMResponseCache, LLMCacheMissError, get_llm_cache
+from .answer_cache import AnswerCache, CachedAnswer, get_answer_cache
+from .plan_cache import Plan, PlanCache, get_plan_cache
+from .execution_cache import ExecutionCache, ExecutionResult, NO_CACHE_MARKER
+from .execution_ledger import ExecutionLedger, LedgerEntry
+
+__all__ = [
+    'DatasetCache', 'get_dataset_cache', 'AgentCache', 'get_agent_cache', 'ProfileCache', 'get_profile_cache',
+    'LLMResponseCache', 'LLMCacheMissError', 'get_llm_cache', 'AnswerCache', 'CachedAnswer', 'get_answer_cache',
+    'Plan', 'PlanCache', 'get_plan_cache', 'ExecutionCache', 'ExecutionResult', 'NO_CACHE_MARKER',
+    'ExecutionLedger', 'LedgerEntry',
+]
@@ -0,0 +1,87 @@
+"""Process-wide cache of ready-to-use analysis agents"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import AGENT_CACHE_IDLE_SECONDS, AGENT_CACHE_MAX_ENTRIES
+
+
+class AgentCache:
+    """Cache of built agents keyed by browser session, dataset, model and API key.
+
+    Building an agent formats the schema prompt, creates the LLM client, the
+    REPL tool and the LangChain executor. Reusing a built agent across reruns
+    keeps that work off the path of every follow-up question. An agent holds
+    per-session state (the REPL namespace, the dataset snapshot, the figures
+    of the current question), so entries are never shared between sessions.
+    Entries unused for idle_seconds are evicted, as are the least recently
+    used entries beyond max_entries.
+    """
+
+    def __init__(self, idle_seconds=AGENT_CACHE_IDLE_SECONDS, max_entries=AGENT_CACHE_MAX_ENTRIES):
+        self.idle_seconds = idle_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(session_id, dataset_fingerprint, model, api_key):
+        """Build a cache key without keeping the raw API key in memory"""
+        api_key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+        return (session_id, dataset_fingerprint, model, api_key_hash)
+
+    def get(self, key):
+        """Return the cached agent for key and mark it as used, or None"""
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = (entry[0], time.monotonic())
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, agent):
+        """Store a built agent, evicting idle and overflow entries"""
+        with self._lock:
+            now = time.monotonic()
+            self._entries[key] = (agent, now)
+            self._entries.move_to_end(key)
+            self._evict_idle(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return agent
+
+    def _evict_idle(self, now):
+        """Remove entries that have not been used within idle_seconds"""
+        expired = [key for key, (_, last_used) in self._entries.items()
+                   if now - last_used > self.idle_seconds]
+        for key in expired:
+            del self._entries[key]
+            self.evictions += 1
+
+    def stats(self):
+        """Return cache counters for display or logging"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+_agent_cache = AgentCache()
+
+
+def get_agent_cache():
+    """Return the process-wide agent cache"""
+    return _agent_cache
@@ -0,0 +1,205 @@
+"""Process-wide cache of final answers, matched by question similarity"""
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, namedtuple
+
+from ..config import ANSWER_CACHE_ENABLED, ANSWER_CACHE_MIN_SIMILARITY, ANSWER_CACHE_MAX_ENTRIES
+from ..data.schema_index import tokenize
+
+# What a question produced: the raw and displayed answer, the code that ran and the figures it showed
+CachedAnswer = namedtuple('CachedAnswer', ['question', 'answer', 'display_text', 'code', 'figures'])
+
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+_SUFFIX_PATTERN = re.compile(r"(?<=[a-z]{4})(ing|ed)$")
+
+# Words that ask for the same thing are folded into one term before comparison. Chart verbs are
+# dropped: "show rating over time" and "plot rating over time" both get the same plot.
+_SYNONYMS = {
+    'plot': '', 'chart': '', 'graph': '', 'visualize': '', 'visualise': '', 'visualization': '',
+    'visualisation': '', 'draw': '', 'diagram': '', 'display': '',
+    'time': 'time', 'date': 'time', 'dates': 'time', 'trend': 'time', 'trends': 'time', 'timeline': 'time',
+    'temporal': 'time', 'chronological': 'time',
+    'average': 'mean', 'avg': 'mean', 'mean': 'mean',
+    'highest': 'max', 'maximum': 'max', 'max': 'max', 'largest': 'max', 'biggest': 'max',
+    'lowest': 'min', 'minimum': 'min', 'min': 'min', 'smallest': 'min',
+    'many': 'count', 'number': 'count', 'count': 'count', 'frequency': 'count',
+    'total': 'sum', 'sum': 'sum',
+    'distinct': 'unique', 'unique': 'unique',
+    'null': 'missing', 'nulls': 'missing', 'nan': 'missing', 'missing': 'missing',
+    'correlation': 'correlation', 'correlate': 'correlation', 'correlated': 'correlation',
+    'relationship': 'correlation', 'histogram': 'distribution', 'distribution': 'distribution',
+    'spread': 'distribution', 'percentage': 'percent', 'percent': 'percent', 'share': 'percent',
+    'proportion': 'percent', 'top': 'top', 'bottom': 'bottom', 'median': 'median',
+    'not': 'not', 'no': 'not', 'without': 'not', 'except': 'not', 'excluding': 'not', 'exclude': 'not',
+    'never': 'not', 'neq': 'not',
+    'above': 'gt', 'greater': 'gt', 'more': 'gt', 'higher': 'gt', 'exceed': 'gt', 'exceeds': 'gt', 'gt': 'gt',
+    'below': 'lt', 'less': 'lt', 'fewer': 'lt', 'lower': 'lt', 'under': 'lt', 'lt': 'lt',
+    'gte': 'gte', 'lte': 'lte', 'before': 'before', 'after': 'after', 'between': 'between',
+    'equal': 'equal', 'equals': 'equal',
+}
+
+# "isn't", "don't", "can't": the negation is otherwise split off as a lone "t" and dropped
+_NEGATED_CONTRACTION_PATTERN = re.compile(r"n['’]t\b", re.IGNORECASE)
+
+# Comparison operators written as symbols, rewritten to the words they fold into
+_OPERATOR_PATTERN = re.compile(r"!=|<>|>=|<=|>|<|=")
+_OPERATOR_WORDS = {'!=': ' neq ', '<>': ' neq ', '>=': ' gte ', '<=': ' lte ', '>': ' gt ', '<': ' lt ', '=': ' equal '}
+
+# Terms that change the result; two questions only match if they agree on all of them, in order
+_OPERATION_TERMS = {
+    'mean', 'max', 'min', 'count', 'sum', 'unique', 'missing', 'correlation', 'distribution', 'percent',
+    'top', 'bottom', 'median', 'not', 'gt', 'lt', 'gte', 'lte', 'before', 'after', 'between', 'equal',
+}
+
+
+def normalize_question(question):
+    """Return the question as a list of comparable terms, in the order they appear"""
+    text = _OPERATOR_PATTERN.sub(lambda match: _OPERATOR_WORDS[match.group()], str(question))
+    text = _NEGATED_CONTRACTION_PATTERN.sub(" not", text)
+    terms = []
+    for position, word in enumerate(_WORD_PATTERN.findall(text)):
+        if len(word) == 1 and not word.isdigit():
+            if _is_value_letter(word, position):
+                terms.append(word.lower())
+            continue
+        word = _SYNONYMS.get(word.lower(), word.lower())
+        # "discussing" and "discussed" compare equal to "discuss"
+        terms.extend(tokenize(_SUFFIX_PATTERN.sub("", word)))
+    return terms
+
+
+def _is_value_letter(letter, position):
+    """Whether a single letter names a value ("region B", "grade A") rather than being a word or a leftover"""
+    lowered = letter.lower()
+    if lowered in ('s', 't'):
+        # Left over from contractions: "what's", "don't"
+        return False
+    if lowered == 'i':
+        return False
+    # "a" is the article unless it is capitalized after the first word
+    return lowered != 'a' or (letter == 'A' and position > 0)
+
+
+class AnswerCache:
+    """LRU cache of answers keyed by dataset fingerprint and question.
+
+    Questions are normalized (stopwords and chart verbs dropped; plurals,
+    suffixes and synonyms such as date/time or average/mean folded) and
+    compared by TF-IDF cosine similarity against earlier questions about
+    the same dataset, with IDF weights computed over those questions. A
+    match additionally requires the same columns, numbers, single-letter
+    values ("region B"), operations (average, max, count, ...), negations
+    and comparisons, in the same order, so "average rating over time"
+    never reuses the answer to "rating over time", "rating is 5" never
+    reuses "rating is not 5" and "revenue to cost" never reuses "cost to
+    revenue". Hits are served with the stored figures and no LLM call.
+    """
+
+    def __init__(self, enabled=ANSWER_CACHE_ENABLED, min_similarity=ANSWER_CACHE_MIN_SIMILARITY,
+                 max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.enabled = enabled
+        self.min_similarity = min_similarity
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, fingerprint, question, columns=()):
+        """Return the CachedAnswer of the most similar earlier question, or None"""
+        if not self.enabled or fingerprint is None:
+            return None
+
+        terms = normalize_question(question)
+        key_terms = self._key_terms(terms, columns)
+        with self._lock:
+            candidates = [(key, entry) for key, entry in self._entries.items() if key[0] == fingerprint]
+            best_key, best_similarity = None, 0.0
+            if terms and candidates:
+                idf = self._idf([entry[1] for _, entry in candidates] + [terms])
+                query = self._vector(terms, idf)
+                for key, (_, entry_terms, entry_key_terms) in candidates:
+                    if entry_key_terms != key_terms:
+                        continue
+                    similarity = self._cosine(query, self._vector(entry_terms, idf))
+                    if similarity > best_similarity:
+                        best_key, best_similarity = key, similarity
+
+            if best_key is None or best_similarity < self.min_similarity:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            answer = self._entries[best_key][0]
+
+        print(f"[ANSWER CACHE] Hit for {question!r} (similarity {best_similarity:.2f} to {answer.question!r})")
+        return answer
+
+    def put(self, fingerprint, question, answer, columns=()):
+        """Store the answer to a question, evicting the least recently used entries"""
+        if not self.enabled or fingerprint is None:
+            return
+        terms = normalize_question(question)
+        if not terms:
+            return
+
+        with self._lock:
+            key = (fingerprint, " ".join(terms))
+            self._entries[key] = (answer, terms, self._key_terms(terms, columns))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _key_terms(terms, columns):
+        """Return the terms that must agree, in the same order, for two questions to share an answer"""
+        column_terms = {term for col in columns for term in tokenize(col)}
+        return tuple(
+            term for term in terms
+            if term in column_terms or term in _OPERATION_TERMS or term.isdigit() or len(term) == 1
+        )
+
+    @staticmethod
+    def _idf(documents):
+        """Smoothed inverse document frequency of every term in documents"""
+        frequencies = Counter(term for terms in documents for term in set(terms))
+        total = len(documents)
+        return {term: math.log((1 + total) / (1 + count)) + 1 for term, count in frequencies.items()}
+
+    @staticmethod
+    def _vector(terms, idf):
+        counts = Counter(terms)
+        return {term: count * idf.get(term, 1.0) for term, count in counts.items()}
+
+    @staticmethod
+    def _cosine(a, b):
+        dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+        norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+        return dot / norm if norm else 0.0
+
+    def stats(self):
+        """Return cache counters for display or logging"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        """Drop every stored answer"""
+        with self._lock:
+            self._entries.clear()
+
+
+_answer_cache = AnswerCache()
+
+
+def get_answer_cache():
+    """Return the process-wide answer cache"""
+    return _answer_cache
@@ -0,0 +1,125 @@
+"""Process-wide DataFrame cache keyed by the hash of the uploaded bytes"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from ..config import DATASET_CACHE_MAX_BYTES
+from ..data import LazyDataFrame
+
+
+class DatasetCache:
+    """LRU cache of parsed DataFrames bounded by their total memory usage.
+
+    Streamlit re-executes app.py on every interaction, but imported modules
+    stay loaded, so a module-level instance survives reruns and is shared by
+    every session in the server process. Cached frames are shared objects:
+    callers should take a shallow copy before handing one to user code.
+    """
+
+    def __init__(self, max_bytes=DATASET_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(data):
+        """Return a stable hex digest of the raw uploaded bytes"""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    @staticmethod
+    def estimate_size(df):
+        """Return the in-memory size of a DataFrame in bytes"""
+        if isinstance(df, LazyDataFrame):
+            # Only columns read so far occupy memory; the rest stay in the mapped file
+            return df.loaded_bytes()
+        return int(df.memory_usage(deep=True).sum())
+
+    def get(self, key):
+        """Return the cached DataFrame for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        """Store a DataFrame and evict least recently used entries over budget"""
+        size = self.estimate_size(df)
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+
+            # A frame larger than the whole budget is served but never retained
+            if size > self.max_bytes:
+                return df
+
+            self._entries[key] = (df, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+        return df
+
+    def get_or_load(self, key, loader):
+        """Return the cached DataFrame for key, calling loader() once on a miss.
+
+        Concurrent sessions uploading the same file wait on a per-key lock
+        instead of parsing it in parallel.
+        """
+        df = self.get(key)
+        if df is not None:
+            return df
+
+        # [lock, number of callers holding or waiting on it]; dropped once the last one is done
+        with self._lock:
+            load_entry = self._load_locks.setdefault(key, [threading.Lock(), 0])
+            load_entry[1] += 1
+
+        try:
+            with load_entry[0]:
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is not None:
+                    return entry[0]
+                return self.put(key, loader())
+        finally:
+            with self._lock:
+                load_entry[1] -= 1
+                if load_entry[1] == 0:
+                    self._load_locks.pop(key, None)
+
+    def stats(self):
+        """Return cache counters for display or logging"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        """Drop every cached DataFrame"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+_dataset_cache = DatasetCache()
+
+
+def get_dataset_cache():
+    """Return the process-wide dataset cache"""
+    return _dataset_cache
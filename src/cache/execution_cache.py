@@ -0,0 +1,351 @@
+"""Per-session memo of REPL runs keyed by normalized code and the versions of the values it reads"""
+
+import ast
+import copy
+import hashlib
+import itertools
+import re
+import threading
+import types
+from collections import OrderedDict, namedtuple
+
+import pandas as pd
+
+from ..config import EXECUTION_CACHE_ENABLED, EXECUTION_CACHE_MAX_BYTES
+from ..data import LazyDataFrame
+from ..tools.namespace_manager import estimate_size
+
+# What a run produced: its output, the figures it displayed, and the variables and columns it assigned
+ExecutionResult = namedtuple('ExecutionResult', ['output', 'figures', 'assignments', 'column_assignments', 'bytes'])
+
+# A snippet prepared for lookup: its key, the values it reads and writes, and why it cannot be cached (or None)
+ExecutionRun = namedtuple('ExecutionRun', ['key', 'inputs', 'writes', 'bypass_reason'])
+
+# Code containing this comment always runs
+NO_CACHE_MARKER = "# no-cache"
+
+_NONDETERMINISTIC_PATTERN = re.compile(
+    r"\brandom\b|\.sample\((?![^)]*random_state)|\bshuffle\(|\bnow\(|\btoday\(|\btime\(\)|\buuid\d?\b|\binput\("
+)
+
+# Method calls that change the object they are called on
+_MUTATING_METHODS = {
+    'append', 'extend', 'insert', 'pop', 'popitem', 'remove', 'clear', 'sort', 'reverse', 'update', 'setdefault',
+    'add', 'discard', 'rename_axis', 'set_axis',
+}
+
+_FRAME_TYPES = (pd.DataFrame, LazyDataFrame)
+
+
+class ExecutionCache:
+    """Memoize REPL runs, figures included, so re-running a snippet on unchanged inputs is free.
+
+    A run is keyed by a hash of the code's AST, which ignores formatting
+    and comments, together with the version of every variable it reads
+    (and of every df column it reads by name). Versions are bumped when a
+    run assigns a variable or column, and reset_frame() gives df a new
+    data version when a question starts from a fresh view of the dataset.
+    A hit replays the stored output and figures and re-assigns the
+    variables and columns the original run assigned. Entries hold copies
+    of those values and each replay hands out a fresh copy, so writing to
+    a replayed variable (df_clean['c'] = ...) never changes what a later
+    replay restores. Snippets that call random, sample without
+    random_state, clocks or uuid, that mutate values in ways the cache
+    cannot replay, or that contain "# no-cache" always run. Entries are
+    evicted least recently used first once their total size passes
+    max_bytes.
+    """
+
+    def __init__(self, enabled=EXECUTION_CACHE_ENABLED, max_bytes=EXECUTION_CACHE_MAX_BYTES):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._versions = {}
+        self._frame_tokens = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def reset_frame(self, name, token):
+        """Mark the frame bound to name as a fresh copy of the data identified by token"""
+        with self._lock:
+            self._frame_tokens[name] = token
+            for key in [key for key in self._versions if key[0] == name]:
+                del self._versions[key]
+
+    def prepare(self, code, namespace, received=None):
+        """Analyze a snippet and compute its key from the current versions of its inputs.
+
+        code is what will run; received is the snippet before validation
+        rewrote it, if it did. The "# no-cache" marker and nondeterministic
+        calls are looked for in both, since a rewrite drops comments.
+        """
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            return ExecutionRun(None, set(), set(), "syntax error")
+
+        sources = (code,) if received is None else (code, received)
+        inputs, writes, reason = _analyze(tree)
+        if reason is None and any(NO_CACHE_MARKER in source for source in sources):
+            reason = "marked no-cache"
+        if reason is None and any(_NONDETERMINISTIC_PATTERN.search(source) for source in sources):
+            reason = "not deterministic"
+        if not self.enabled:
+            reason = "cache disabled"
+
+        with self._lock:
+            versions = sorted((name, str(col), repr(self._version(name, col, namespace))) for name, col in inputs)
+        digest = hashlib.sha256(ast.dump(tree).encode("utf-8"))
+        digest.update(repr(versions).encode("utf-8"))
+        return ExecutionRun(digest.hexdigest(), inputs, writes, reason)
+
+    def get(self, run, namespace):
+        """Return the stored ExecutionResult for a prepared run, or None"""
+        with self._lock:
+            if run.bypass_reason is not None:
+                self.bypasses += 1
+                return None
+            entry = self._entries.get(run.key)
+            # Columns can only be re-assigned onto a frame that still exists
+            if entry is None or any(
+                    not isinstance(namespace.get(name), _FRAME_TYPES) for name, _ in entry.column_assignments):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(run.key)
+            self.hits += 1
+        print(f"[EXEC CACHE] Hit: replaying output, {len(entry.figures)} figure(s) "
+              f"and {len(entry.assignments) + len(entry.column_assignments)} assignment(s)")
+        return entry
+
+    def replay(self, run, entry, namespace):
+        """Apply a stored run's assignments to the namespace as if the code had run again"""
+        for name, value in entry.assignments.items():
+            namespace[name] = _detached(value)
+        for (name, col), series in entry.column_assignments.items():
+            namespace[name][col] = _detached(series)
+        with self._lock:
+            self._bump(run.writes)
+
+    def record(self, run, namespace, succeeded, output, figures):
+        """Update versions after a run and store its result when it can be replayed"""
+        with self._lock:
+            if not succeeded or run.bypass_reason is not None:
+                # Anything the code touched may have changed in ways the cache cannot see
+                self._bump({(name, None) for name, _ in run.inputs | run.writes})
+                return
+            self._bump(run.writes)
+        if run.key is None:
+            return
+
+        assignments, column_assignments = {}, {}
+        try:
+            for name, col in run.writes:
+                if name not in namespace:
+                    return
+                if col is None:
+                    assignments[name] = _detached(namespace[name])
+                elif isinstance(namespace[name], _FRAME_TYPES):
+                    column_assignments[(name, col)] = _detached(namespace[name][col])
+                else:
+                    return
+        except (TypeError, copy.Error):
+            # A value that cannot be copied cannot be stored safely
+            return
+
+        size = len(output) + sum(len(figure.data) for figure in figures) + sum(
+            estimate_size(value) for value in list(assignments.values()) + list(column_assignments.values())
+            if not isinstance(value, types.ModuleType)
+        )
+        if size > self.max_bytes:
+            return
+        entry = ExecutionResult(output, list(figures), assignments, column_assignments, size)
+
+        with self._lock:
+            previous = self._entries.pop(run.key, None)
+            if previous is not None:
+                self._total_bytes -= previous.bytes
+            self._entries[run.key] = entry
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.bytes
+                self.evictions += 1
+
+    def forget(self, name):
+        """Drop the entries holding a value assigned to name, e.g. once it was spilled from the namespace"""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if name in entry.assignments
+                        or any(assigned == name for assigned, _ in entry.column_assignments)]:
+                self._total_bytes -= self._entries.pop(key).bytes
+
+    def _version(self, name, col, namespace):
+        """The version of a variable, or of one column of a frame, as the cache knows it"""
+        if name not in namespace:
+            return "unbound"
+        if isinstance(namespace[name], types.ModuleType):
+            return "module"
+        whole = (self._frame_tokens.get(name, ""), self._versions.get((name, None), 0))
+        if col is not None:
+            return whole + (self._versions.get((name, col), 0),)
+        columns = sorted((str(key[1]), version) for key, version in self._versions.items()
+                         if key[0] == name and key[1] is not None)
+        return whole + (tuple(columns),)
+
+    def _bump(self, writes):
+        for name, col in writes:
+            if col is None:
+                # A new value for the whole variable replaces every column version
+                for key in [key for key in self._versions if key[0] == name and key[1] is not None]:
+                    del self._versions[key]
+            self._versions[(name, col)] = next(self._counter)
+
+    def stats(self):
+        """Return cache counters for display or logging"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'evictions': self.evictions,
+            }
+
+
+def _detached(value):
+    """Return a copy of value that in-place writes to either side cannot reach"""
+    if isinstance(value, (types.ModuleType, types.FunctionType, types.BuiltinFunctionType, type)):
+        return value
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index, LazyDataFrame)):
+        # Under copy-on-write a shallow copy is independent: whichever side is written copies the data first
+        return value.copy(deep=False)
+    return copy.deepcopy(value)
+
+
+def _analyze(tree):
+    """Return (inputs, writes, reason) of a snippet; reason says why it cannot be replayed, or is None"""
+    inputs, writes = set(), set()
+    for statement in tree.body:
+        loads, stores, reason = set(), set(), []
+        _collect(statement, loads, stores, reason)
+        if reason:
+            return inputs | loads, writes | stores, reason[0]
+        # Values written by earlier statements of the snippet are not inputs
+        inputs.update(
+            (name, col) for name, col in loads
+            if (name, None) not in writes and (name, col) not in writes
+        )
+        writes.update(stores)
+    return inputs, writes, None
+
+
+def _collect(node, loads, stores, reason):
+    """Walk one statement, recording the names and df columns it reads and assigns"""
+    if isinstance(node, (ast.Global, ast.Nonlocal, ast.Delete)):
+        reason.append(f"uses {type(node).__name__.lower()}")
+        return
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        stores.update(((alias.asname or alias.name).split('.')[0], None) for alias in node.names)
+        return
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        stores.add((node.name, None))
+        # Names the body reads are inputs; its assignments are local to it
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+                loads.add((child.id, None))
+        return
+    if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        if node.value is not None:
+            _collect(node.value, loads, stores, reason)
+        for target in targets:
+            if isinstance(node, ast.AugAssign):
+                _collect_load(target, loads, stores, reason)
+            _collect_target(target, loads, stores, reason)
+        return
+    if isinstance(node, (ast.For, ast.AsyncFor)):
+        _collect(node.iter, loads, stores, reason)
+        _collect_target(node.target, loads, stores, reason)
+        for child in node.body + node.orelse:
+            _collect(child, loads, stores, reason)
+        return
+    if isinstance(node, ast.withitem):
+        _collect(node.context_expr, loads, stores, reason)
+        if node.optional_vars is not None:
+            _collect_target(node.optional_vars, loads, stores, reason)
+        return
+    if isinstance(node, ast.NamedExpr):
+        _collect(node.value, loads, stores, reason)
+        _collect_target(node.target, loads, stores, reason)
+        return
+    if isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        # Their targets are local; whatever they read from outside is an input
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load):
+                loads.add((child.id, None))
+            elif isinstance(child, ast.Call):
+                _check_call(child, reason)
+        return
+    if isinstance(node, ast.Call):
+        _check_call(node, reason)
+    if isinstance(node, (ast.Subscript, ast.Name)) and isinstance(getattr(node, 'ctx', None), ast.Load):
+        _collect_load(node, loads, stores, reason)
+        return
+    for child in ast.iter_child_nodes(node):
+        _collect(child, loads, stores, reason)
+
+
+def _collect_load(node, loads, stores, reason):
+    """Record a read, as a single column for df['col'] and df[['a', 'b']]"""
+    if isinstance(node, ast.Name):
+        loads.add((node.id, None))
+        return
+    columns = _column_keys(node)
+    if columns is not None:
+        loads.update((node.value.id, col) for col in columns)
+        return
+    for child in ast.iter_child_nodes(node):
+        if not isinstance(child, ast.expr_context):
+            _collect(child, loads, stores, reason)
+
+
+def _collect_target(target, loads, stores, reason):
+    """Record what an assignment target binds; only names and df['col'] can be replayed"""
+    if isinstance(target, ast.Name):
+        stores.add((target.id, None))
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        for element in target.elts:
+            _collect_target(element, loads, stores, reason)
+    elif isinstance(target, ast.Starred):
+        _collect_target(target.value, loads, stores, reason)
+    elif _column_keys(target) is not None and len(_column_keys(target)) == 1:
+        stores.add((target.value.id, _column_keys(target)[0]))
+    else:
+        reason.append("assigns through an attribute or index")
+
+
+def _column_keys(node):
+    """Return the column names of name['col'] or name[['a', 'b']], or None for any other expression"""
+    if not isinstance(node, ast.Subscript) or not isinstance(node.value, ast.Name):
+        return None
+    key = node.slice
+    if isinstance(key, ast.Constant) and isinstance(key.value, str):
+        return [key.value]
+    if isinstance(key, ast.List) and key.elts and all(
+            isinstance(elt, ast.Constant) and isinstance(elt.value, str) for elt in key.elts):
+        return [elt.value for elt in key.elts]
+    return None
+
+
+def _check_call(node, reason):
+    """Flag calls that change their object in place"""
+    if any(keyword.arg == 'inplace' for keyword in node.keywords):
+        reason.append("modifies a value in place")
+    elif isinstance(node.func, ast.Attribute) and node.func.attr in _MUTATING_METHODS:
+        reason.append(f"calls {node.func.attr}(), which modifies a value in place")
@@ -0,0 +1,78 @@
+"""Record of the code a question has already run, shared by every path that executes code"""
+
+import ast
+import hashlib
+import threading
+from collections import namedtuple
+
+from ..utils import CodeUtils
+
+# Code that ran: what it printed, the figures it displayed and how long it took
+LedgerEntry = namedtuple('LedgerEntry', ['output', 'figures', 'seconds'])
+
+
+class ExecutionLedger:
+    """Remember the code executed for the current question so it never runs twice.
+
+    The REPL tool records every snippet that runs without error, keyed by
+    a hash of its AST (so formatting, comments and plt.show() calls do not
+    matter), with its output, captured figures and run time. When the
+    response processor finds code in the final answer, it looks it up
+    here first and skips it: the REPL already displayed its figures while
+    answering this question. start_question() clears the entries, so every
+    hit comes from the current question; the counters of skipped runs,
+    figures not drawn twice and seconds saved cover the whole session.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.skipped = 0
+        self.figures_reused = 0
+        self.seconds_saved = 0.0
+
+    @staticmethod
+    def key(code):
+        """Hash code by its syntax tree, falling back to its whitespace-normalized text"""
+        code = CodeUtils.sanitize_code(code) or ""
+        try:
+            normalized = ast.dump(ast.parse(code.strip()))
+        except SyntaxError:
+            normalized = " ".join(code.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def start_question(self):
+        """Forget the code run for the previous question"""
+        with self._lock:
+            self._entries.clear()
+
+    def record(self, code, output, figures, seconds):
+        """Record code that ran without error"""
+        with self._lock:
+            self._entries[self.key(code)] = LedgerEntry(output, list(figures), seconds)
+            self.recorded += 1
+
+    def lookup(self, code):
+        """Return the LedgerEntry of code that already ran, counting the run it avoids, or None"""
+        with self._lock:
+            entry = self._entries.get(self.key(code))
+            if entry is None:
+                return None
+            self.skipped += 1
+            self.figures_reused += len(entry.figures)
+            self.seconds_saved += entry.seconds
+        print(f"[LEDGER] Skipped code that already ran ({entry.seconds:.2f}s), "
+              f"its {len(entry.figures)} figure(s) are already displayed")
+        return entry
+
+    def stats(self):
+        """Return ledger counters for display or logging"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'recorded': self.recorded,
+                'skipped': self.skipped,
+                'figures_reused': self.figures_reused,
+                'seconds_saved': round(self.seconds_saved, 3),
+            }
@@ -0,0 +1,184 @@
+"""Persistent SQLite cache of LLM responses"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ..config import LLM_CACHE_MODE, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_BYTES
+from ..utils.file_utils import FileUtils
+
+
+class LLMCacheMissError(LookupError):
+    """Replay mode found no recorded response for a request"""
+
+
+class LLMResponseCache:
+    """Completions keyed by the answering model, prompt, temperature and stop list.
+
+    Modes:
+    - "on": serve fresh recorded responses, record new ones
+    - "replay": serve recorded responses regardless of age and fail on a miss,
+      so agent runs can be reproduced and benchmarked without the network
+    - "off": bypass the cache (the default: at a sampling temperature above
+      zero, serving one recorded response would pin every later answer to it)
+
+    The database lives on disk, so responses survive restarts and are shared
+    by every session and process pointed at the same file. Replayed
+    completions include generated code, so the file is only opened in a
+    directory private to the current user. Entries older than
+    ttl_seconds are ignored and purged; the least recently used entries are
+    evicted once stored responses exceed max_bytes.
+    """
+
+    MODES = ("on", "replay", "off")
+
+    def __init__(self, path=LLM_CACHE_PATH, mode=LLM_CACHE_MODE, ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                 max_bytes=LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.mode = mode if mode in self.MODES else "off"
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.mode != "off" and bool(self.path)
+
+    @property
+    def replay(self):
+        return self.mode == "replay"
+
+    @staticmethod
+    def make_key(model, prompt, temperature, stop=None):
+        """Hash everything that changes the completion into a fixed-size key"""
+        request = json.dumps([model, prompt, temperature, list(stop or [])], ensure_ascii=False)
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the recorded response for key, or None.
+
+        In replay mode a miss raises LLMCacheMissError instead of letting the call reach the API.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            now = time.time()
+            row = None
+            connection = self._connect()
+            if connection is not None:
+                row = connection.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self.replay and now - row[1] > self.ttl_seconds:
+                    row = None
+                if row is not None:
+                    connection.execute(
+                        "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                    )
+                    connection.commit()
+
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if row is None and self.replay:
+            raise LLMCacheMissError(f"No recorded LLM response for this request (replay mode, key {key[:12]})")
+        return row[0] if row is not None else None
+
+    def put(self, key, model, response):
+        """Record a response, purging expired and overflow entries"""
+        if not self.enabled or self.replay or not response:
+            return
+
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            now = time.time()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict(connection, now)
+            connection.commit()
+
+    def _evict(self, connection, now):
+        """Delete expired entries, then least recently used ones beyond max_bytes"""
+        expired = connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self.evictions += max(expired.rowcount, 0)
+
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def _connect(self):
+        """Open the database on first use; disable the cache if it cannot be opened"""
+        if self._connection is not None:
+            return self._connection
+        try:
+            FileUtils.ensure_private_directory(os.path.dirname(os.path.abspath(self.path)))
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            # WAL lets several app processes read while one writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, "
+                "created_at REAL, last_used REAL, hits INTEGER)"
+            )
+            connection.commit()
+            self._connection = connection
+        except (sqlite3.Error, OSError) as e:
+            print(f"[DEBUG] LLM response cache disabled: {str(e)}")
+            if not self.replay:
+                self.mode = "off"
+        return self._connection
+
+    def stats(self):
+        """Return cache counters and on-disk usage for display or logging"""
+        with self._lock:
+            entries, size = 0, 0
+            connection = self._connect() if self.enabled else None
+            if connection is not None:
+                entries, size = connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+            return {
+                'mode': self.mode,
+                'entries': entries,
+                'bytes': size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        """Delete every recorded response"""
+        with self._lock:
+            connection = self._connect() if self.enabled else None
+            if connection is not None:
+                connection.execute("DELETE FROM responses")
+                connection.commit()
+
+
+_llm_cache = LLMResponseCache()
+
+
+def get_llm_cache():
+    """Return the process-wide LLM response cache"""
+    return _llm_cache
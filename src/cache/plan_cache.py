@@ -0,0 +1,184 @@
+"""Persistent SQLite cache of code plans keyed by dataset schema and question"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+from ..config import PLAN_CACHE_ENABLED, PLAN_CACHE_PATH, PLAN_CACHE_MAX_ENTRIES
+from ..utils.file_utils import FileUtils
+from .answer_cache import normalize_question
+
+# The snippets that answered a question, and the answer template filled from their variables, if any
+Plan = namedtuple('Plan', ['code', 'answer_template'])
+
+
+class PlanCache:
+    """Code that answered a question, reusable on any dataset with the same schema.
+
+    A plan is the list of snippets the REPL tool ran without error while
+    answering. It is keyed by the schema signature (column names and
+    logical kinds such as integer or string, in order) and the normalized
+    question, word order included, together with the answer_with_code
+    template when the model answered that way, so tomorrow's export of the
+    same table answers yesterday's questions by re-running the code
+    locally instead of asking the LLM to write it again. Plans run without
+    an LLM call, so the database is only opened in a directory private to
+    the current user. Callers discard a plan that fails on a new dataset;
+    the least recently used plans are evicted beyond max_entries.
+    """
+
+    def __init__(self, path=PLAN_CACHE_PATH, enabled=PLAN_CACHE_ENABLED, max_entries=PLAN_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.enabled = enabled and bool(path)
+        self.max_entries = max_entries
+        self._connection = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.evictions = 0
+
+    @staticmethod
+    def schema_signature(df):
+        """Hash the column names and logical kinds of a dataset.
+
+        Physical dtypes vary between exports of the same table (int8 one day,
+        int16 the next after compaction; categories listing different
+        values), so only the kind of data each column holds is hashed.
+        """
+        schema = [[str(col), _logical_kind(dtype)] for col, dtype in df.dtypes.items()]
+        return hashlib.sha256(json.dumps(schema).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_key(signature, question):
+        """Key a plan by schema and normalized question; "revenue to cost" and "cost to revenue" differ"""
+        terms = " ".join(normalize_question(question))
+        return hashlib.sha256(f"{signature}\n{terms}".encode("utf-8")).hexdigest()
+
+    def get(self, signature, question):
+        """Return the Plan stored for this schema and question, or None"""
+        if not self.enabled or signature is None:
+            return None
+        key = self.make_key(signature, question)
+
+        with self._lock:
+            row = None
+            connection = self._connect()
+            if connection is not None:
+                row = connection.execute("SELECT code FROM plans WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE plans SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+                    )
+                    connection.commit()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        stored = json.loads(row[0])
+        if isinstance(stored, list):
+            # Plans saved before answer templates were stored are a bare list of snippets
+            return Plan(stored, None)
+        return Plan(stored['code'], stored.get('answer_template'))
+
+    def put(self, signature, question, code, answer_template=None):
+        """Store the snippets (and answer template) that answered a question, evicting the least recently used plans"""
+        if not self.enabled or signature is None or not code:
+            return
+
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            now = time.time()
+            stored = json.dumps({'code': list(code), 'answer_template': answer_template})
+            connection.execute(
+                "INSERT OR REPLACE INTO plans (key, signature, question, code, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (self.make_key(signature, question), signature, question, stored, now, now),
+            )
+            count = connection.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            if count > self.max_entries:
+                evicted = connection.execute(
+                    "DELETE FROM plans WHERE key IN (SELECT key FROM plans ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.evictions += max(evicted.rowcount, 0)
+            connection.commit()
+
+    def discard(self, signature, question):
+        """Drop a plan that failed on the current dataset"""
+        with self._lock:
+            self.failures += 1
+            connection = self._connect() if self.enabled else None
+            if connection is not None:
+                connection.execute("DELETE FROM plans WHERE key = ?", (self.make_key(signature, question),))
+                connection.commit()
+
+    def _connect(self):
+        """Open the database on first use; disable the cache if it cannot be opened"""
+        if self._connection is not None:
+            return self._connection
+        try:
+            FileUtils.ensure_private_directory(os.path.dirname(os.path.abspath(self.path)))
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "key TEXT PRIMARY KEY, signature TEXT, question TEXT, code TEXT, "
+                "created_at REAL, last_used REAL, hits INTEGER)"
+            )
+            connection.commit()
+            self._connection = connection
+        except (sqlite3.Error, OSError) as e:
+            print(f"[DEBUG] Plan cache disabled: {str(e)}")
+            self.enabled = False
+        return self._connection
+
+    def stats(self):
+        """Return cache counters for display or logging"""
+        with self._lock:
+            entries = 0
+            connection = self._connect() if self.enabled else None
+            if connection is not None:
+                entries = connection.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'failures': self.failures,
+                'evictions': self.evictions,
+            }
+
+
+def _logical_kind(dtype):
+    """Return the kind of data a dtype holds, independent of its width and storage"""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if isinstance(dtype, pd.SparseDtype):
+        dtype = dtype.subtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'boolean'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'integer'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if pd.api.types.is_timedelta64_dtype(dtype):
+        return 'timedelta'
+    return 'string'
+
+
+_plan_cache = PlanCache()
+
+
+def get_plan_cache():
+    """Return the process-wide plan cache"""
+    return _plan_cache
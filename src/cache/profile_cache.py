@@ -0,0 +1,59 @@
+"""Process-wide cache of dataset profiles"""
+
+import threading
+from collections import OrderedDict
+
+from ..config import PROFILE_CACHE_MAX_ENTRIES
+from ..data import DatasetProfiler
+
+
+class ProfileCache:
+    """LRU cache of dataset profiles keyed by dataset fingerprint.
+
+    A profile depends only on the dataset contents, so every session and
+    every rebuilt agent for the same upload reuses the first computation.
+    """
+
+    def __init__(self, max_entries=PROFILE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get_or_compute(self, fingerprint, df):
+        """Return the cached profile for fingerprint, profiling df once on a miss"""
+        if fingerprint is None:
+            return DatasetProfiler.profile(df)
+
+        # [lock, number of callers holding or waiting on it]; dropped once the last one is done
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+                return self._entries[fingerprint]
+            load_entry = self._load_locks.setdefault(fingerprint, [threading.Lock(), 0])
+            load_entry[1] += 1
+
+        try:
+            with load_entry[0]:
+                with self._lock:
+                    profile = self._entries.get(fingerprint)
+                if profile is None:
+                    profile = DatasetProfiler.profile(df)
+                with self._lock:
+                    self._entries[fingerprint] = profile
+                    self._entries.move_to_end(fingerprint)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                return profile
+        finally:
+            with self._lock:
+                load_entry[1] -= 1
+                if load_entry[1] == 0:
+                    self._load_locks.pop(fingerprint, None)
+
+_profile_cache = ProfileCache()
+
+
+def get_profile_cache():
+    """Return the process-wide profile cache"""
+    return _profile_cache
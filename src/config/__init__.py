@@ -1,6 +1,61 @@
 """Configuration and constants for Analyzia"""
 
-from .prompts import SYSTEM_TEMPLATE, COMMON_SYSTEM_TEMPLATE
+from .prompts import (
+    SYSTEM_TEMPLATE, TOOL_CALLING_SYSTEM_TEMPLATE, TOOL_CALLING_FINAL_ANSWER_PROMPT, COMMON_SYSTEM_TEMPLATE,
+    ANSWER_TOOL_TEMPLATE, SQL_TOOL_TEMPLATE, SQL_TOOL_PREFER_HINT, SQL_TOOL_OPTIONAL_HINT,
+    WIDE_SCHEMA_TEMPLATE, RELEVANT_COLUMNS_TEMPLATE,
+)
 from .models import AVAILABLE_MODELS, DEFAULT_MODEL
+from .settings import (
+    DATASET_CACHE_MAX_BYTES, AGENT_CACHE_IDLE_SECONDS, AGENT_CACHE_MAX_ENTRIES,
+    INGEST_COMPACT_DTYPES, INGEST_CATEGORY_MAX_RATIO, INGEST_CATEGORY_MAX_UNIQUE, INGEST_DOWNCAST_INTEGERS,
+    INGEST_SPARSE_MIN_NULL_RATIO, INGEST_SPARSE_COLUMNS, STATE_DIR, DATASET_STORE_DIR, DATASET_STORE_MAX_BYTES,
+    LAZY_FRAME_MIN_COLUMNS, STREAMING_INGEST_MIN_BYTES, SQL_TOOL_MAX_ROWS, SQL_TOOL_MEMORY_LIMIT,
+    SQL_TOOL_PREFER_MIN_BYTES, PROFILE_MAX_WORKERS, PROFILE_TOP_VALUES, PROFILE_CACHE_MAX_ENTRIES,
+    SCHEMA_PRUNE_MIN_COLUMNS, SCHEMA_PRUNE_MAX_COLUMNS, SCHEMA_PRUNE_SAMPLE_ROWS,
+    OPENROUTER_API_URL, HTTP_TIMEOUT_SECONDS, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS, HTTP_ENABLE_HTTP2, LLM_STREAMING,
+    LLM_CACHE_MODE, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_BYTES,
+    ROUTER_FAILOVER, ROUTER_MAX_ATTEMPTS, ROUTER_BACKOFF_BASE_SECONDS, ROUTER_BACKOFF_MAX_SECONDS, ROUTER_WINDOW,
+    ROUTER_FAILURE_THRESHOLD, ROUTER_ERROR_RATE_THRESHOLD, ROUTER_COOLDOWN_SECONDS,
+    HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MAX_PER_SESSION,
+    TOKEN_BUDGET_ENABLED, TOKEN_BUDGET_WINDOW, TOKEN_BUDGET_MIN_SAMPLES, TOKEN_BUDGET_PERCENTILE,
+    TOKEN_BUDGET_HEADROOM, TOKEN_BUDGET_MIN_TOKENS, AGENT_EXECUTOR, AGENT_MAX_ITERATIONS, AGENT_MAX_EXECUTION_SECONDS,
+    FAST_PATH_ENABLED, FAST_PATH_MIN_CONFIDENCE, FAST_PATH_MAX_LISTED_VALUES, FAST_PATH_MAX_TOP_ROWS,
+    ANSWER_CACHE_ENABLED, ANSWER_CACHE_MIN_SIMILARITY, ANSWER_CACHE_MAX_ENTRIES,
+    PLAN_CACHE_ENABLED, PLAN_CACHE_PATH, PLAN_CACHE_MAX_ENTRIES,
+    ANSWER_TEMPLATE_ENABLED, CODE_VALIDATION_ENABLED, CODE_VALIDATION_MIN_SIMILARITY,
+    CODE_VALIDATION_MAX_LISTED_COLUMNS, SNAPSHOT_ISOLATION_ENABLED, SNAPSHOT_COMMIT_CHANGES,
+    REPL_NAMESPACE_MAX_BYTES, REPL_NAMESPACE_MIN_SPILL_BYTES, REPL_NAMESPACE_SPILL_DIR,
+    EXECUTION_CACHE_ENABLED, EXECUTION_CACHE_MAX_BYTES,
+)
 
-__all__ = ['SYSTEM_TEMPLATE', 'COMMON_SYSTEM_TEMPLATE', 'AVAILABLE_MODELS', 'DEFAULT_MODEL']
+__all__ = [
+    'SYSTEM_TEMPLATE', 'TOOL_CALLING_SYSTEM_TEMPLATE', 'TOOL_CALLING_FINAL_ANSWER_PROMPT', 'COMMON_SYSTEM_TEMPLATE',
+    'ANSWER_TOOL_TEMPLATE', 'SQL_TOOL_TEMPLATE', 'SQL_TOOL_PREFER_HINT', 'SQL_TOOL_OPTIONAL_HINT',
+    'WIDE_SCHEMA_TEMPLATE', 'RELEVANT_COLUMNS_TEMPLATE',
+    'AVAILABLE_MODELS', 'DEFAULT_MODEL',
+    'DATASET_CACHE_MAX_BYTES', 'AGENT_CACHE_IDLE_SECONDS', 'AGENT_CACHE_MAX_ENTRIES',
+    'INGEST_COMPACT_DTYPES', 'INGEST_CATEGORY_MAX_RATIO', 'INGEST_CATEGORY_MAX_UNIQUE', 'INGEST_DOWNCAST_INTEGERS',
+    'INGEST_SPARSE_MIN_NULL_RATIO', 'INGEST_SPARSE_COLUMNS', 'STATE_DIR', 'DATASET_STORE_DIR',
+    'DATASET_STORE_MAX_BYTES',
+    'LAZY_FRAME_MIN_COLUMNS', 'STREAMING_INGEST_MIN_BYTES', 'SQL_TOOL_MAX_ROWS', 'SQL_TOOL_MEMORY_LIMIT',
+    'SQL_TOOL_PREFER_MIN_BYTES', 'PROFILE_MAX_WORKERS', 'PROFILE_TOP_VALUES', 'PROFILE_CACHE_MAX_ENTRIES',
+    'SCHEMA_PRUNE_MIN_COLUMNS', 'SCHEMA_PRUNE_MAX_COLUMNS', 'SCHEMA_PRUNE_SAMPLE_ROWS',
+    'OPENROUTER_API_URL', 'HTTP_TIMEOUT_SECONDS', 'HTTP_MAX_CONNECTIONS', 'HTTP_MAX_KEEPALIVE_CONNECTIONS',
+    'HTTP_KEEPALIVE_EXPIRY_SECONDS', 'HTTP_ENABLE_HTTP2', 'LLM_STREAMING',
+    'LLM_CACHE_MODE', 'LLM_CACHE_PATH', 'LLM_CACHE_TTL_SECONDS', 'LLM_CACHE_MAX_BYTES',
+    'ROUTER_FAILOVER', 'ROUTER_MAX_ATTEMPTS', 'ROUTER_BACKOFF_BASE_SECONDS', 'ROUTER_BACKOFF_MAX_SECONDS', 'ROUTER_WINDOW',
+    'ROUTER_FAILURE_THRESHOLD', 'ROUTER_ERROR_RATE_THRESHOLD', 'ROUTER_COOLDOWN_SECONDS',
+    'HEDGE_ENABLED', 'HEDGE_PERCENTILE', 'HEDGE_MIN_SAMPLES', 'HEDGE_MAX_PER_SESSION',
+    'TOKEN_BUDGET_ENABLED', 'TOKEN_BUDGET_WINDOW', 'TOKEN_BUDGET_MIN_SAMPLES', 'TOKEN_BUDGET_PERCENTILE',
+    'TOKEN_BUDGET_HEADROOM', 'TOKEN_BUDGET_MIN_TOKENS', 'AGENT_EXECUTOR', 'AGENT_MAX_ITERATIONS',
+    'AGENT_MAX_EXECUTION_SECONDS',
+    'FAST_PATH_ENABLED', 'FAST_PATH_MIN_CONFIDENCE', 'FAST_PATH_MAX_LISTED_VALUES',
+    'FAST_PATH_MAX_TOP_ROWS', 'ANSWER_CACHE_ENABLED', 'ANSWER_CACHE_MIN_SIMILARITY', 'ANSWER_CACHE_MAX_ENTRIES',
+    'PLAN_CACHE_ENABLED', 'PLAN_CACHE_PATH', 'PLAN_CACHE_MAX_ENTRIES', 'ANSWER_TEMPLATE_ENABLED',
+    'CODE_VALIDATION_ENABLED', 'CODE_VALIDATION_MIN_SIMILARITY', 'CODE_VALIDATION_MAX_LISTED_COLUMNS',
+    'SNAPSHOT_ISOLATION_ENABLED', 'SNAPSHOT_COMMIT_CHANGES', 'REPL_NAMESPACE_MAX_BYTES',
+    'REPL_NAMESPACE_MIN_SPILL_BYTES', 'REPL_NAMESPACE_SPILL_DIR', 'EXECUTION_CACHE_ENABLED',
+    'EXECUTION_CACHE_MAX_BYTES',
+]
@@ -0,0 +1,167 @@
+"""Runtime performance settings, overridable through environment variables"""
+
+import getpass
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment, falling back to default"""
+    value = os.environ.get(name)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    """Read a float setting from the environment, falling back to default"""
+    value = os.environ.get(name)
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+def _user_id():
+    """Identify the current user for per-user default paths"""
+    return str(os.getuid()) if hasattr(os, "getuid") else getpass.getuser()
+
+
+def _env_flag(name, default):
+    """Read a boolean setting from the environment, falling back to default"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Memory budget for parsed datasets shared across reruns and sessions
+DATASET_CACHE_MAX_BYTES = _env_int("ANALYZIA_DATASET_CACHE_MB", 2048) * 1024 * 1024
+
+# Built agents are reused across reruns and dropped after this much idle time
+AGENT_CACHE_IDLE_SECONDS = _env_int("ANALYZIA_AGENT_CACHE_IDLE_SECONDS", 1800)
+AGENT_CACHE_MAX_ENTRIES = _env_int("ANALYZIA_AGENT_CACHE_MAX_ENTRIES", 32)
+
+# CSV ingest: dtype compaction after the multithreaded Arrow parse
+INGEST_COMPACT_DTYPES = _env_flag("ANALYZIA_INGEST_COMPACT_DTYPES", True)
+INGEST_CATEGORY_MAX_RATIO = _env_float("ANALYZIA_INGEST_CATEGORY_MAX_RATIO", 0.5)
+INGEST_CATEGORY_MAX_UNIQUE = _env_int("ANALYZIA_INGEST_CATEGORY_MAX_UNIQUE", 10000)
+INGEST_SPARSE_MIN_NULL_RATIO = _env_float("ANALYZIA_INGEST_SPARSE_MIN_NULL_RATIO", 0.9)
+# Off by default: pandas sparse columns reject std/var, which breaks df.describe()
+INGEST_SPARSE_COLUMNS = _env_flag("ANALYZIA_INGEST_SPARSE_COLUMNS", False)
+# Off by default: int8/int16 columns overflow without an error in arithmetic on them
+INGEST_DOWNCAST_INTEGERS = _env_flag("ANALYZIA_INGEST_DOWNCAST_INTEGERS", False)
+
+# Per-user directory for state read back without review (stored datasets, cached completions, code plans);
+# created readable only by its owner
+STATE_DIR = os.environ.get("ANALYZIA_STATE_DIR", os.path.join(tempfile.gettempdir(), f"analyzia-{_user_id()}"))
+
+# Content-addressed Arrow IPC store that replaces per-upload temp files
+DATASET_STORE_DIR = os.environ.get("ANALYZIA_DATASET_STORE_DIR", os.path.join(STATE_DIR, "datasets"))
+DATASET_STORE_MAX_BYTES = _env_int("ANALYZIA_DATASET_STORE_MB", 10240) * 1024 * 1024
+
+# Stored datasets at least this wide are served as lazily loaded frames
+LAZY_FRAME_MIN_COLUMNS = _env_int("ANALYZIA_LAZY_FRAME_MIN_COLUMNS", 500)
+
+# Uploads at least this large are converted to the store in record batches
+STREAMING_INGEST_MIN_BYTES = _env_int("ANALYZIA_STREAMING_INGEST_MIN_MB", 1024) * 1024 * 1024
+
+# DuckDB SQL tool over the stored dataset
+SQL_TOOL_MAX_ROWS = _env_int("ANALYZIA_SQL_TOOL_MAX_ROWS", 50)
+SQL_TOOL_MEMORY_LIMIT = os.environ.get("ANALYZIA_SQL_TOOL_MEMORY_LIMIT", "2GB")
+SQL_TOOL_PREFER_MIN_BYTES = _env_int("ANALYZIA_SQL_TOOL_PREFER_MIN_MB", 512) * 1024 * 1024
+
+# Dataset profile computed once per dataset and added to the system prompt
+PROFILE_MAX_WORKERS = _env_int("ANALYZIA_PROFILE_MAX_WORKERS", min(8, os.cpu_count() or 1))
+PROFILE_TOP_VALUES = _env_int("ANALYZIA_PROFILE_TOP_VALUES", 3)
+PROFILE_CACHE_MAX_ENTRIES = _env_int("ANALYZIA_PROFILE_CACHE_MAX_ENTRIES", 64)
+
+# Datasets wider than this get a per-question column shortlist instead of the full schema
+SCHEMA_PRUNE_MIN_COLUMNS = _env_int("ANALYZIA_SCHEMA_PRUNE_MIN_COLUMNS", 60)
+SCHEMA_PRUNE_MAX_COLUMNS = _env_int("ANALYZIA_SCHEMA_PRUNE_MAX_COLUMNS", 20)
+SCHEMA_PRUNE_SAMPLE_ROWS = _env_int("ANALYZIA_SCHEMA_PRUNE_SAMPLE_ROWS", 3)
+
+# OpenRouter HTTP client: one pooled keep-alive connection pool per process
+OPENROUTER_API_URL = os.environ.get("ANALYZIA_OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+HTTP_TIMEOUT_SECONDS = _env_float("ANALYZIA_HTTP_TIMEOUT_SECONDS", 60.0)
+HTTP_MAX_CONNECTIONS = _env_int("ANALYZIA_HTTP_MAX_CONNECTIONS", 50)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _env_int("ANALYZIA_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+HTTP_KEEPALIVE_EXPIRY_SECONDS = _env_float("ANALYZIA_HTTP_KEEPALIVE_EXPIRY_SECONDS", 60.0)
+HTTP_ENABLE_HTTP2 = _env_flag("ANALYZIA_HTTP_ENABLE_HTTP2", True)
+
+# Stream completions as server-sent events so tokens reach the chat as they are generated
+LLM_STREAMING = _env_flag("ANALYZIA_LLM_STREAMING", True)
+
+# Persistent LLM response cache: "off" (default), "on", or "replay" to serve only recorded responses
+LLM_CACHE_MODE = os.environ.get("ANALYZIA_LLM_CACHE_MODE", "off").strip().lower()
+LLM_CACHE_PATH = os.environ.get("ANALYZIA_LLM_CACHE_PATH", os.path.join(STATE_DIR, "llm-cache.sqlite3"))
+LLM_CACHE_TTL_SECONDS = _env_int("ANALYZIA_LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+LLM_CACHE_MAX_BYTES = _env_int("ANALYZIA_LLM_CACHE_MB", 256) * 1024 * 1024
+
+# Model router: retries with jittered backoff, per-model circuit breakers and failover
+ROUTER_FAILOVER = _env_flag("ANALYZIA_ROUTER_FAILOVER", True)
+ROUTER_MAX_ATTEMPTS = _env_int("ANALYZIA_ROUTER_MAX_ATTEMPTS", 3)
+ROUTER_BACKOFF_BASE_SECONDS = _env_float("ANALYZIA_ROUTER_BACKOFF_BASE_SECONDS", 0.5)
+ROUTER_BACKOFF_MAX_SECONDS = _env_float("ANALYZIA_ROUTER_BACKOFF_MAX_SECONDS", 8.0)
+ROUTER_WINDOW = _env_int("ANALYZIA_ROUTER_WINDOW", 20)
+ROUTER_FAILURE_THRESHOLD = _env_int("ANALYZIA_ROUTER_FAILURE_THRESHOLD", 3)
+ROUTER_ERROR_RATE_THRESHOLD = _env_float("ANALYZIA_ROUTER_ERROR_RATE_THRESHOLD", 0.5)
+ROUTER_COOLDOWN_SECONDS = _env_float("ANALYZIA_ROUTER_COOLDOWN_SECONDS", 60.0)
+
+# Hedged requests: duplicate a request that has not answered by this percentile of recent latency
+HEDGE_ENABLED = _env_flag("ANALYZIA_HEDGE_ENABLED", False)
+HEDGE_PERCENTILE = _env_float("ANALYZIA_HEDGE_PERCENTILE", 0.9)
+HEDGE_MIN_SAMPLES = _env_int("ANALYZIA_HEDGE_MIN_SAMPLES", 5)
+HEDGE_MAX_PER_SESSION = _env_int("ANALYZIA_HEDGE_MAX_PER_SESSION", 20)
+
+# Agent steps request a high percentile of recent completion lengths instead of the full max_tokens
+TOKEN_BUDGET_ENABLED = _env_flag("ANALYZIA_TOKEN_BUDGET_ENABLED", True)
+TOKEN_BUDGET_WINDOW = _env_int("ANALYZIA_TOKEN_BUDGET_WINDOW", 50)
+TOKEN_BUDGET_MIN_SAMPLES = _env_int("ANALYZIA_TOKEN_BUDGET_MIN_SAMPLES", 5)
+TOKEN_BUDGET_PERCENTILE = _env_float("ANALYZIA_TOKEN_BUDGET_PERCENTILE", 0.95)
+TOKEN_BUDGET_HEADROOM = _env_float("ANALYZIA_TOKEN_BUDGET_HEADROOM", 1.5)
+TOKEN_BUDGET_MIN_TOKENS = _env_int("ANALYZIA_TOKEN_BUDGET_MIN_TOKENS", 256)
+
+# Agent executor: "tools" uses native tool calling with JSON arguments, "react" the text ReAct loop
+AGENT_EXECUTOR = os.environ.get("ANALYZIA_AGENT_EXECUTOR", "tools").strip().lower()
+AGENT_MAX_ITERATIONS = _env_int("ANALYZIA_AGENT_MAX_ITERATIONS", 8)
+AGENT_MAX_EXECUTION_SECONDS = _env_float("ANALYZIA_AGENT_MAX_EXECUTION_SECONDS", 60.0)
+
+# Simple factual questions (counts, min/max, missing values, top-N) are answered locally without the LLM
+FAST_PATH_ENABLED = _env_flag("ANALYZIA_FAST_PATH_ENABLED", True)
+FAST_PATH_MIN_CONFIDENCE = _env_float("ANALYZIA_FAST_PATH_MIN_CONFIDENCE", 0.8)
+FAST_PATH_MAX_LISTED_VALUES = _env_int("ANALYZIA_FAST_PATH_MAX_LISTED_VALUES", 20)
+FAST_PATH_MAX_TOP_ROWS = _env_int("ANALYZIA_FAST_PATH_MAX_TOP_ROWS", 50)
+
+# Final answers reused for similar questions about the same dataset, without an LLM call
+ANSWER_CACHE_ENABLED = _env_flag("ANALYZIA_ANSWER_CACHE_ENABLED", True)
+ANSWER_CACHE_MIN_SIMILARITY = _env_float("ANALYZIA_ANSWER_CACHE_MIN_SIMILARITY", 0.8)
+ANSWER_CACHE_MAX_ENTRIES = _env_int("ANALYZIA_ANSWER_CACHE_MAX_ENTRIES", 512)
+
+# Code that answered a question is re-run on later datasets with the same column names and kinds
+PLAN_CACHE_ENABLED = _env_flag("ANALYZIA_PLAN_CACHE_ENABLED", True)
+PLAN_CACHE_PATH = os.environ.get("ANALYZIA_PLAN_CACHE_PATH", os.path.join(STATE_DIR, "plans.sqlite3"))
+PLAN_CACHE_MAX_ENTRIES = _env_int("ANALYZIA_PLAN_CACHE_MAX_ENTRIES", 2000)
+
+# Tool-calling agents may answer in one round trip: code plus an answer template filled from its variables
+ANSWER_TEMPLATE_ENABLED = _env_flag("ANALYZIA_ANSWER_TEMPLATE_ENABLED", True)
+
+# Generated code is checked against the live schema before it runs; near-miss column names are corrected
+CODE_VALIDATION_ENABLED = _env_flag("ANALYZIA_CODE_VALIDATION_ENABLED", True)
+CODE_VALIDATION_MIN_SIMILARITY = _env_float("ANALYZIA_CODE_VALIDATION_MIN_SIMILARITY", 0.8)
+CODE_VALIDATION_MAX_LISTED_COLUMNS = _env_int("ANALYZIA_CODE_VALIDATION_MAX_LISTED_COLUMNS", 30)
+
+# Each question works on a copy-on-write view of df; its column changes are discarded unless committing is on
+SNAPSHOT_ISOLATION_ENABLED = _env_flag("ANALYZIA_SNAPSHOT_ISOLATION_ENABLED", True)
+SNAPSHOT_COMMIT_CHANGES = _env_flag("ANALYZIA_SNAPSHOT_COMMIT_CHANGES", False)
+
+# Intermediates left in the REPL namespace are kept under this budget; idle large ones are spilled to disk.
+# Each session spills into its own directory created under the spill dir; an empty spill dir drops them instead.
+REPL_NAMESPACE_MAX_BYTES = _env_int("ANALYZIA_REPL_NAMESPACE_MB", 512) * 1024 * 1024
+REPL_NAMESPACE_MIN_SPILL_BYTES = _env_int("ANALYZIA_REPL_NAMESPACE_MIN_SPILL_KB", 1024) * 1024
+REPL_NAMESPACE_SPILL_DIR = os.environ.get("ANALYZIA_REPL_NAMESPACE_SPILL_DIR", tempfile.gettempdir())
+
+# REPL runs are memoized per session by normalized code and input versions; "# no-cache" in code skips it
+EXECUTION_CACHE_ENABLED = _env_flag("ANALYZIA_EXECUTION_CACHE_ENABLED", True)
+EXECUTION_CACHE_MAX_BYTES = _env_int("ANALYZIA_EXECUTION_CACHE_MB", 128) * 1024 * 1024
@@ -0,0 +1,13 @@
+"""Data loading and storage modules for Analyzia"""
+
+from .ingest import CSVIngestor
+from .lazy_frame import ColumnSource, LazyDataFrame
+from .dataset_store import DatasetStore, get_dataset_store
+from .profiler import DatasetProfiler
+from .schema_index import SchemaIndex
+from .snapshot import DatasetSnapshot, ColumnChange, enable_copy_on_write
+
+__all__ = [
+    'CSVIngestor', 'ColumnSource', 'LazyDataFrame', 'DatasetStore', 'get_dataset_store', 'DatasetProfiler',
+    'SchemaIndex', 'DatasetSnapshot', 'ColumnChange', 'enable_copy_on_write',
+]
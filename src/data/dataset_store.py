@@ -0,0 +1,231 @@
+"""Content-addressed on-disk dataset store backed by Arrow IPC files"""
+
+import json
+import os
+import threading
+import uuid
+
+import pandas as pd
+
+from .ingest import CSVIngestor
+from .lazy_frame import ColumnSource, LazyDataFrame
+from ..config import DATASET_STORE_DIR, DATASET_STORE_MAX_BYTES, LAZY_FRAME_MIN_COLUMNS
+from ..utils.file_utils import FileUtils
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # without pyarrow the store is disabled and uploads are parsed each time
+    pa = None
+    pa_csv = None
+
+
+class DatasetStore:
+    """Store each upload once as an uncompressed Arrow IPC file named by its fingerprint.
+
+    Uncompressed IPC files can be memory-mapped, so reloading a dataset maps
+    the file instead of reading and parsing it, and Arrow-backed columns
+    reference the mapped pages directly. Files are garbage-collected in least
+    recently used order once the directory grows past max_bytes. Stored
+    files are trusted by fingerprint, so the store stays disabled unless its
+    directory belongs to the current user and nobody else can write to it.
+    """
+
+    FILE_SUFFIX = ".arrow"
+    METADATA_KEY = b"analyzia"
+
+    def __init__(self, root=DATASET_STORE_DIR, max_bytes=DATASET_STORE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._root_private = None
+
+    @property
+    def enabled(self):
+        """Whether pyarrow is available and the store directory is private to this user"""
+        return pa is not None and self._ensure_root()
+
+    def _ensure_root(self):
+        """Create the store directory or check an existing one, once"""
+        if self._root_private is None:
+            try:
+                FileUtils.ensure_private_directory(self.root)
+                self._root_private = True
+            except OSError as e:
+                print(f"[DEBUG] Dataset store disabled: {str(e)}")
+                self._root_private = False
+        return self._root_private
+
+    def path_for(self, fingerprint):
+        """Return the store path of a dataset fingerprint"""
+        return os.path.join(self.root, fingerprint + self.FILE_SUFFIX)
+
+    def contains(self, fingerprint):
+        """Check whether a dataset is already in the store"""
+        return self.enabled and os.path.exists(self.path_for(fingerprint))
+
+    def open_table(self, fingerprint):
+        """Memory-map a stored dataset and return it as an Arrow table, or None"""
+        if not self.contains(fingerprint):
+            return None
+        path = self.path_for(fingerprint)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+
+        # Touch the file so garbage collection sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return table
+
+    def load(self, fingerprint, lazy_min_columns=LAZY_FRAME_MIN_COLUMNS):
+        """Return a stored dataset as a DataFrame, or None if it is not stored.
+
+        Datasets with at least lazy_min_columns columns are returned as a
+        LazyDataFrame that converts each column only when it is first read.
+        Lazy frames pickle as a reference to the stored file, so
+        lazy_min_columns=0 gives a view other processes can attach to
+        without copying the data.
+        """
+        table = self.open_table(fingerprint)
+        if table is None:
+            return None
+
+        metadata = self._read_metadata(table)
+        if table.num_columns >= lazy_min_columns:
+            source = ColumnSource(
+                table,
+                sparse_columns=metadata.get('sparse_columns', []),
+                attrs={'ingest_report': metadata['ingest_report']} if metadata.get('ingest_report') else None,
+                path=self.path_for(fingerprint),
+            )
+            return LazyDataFrame(source)
+
+        df = CSVIngestor.table_to_pandas(table)
+        for col in metadata.get('sparse_columns', []):
+            df[col] = df[col].astype(pd.SparseDtype(df[col].dtype))
+        if metadata.get('ingest_report'):
+            df.attrs['ingest_report'] = metadata['ingest_report']
+        return df
+
+    def save(self, fingerprint, df):
+        """Write a DataFrame to the store atomically and collect garbage over quota"""
+        if not self.enabled:
+            return None
+
+        path = self.path_for(fingerprint)
+
+        # Arrow has no sparse type; store dense values and re-sparsify on load
+        sparse_columns = [col for col in df.columns if isinstance(df[col].dtype, pd.SparseDtype)]
+        if sparse_columns:
+            df = df.copy(deep=False)
+            for col in sparse_columns:
+                df[col] = df[col].sparse.to_dense()
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = {
+            'sparse_columns': sparse_columns,
+            'ingest_report': df.attrs.get('ingest_report'),
+        }
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[self.METADATA_KEY] = json.dumps(metadata).encode("utf-8")
+        table = table.replace_schema_metadata(schema_metadata)
+
+        self._write_atomically(path, table.schema, lambda writer: writer.write_table(table))
+        return path
+
+    def save_csv(self, fingerprint, source):
+        """Convert a CSV straight into the store in record batches.
+
+        Used for uploads too large to hold as a DataFrame: peak memory is one
+        parse block, and the result is queried lazily or through DuckDB.
+        Dtype compaction is skipped because it needs whole columns.
+        """
+        if not self.enabled:
+            return None
+
+        path = self.path_for(fingerprint)
+
+        reader = pa_csv.open_csv(source, read_options=pa_csv.ReadOptions(use_threads=True))
+        schema = pa.schema(
+            [field.with_name(name) for field, name in
+             zip(reader.schema, CSVIngestor.dedupe_column_names(reader.schema.names))]
+        )
+
+        def write_batches(writer):
+            for batch in reader:
+                writer.write_batch(pa.RecordBatch.from_arrays(batch.columns, schema=schema))
+
+        self._write_atomically(path, schema, write_batches)
+        return path
+
+    def _write_atomically(self, path, schema, write):
+        """Write an IPC file under a temporary name, move it into place and collect garbage"""
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, schema) as writer:
+                    write(writer)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.collect_garbage(keep=(path,))
+
+    def collect_garbage(self, keep=()):
+        """Delete least recently used datasets until the store fits its quota"""
+        with self._lock:
+            try:
+                entries = [
+                    entry for entry in os.scandir(self.root)
+                    if entry.is_file() and entry.name.endswith(self.FILE_SUFFIX)
+                ]
+            except FileNotFoundError:
+                return 0
+
+            files = sorted(
+                ((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries),
+            )
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                if path in keep:
+                    continue
+                try:
+                    # Sessions that already mapped the file keep their pages until they release them
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+    def usage(self):
+        """Return the number of stored datasets and their total size in bytes"""
+        try:
+            sizes = [
+                entry.stat().st_size for entry in os.scandir(self.root)
+                if entry.is_file() and entry.name.endswith(self.FILE_SUFFIX)
+            ]
+        except FileNotFoundError:
+            sizes = []
+        return {'datasets': len(sizes), 'total_bytes': sum(sizes), 'max_bytes': self.max_bytes}
+
+    def _read_metadata(self, table):
+        """Return the Analyzia metadata stored alongside a table"""
+        raw = (table.schema.metadata or {}).get(self.METADATA_KEY)
+        return json.loads(raw) if raw else {}
+
+
+_dataset_store = DatasetStore()
+
+
+def get_dataset_store():
+    """Return the process-wide dataset store"""
+    return _dataset_store
@@ -0,0 +1,284 @@
+"""Lazy DataFrame proxy that materializes columns on first access"""
+
+import threading
+
+import pandas as pd
+
+from .ingest import CSVIngestor
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Sources attached from pickled references, one per stored file in this process
+_attached_sources = {}
+_attach_lock = threading.Lock()
+
+
+class ColumnSource:
+    """Thread-safe, shared loader of single columns from a memory-mapped Arrow table.
+
+    Columns converted to pandas are kept so every session reading the same
+    dataset shares one copy of each column it has touched. A source read
+    from a stored file (path set) pickles as a reference to that file:
+    another process unpickling it maps the same pages read-only instead of
+    receiving a copy of the data.
+    """
+
+    def __init__(self, table, sparse_columns=(), attrs=None, path=None):
+        self.table = table
+        self.path = path
+        self.num_rows = table.num_rows
+        self.attrs = dict(attrs or {})
+        self._sparse_columns = set(sparse_columns)
+        self._columns = {}
+        self._lock = threading.Lock()
+
+        # Zero-row frame with the final dtypes, so schema questions never load data
+        self.template = self._restore_sparse(CSVIngestor.table_to_pandas(table.slice(0, 0)))
+
+    @classmethod
+    def attach(cls, path, sparse_columns=(), attrs=None):
+        """Memory-map a stored dataset read-only, sharing one source per file in this process"""
+        with _attach_lock:
+            source = _attached_sources.get(path)
+            if source is None:
+                table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+                source = cls(table, sparse_columns, attrs, path=path)
+                _attached_sources[path] = source
+            return source
+
+    def __reduce__(self):
+        if self.path is None:
+            # Not backed by a file: the table itself has to be sent
+            return (ColumnSource, (self.table, sorted(self._sparse_columns), self.attrs))
+        return (ColumnSource.attach, (self.path, sorted(self._sparse_columns), self.attrs))
+
+    def column(self, name, cache=True):
+        """Return a column as a pandas Series, converting it on first use.
+
+        With cache=False a column that is not loaded yet is converted for the
+        caller only, e.g. for one-off scans such as profiling.
+        """
+        with self._lock:
+            series = self._columns.get(name)
+        if series is not None:
+            return series
+
+        frame = self._restore_sparse(CSVIngestor.table_to_pandas(self.table.select([name])))
+        series = frame[name]
+        if not cache:
+            return series
+        with self._lock:
+            return self._columns.setdefault(name, series)
+
+    def head(self, n=5):
+        """Return the first n rows of every column without caching them"""
+        return self._restore_sparse(CSVIngestor.table_to_pandas(self.table.slice(0, n)))
+
+    def loaded_columns(self):
+        """Return the names of columns converted so far"""
+        with self._lock:
+            return list(self._columns)
+
+    def loaded_bytes(self):
+        """Return the memory held by converted columns"""
+        with self._lock:
+            series_list = list(self._columns.values())
+        return int(sum(series.memory_usage(deep=True, index=False) for series in series_list))
+
+    def _restore_sparse(self, frame):
+        """Re-apply sparse dtypes that the Arrow file stores densely"""
+        for col in self._sparse_columns.intersection(frame.columns):
+            frame[col] = frame[col].astype(pd.SparseDtype(frame[col].dtype))
+        return frame
+
+
+class LazyDataFrame:
+    """Stand-in for a wide DataFrame that loads each column the first time it is read.
+
+    Column access (df['a'], df[['a', 'b']], df.a), column assignment and
+    schema attributes (columns, dtypes, shape, len) never touch unrelated
+    columns. Any other DataFrame method materializes the full frame once and
+    is then delegated to it, so generated code keeps pandas semantics. Each
+    column read is a copy-on-write view of the shared one, so in-place
+    writes (df['a'].fillna(0, inplace=True)) never reach other sessions.
+
+    The proxy is not a pd.DataFrame: pd.concat([df, ...]) and isinstance
+    checks reject it. Code that passes the frame itself to a function
+    should get materialize() instead, which the REPL tool does before
+    running such code.
+
+    Until the frame is materialized, pickling it sends only the source
+    (a file reference for stored datasets) and the columns assigned through
+    this view, so handing it to another process copies just what changed.
+    """
+
+    def __init__(self, source, overlay=None):
+        self._source = source
+        self._overlay = dict(overlay or {})
+        self._frame = None
+        self.attrs = dict(source.attrs)
+
+    @property
+    def is_materialized(self):
+        """Whether the full frame has been built"""
+        return self._frame is not None
+
+    @property
+    def columns(self):
+        if self._frame is not None:
+            return self._frame.columns
+        base = self._source.template.columns
+        added = [col for col in self._overlay if col not in base]
+        return base.append(pd.Index(added)) if added else base
+
+    @property
+    def dtypes(self):
+        if self._frame is not None:
+            return self._frame.dtypes
+        dtypes = self._source.template.dtypes.copy()
+        for col, series in self._overlay.items():
+            dtypes[col] = series.dtype
+        return dtypes
+
+    @property
+    def index(self):
+        if self._frame is not None:
+            return self._frame.index
+        return pd.RangeIndex(self._source.num_rows)
+
+    @property
+    def shape(self):
+        return (len(self), len(self.columns))
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def empty(self):
+        return 0 in self.shape
+
+    def __len__(self):
+        if self._frame is not None:
+            return len(self._frame)
+        return self._source.num_rows
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __getitem__(self, key):
+        if self._frame is not None:
+            return self._frame[key]
+        if self._is_column_key(key):
+            return self._column(key)
+        if isinstance(key, list) and key and all(self._is_column_key(col) for col in key):
+            return pd.DataFrame({col: self._column(col) for col in key}, index=self.index)
+        return self.materialize()[key]
+
+    def __setitem__(self, key, value):
+        if self._frame is None and isinstance(key, str):
+            # Align scalars, arrays and Series exactly as DataFrame.__setitem__ would
+            aligned = pd.DataFrame(index=self.index)
+            aligned[key] = value
+            self._overlay[key] = aligned[key]
+            return
+        self.materialize()[key] = value
+
+    def __delitem__(self, key):
+        del self.materialize()[key]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        # DataFrame methods win over columns of the same name (df.mean with a 'mean' column), as in pandas
+        if self._frame is None and not hasattr(pd.DataFrame, name) and self._is_column_key(name):
+            return self._column(name)
+        return getattr(self.materialize(), name)
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+    def _repr_html_(self):
+        return self.materialize()._repr_html_()
+
+    def __array__(self, *args, **kwargs):
+        return self.materialize().__array__(*args, **kwargs)
+
+    def __dataframe__(self, *args, **kwargs):
+        # Interchange protocol used by plotly and seaborn to accept non-pandas frames
+        return self.materialize().__dataframe__(*args, **kwargs)
+
+    def head(self, n=5):
+        """Return the first n rows without loading whole columns"""
+        if self._frame is not None:
+            return self._frame.head(n)
+        head = self._source.head(n)
+        if not self._overlay:
+            return head
+        columns = {col: head[col] for col in head.columns}
+        columns.update({col: series.iloc[:n] for col, series in self._overlay.items()})
+        return pd.DataFrame(columns, index=head.index)
+
+    def assigned_columns(self):
+        """Return the columns assigned through this view and not yet materialized, by name"""
+        return dict(self._overlay)
+
+    def peek_column(self, name):
+        """Return one column without keeping it loaded afterwards"""
+        if self._frame is not None:
+            return self._frame[name]
+        if name in self._overlay:
+            return self._overlay[name]
+        return self._source.column(name, cache=False)
+
+    def copy(self, deep=True):
+        """Return a copy; shallow copies share loaded columns and stay lazy"""
+        if deep or self._frame is not None:
+            return self.materialize().copy(deep=deep)
+        clone = LazyDataFrame(self._source, {col: series.copy(deep=False) for col, series in self._overlay.items()})
+        clone.attrs = dict(self.attrs)
+        return clone
+
+    def materialize(self):
+        """Build and keep the full pandas DataFrame"""
+        if self._frame is None:
+            columns = {col: self._overlay.get(col) for col in self.columns}
+            for col, series in columns.items():
+                if series is None:
+                    columns[col] = self._source.column(col)
+            # Without copying: the frame references the shared columns and copies one only when it is written
+            frame = pd.DataFrame(columns, index=self.index, copy=False)
+            frame.attrs.update(self.attrs)
+            print(f"[LAZY] Materialized all {len(frame.columns)} columns")
+            self._frame = frame
+        return self._frame
+
+    def loaded_bytes(self):
+        """Return the memory held by columns loaded or assigned through this view"""
+        if self._frame is not None:
+            return int(self._frame.memory_usage(deep=True).sum())
+        overlay_bytes = sum(series.memory_usage(deep=True, index=False) for series in self._overlay.values())
+        return self._source.loaded_bytes() + int(overlay_bytes)
+
+    def _is_column_key(self, key):
+        """Check whether key names a single existing column"""
+        try:
+            return key in self._overlay or key in self._source.template.columns
+        except TypeError:
+            return False
+
+    def _column(self, name):
+        """Return one column, preferring values assigned through this view"""
+        # A shallow copy, so writes through it copy the data instead of changing the column every session shares
+        series = self._overlay[name] if name in self._overlay else self._source.column(name)
+        return series.copy(deep=False)
@@ -0,0 +1,127 @@
+"""Vectorized per-column dataset profiling for the agent prompt"""
+
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .lazy_frame import LazyDataFrame
+from ..config import PROFILE_MAX_WORKERS, PROFILE_TOP_VALUES
+
+
+class DatasetProfiler:
+    """Utility class that summarizes every column of a dataset.
+
+    The profile answers the questions the agent would otherwise spend a
+    round trip on (describe(), isnull().sum(), unique()), so it is computed
+    once per dataset and rendered compactly into the system prompt.
+    """
+
+    DATETIME_SAMPLE_SIZE = 200
+    DATETIME_MIN_PARSED_RATIO = 0.9
+
+    @staticmethod
+    def profile(df, max_workers=PROFILE_MAX_WORKERS):
+        """Profile all columns in parallel and return {'rows': n, 'columns': {col: stats}}"""
+        if isinstance(df, LazyDataFrame):
+            # Scan columns one at a time without keeping them loaded
+            get_column = df.peek_column
+        else:
+            get_column = df.__getitem__
+
+        columns = list(df.columns)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            stats = list(executor.map(lambda col: DatasetProfiler.profile_column(get_column(col)), columns))
+
+        return {'rows': len(df), 'columns': dict(zip(columns, stats))}
+
+    @staticmethod
+    def profile_column(series):
+        """Return null count, cardinality and distribution statistics of one column"""
+        if isinstance(series.dtype, pd.SparseDtype):
+            series = series.sparse.to_dense()
+
+        stats = {
+            'dtype': str(series.dtype),
+            'nulls': int(series.isna().sum()),
+            'unique': int(series.nunique(dropna=True)),
+        }
+        non_null = series.dropna()
+        if non_null.empty:
+            return stats
+
+        if pd.api.types.is_bool_dtype(non_null):
+            stats['top'] = DatasetProfiler._top_values(non_null)
+        elif pd.api.types.is_numeric_dtype(non_null):
+            quantiles = non_null.quantile([0.25, 0.5, 0.75])
+            stats.update({
+                'min': non_null.min(),
+                'max': non_null.max(),
+                'mean': non_null.mean(),
+                'q25': quantiles.iloc[0],
+                'median': quantiles.iloc[1],
+                'q75': quantiles.iloc[2],
+            })
+        elif pd.api.types.is_datetime64_any_dtype(non_null):
+            stats.update({'min': non_null.min(), 'max': non_null.max(), 'datetime': True})
+        else:
+            stats['top'] = DatasetProfiler._top_values(non_null)
+            if DatasetProfiler._looks_like_datetime(non_null):
+                stats['datetime'] = True
+
+        return stats
+
+    @staticmethod
+    def format_for_prompt(profile, columns=None):
+        """Render the profile as one compact line per column.
+
+        columns restricts the output to a subset, in the given order.
+        """
+        lines = []
+        for col in columns if columns is not None else profile['columns']:
+            stats = profile['columns'][col]
+            dtype = stats['dtype'] + (", datetime-like" if stats.get('datetime') and 'datetime' not in stats['dtype'] else "")
+            parts = [f"{stats['nulls']:,} nulls", f"{stats['unique']:,} unique"]
+            if 'median' in stats:
+                parts.append(
+                    f"min {DatasetProfiler._format_value(stats['min'])}, "
+                    f"median {DatasetProfiler._format_value(stats['median'])}, "
+                    f"mean {DatasetProfiler._format_value(stats['mean'])}, "
+                    f"max {DatasetProfiler._format_value(stats['max'])}"
+                )
+            elif 'min' in stats:
+                parts.append(f"from {stats['min']} to {stats['max']}")
+            if stats.get('top'):
+                top = ", ".join(f"{DatasetProfiler._format_value(value)} ({count:,})" for value, count in stats['top'])
+                parts.append(f"top: {top}")
+            lines.append(f"- {col} ({dtype}): " + "; ".join(parts))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _top_values(non_null):
+        """Return the most frequent values with their counts"""
+        counts = non_null.value_counts().head(PROFILE_TOP_VALUES)
+        # Nothing repeats (ids, free text): top values would be arbitrary
+        if counts.empty or counts.iloc[0] <= 1:
+            return []
+        return [(value, int(count)) for value, count in counts.items() if count > 0]
+
+    @staticmethod
+    def _looks_like_datetime(non_null):
+        """Check whether a sample of text values parses as dates"""
+        sample = non_null.head(DatasetProfiler.DATETIME_SAMPLE_SIZE).astype(str)
+        # Plain numbers (ids, zip codes) also parse as timestamps; require some separator
+        if not sample.str.contains(r"[-/:]", regex=True).all():
+            return False
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            parsed = pd.to_datetime(sample, errors='coerce')
+        return parsed.notna().mean() >= DatasetProfiler.DATETIME_MIN_PARSED_RATIO
+
+    @staticmethod
+    def _format_value(value):
+        """Format a statistic compactly for the prompt"""
+        if isinstance(value, float):
+            return f"{value:.6g}"
+        text = str(value)
+        return text if len(text) <= 30 else text[:27] + "..."
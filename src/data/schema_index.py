@@ -0,0 +1,111 @@
+"""Lexical index over column names, dtypes and sample values"""
+
+import math
+import re
+from collections import defaultdict
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_CAMEL_CASE_PATTERN = re.compile(r"([a-z0-9])([A-Z])")
+
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'get', 'give',
+    'has', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'many', 'much', 'of', 'on', 'or', 'over', 'per',
+    'please', 'show', 'tell', 'that', 'the', 'their', 'there', 'this', 'to', 'us', 'was', 'what',
+    'which', 'who', 'with', 'data', 'dataset', 'column', 'columns', 'df',
+}
+
+# Words that point at date/time columns even when no column is named after them
+_DATETIME_TOKENS = ['date', 'time', 'datetime', 'when', 'trend', 'year', 'month', 'week', 'day', 'daily']
+
+
+def tokenize(text):
+    """Split text into lowercase, singularized tokens without stopwords"""
+    text = _CAMEL_CASE_PATTERN.sub(r"\1 \2", str(text)).lower()
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class SchemaIndex:
+    """Rank the columns of a wide dataset by lexical relevance to a question.
+
+    Each column is indexed by the tokens of its name, its dtype and its
+    most frequent or sample values. A question is scored against the index
+    with IDF weights, name matches counting most, so the prompt can carry
+    only the handful of columns a question is about.
+    """
+
+    NAME_WEIGHT = 3.0
+    DTYPE_WEIGHT = 1.0
+    VALUE_WEIGHT = 1.0
+    PREFIX_MATCH_FACTOR = 0.5
+
+    def __init__(self, columns, fields):
+        self.columns = columns
+        self._fields = fields
+        self._postings = defaultdict(set)
+        for col, col_fields in fields.items():
+            for tokens in col_fields.values():
+                for token in tokens:
+                    self._postings[token].add(col)
+        self._name_tokens = {token for col_fields in fields.values() for token in col_fields['name']}
+
+    @classmethod
+    def build(cls, profile, sample_rows=None):
+        """Build the index from a dataset profile and an optional frame of sample rows"""
+        fields = {}
+        for col, stats in profile['columns'].items():
+            dtype_tokens = set(tokenize(stats['dtype']))
+            if stats.get('datetime'):
+                dtype_tokens.update(_DATETIME_TOKENS)
+
+            values = [value for value, _ in stats.get('top', [])]
+            if sample_rows is not None and col in sample_rows.columns:
+                values.extend(sample_rows[col].dropna().tolist())
+            value_tokens = {token for value in values if isinstance(value, str) for token in tokenize(value)}
+
+            fields[col] = {
+                'name': set(tokenize(col)),
+                'dtype': dtype_tokens,
+                'values': value_tokens,
+            }
+        return cls(list(profile['columns']), fields)
+
+    def search(self, question, limit):
+        """Return up to limit column names ordered by relevance to the question"""
+        scores = defaultdict(float)
+        total = len(self.columns)
+
+        for token in set(tokenize(question)):
+            matches = [(token, 1.0)]
+            if len(token) >= 4:
+                # One word starting with the other, both at least four letters: "temp" and "temperature"
+                matches.extend(
+                    (name_token, self.PREFIX_MATCH_FACTOR) for name_token in self._name_tokens
+                    if name_token != token and len(name_token) >= 4
+                    and (name_token.startswith(token) or token.startswith(name_token))
+                )
+
+            for matched_token, factor in matches:
+                cols = self._postings.get(matched_token)
+                if not cols:
+                    continue
+                idf = math.log(1 + total / len(cols))
+                for col in cols:
+                    col_fields = self._fields[col]
+                    if matched_token in col_fields['name']:
+                        scores[col] += self.NAME_WEIGHT * idf * factor
+                    if matched_token in col_fields['dtype']:
+                        scores[col] += self.DTYPE_WEIGHT * idf * factor
+                    if matched_token in col_fields['values']:
+                        scores[col] += self.VALUE_WEIGHT * idf * factor
+
+        # Ties keep the dataset's column order
+        position = {col: i for i, col in enumerate(self.columns)}
+        ranked = sorted(scores, key=lambda col: (-scores[col], position[col]))
+        return ranked[:limit]
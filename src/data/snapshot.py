@@ -0,0 +1,172 @@
+"""Copy-on-write snapshots that keep each question's DataFrame changes apart"""
+
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .lazy_frame import LazyDataFrame
+
+# A column a question added, modified or dropped, and the memory its new values take
+ColumnChange = namedtuple('ColumnChange', ['column', 'kind', 'bytes'])
+
+
+def enable_copy_on_write():
+    """Turn on pandas copy-on-write for the process; snapshot views rely on it.
+
+    pandas 3 always copies on write. pandas 2 needs the option, or in-place
+    writes through a view reach the base, so the app calls this once at
+    start-up rather than as a side effect of importing this module.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+class DatasetSnapshot:
+    """Hand each question a copy-on-write view of the session's base DataFrame.
+
+    begin() returns a shallow copy that shares every column with the base;
+    a column is only copied when generated code writes to it, and lazy
+    frames keep writes in their per-column overlay. changes() compares the
+    view the question ended with against the base column by column, by
+    whether the data is still shared rather than by value, and reports what
+    was added, modified or dropped with the bytes the new values hold. The
+    caller then calls commit() to make those changes the new base or
+    discard() to drop them, so columns no longer pile up across questions
+    and the schema caches rely on stays put. Views are only independent of
+    the base with copy-on-write on; see enable_copy_on_write().
+    """
+
+    def __init__(self, df):
+        self.base = df
+        self.view = None
+        self._lock = threading.Lock()
+        self.questions = 0
+        self.commits = 0
+        self.discards = 0
+        self.bytes_discarded = 0
+
+    def begin(self):
+        """Return a fresh view of the base for the next question"""
+        with self._lock:
+            self.view = self.base.copy(deep=False)
+            self.questions += 1
+            return self.view
+
+    def changes(self, view=None):
+        """Return the ColumnChanges of a view (by default the last one handed out) against the base"""
+        view = self.view if view is None else view
+        if view is None or view is self.base:
+            return []
+
+        base_columns = set(self.base.columns)
+        changes = []
+        for col in view.columns:
+            if col not in base_columns:
+                changes.append(ColumnChange(col, 'added', self._column_bytes(view, col)))
+            elif not self._same_column(view, col):
+                changes.append(ColumnChange(col, 'modified', self._column_bytes(view, col)))
+        view_columns = set(view.columns)
+        changes.extend(ColumnChange(col, 'dropped', 0) for col in self.base.columns if col not in view_columns)
+        return changes
+
+    def commit(self, view=None):
+        """Make a view's changes the new base; returns False if its rows no longer match the base"""
+        view = self.view if view is None else view
+        if view is None:
+            return False
+        if len(view) != len(self.base) or not view.index.equals(self.base.index):
+            # A filtered or re-sorted frame cannot replace the dataset the session uploaded
+            print("[SNAPSHOT] Not committing: the question changed the rows of df")
+            self.discard(view)
+            return False
+
+        changes = self.changes(view)
+        with self._lock:
+            self.base = view
+            self.view = None
+            self.commits += 1
+        self._log("Committed", changes)
+        return True
+
+    def discard(self, view=None):
+        """Drop a view's changes; the next question starts from the unchanged base"""
+        view = self.view if view is None else view
+        changes = self.changes(view)
+        with self._lock:
+            self.view = None
+            self.discards += 1
+            self.bytes_discarded += sum(change.bytes for change in changes)
+        self._log("Discarded", changes)
+        return changes
+
+    def _same_column(self, view, col):
+        """Whether the view's column still shares the base's data, without comparing values when possible"""
+        if isinstance(view, LazyDataFrame) and isinstance(self.base, LazyDataFrame) and not view.is_materialized:
+            # Untouched columns of a lazy view come straight from the shared source
+            return view.assigned_columns().get(col) is self.base.assigned_columns().get(col)
+
+        left, right = view[col], self.base[col]
+        shared = _shares_data(left.array, right.array)
+        if shared is None:
+            return left.equals(right)
+        return shared and left.index.equals(right.index)
+
+    @staticmethod
+    def _column_bytes(view, col):
+        try:
+            return int(view[col].memory_usage(deep=True, index=False))
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _log(action, changes):
+        if not changes:
+            return
+        described = ", ".join(
+            f"{change.column} ({change.kind}, {change.bytes / (1024 * 1024):.1f} MB)" for change in changes
+        )
+        total = sum(change.bytes for change in changes)
+        print(f"[SNAPSHOT] {action} {len(changes)} column change(s), {total / (1024 * 1024):.1f} MB: {described}")
+
+    def stats(self):
+        """Return snapshot counters for display or logging"""
+        with self._lock:
+            return {
+                'questions': self.questions,
+                'commits': self.commits,
+                'discards': self.discards,
+                'bytes_discarded': self.bytes_discarded,
+            }
+
+
+def _shares_data(left, right):
+    """Whether two column arrays share their buffers; None when that cannot be told without comparing values"""
+    if left is right:
+        return True
+    if type(left) is not type(right) or left.dtype != right.dtype or len(left) != len(right):
+        return False
+    if isinstance(left, (pd.arrays.NumpyExtensionArray, np.ndarray)):
+        return _same_buffer(np.asarray(left), np.asarray(right))
+    if isinstance(left, pd.Categorical):
+        return left.categories.equals(right.categories) and _same_buffer(left.codes, right.codes)
+    if isinstance(left, pd.arrays.SparseArray):
+        return _same_buffer(left.sp_values, right.sp_values) and left.sp_index.equals(right.sp_index)
+    if isinstance(left, pd.arrays.ArrowExtensionArray):
+        return _buffer_addresses(left) == _buffer_addresses(right)
+    return None
+
+
+def _same_buffer(left, right):
+    """Whether two ndarrays are the same memory with the same layout"""
+    return (left.__array_interface__['data'] == right.__array_interface__['data']
+            and left.strides == right.strides and left.shape == right.shape)
+
+
+def _buffer_addresses(array):
+    """Addresses and sizes of the Arrow buffers behind an Arrow-backed pandas array"""
+    return [
+        (buffer.address, buffer.size)
+        for chunk in array.__arrow_array__().chunks for buffer in chunk.buffers() if buffer is not None
+    ]
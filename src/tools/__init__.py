@@ -1,6 +1,13 @@
 """Tools and callback handlers for Analyzia"""
 
+from .answer_tool import AnswerWithCodeTool
 from .callback_handler import CustomStreamlitCallbackHandler
+from .code_validator import CodeValidator, CodeValidationError
+from .namespace_manager import NamespaceManager, NamespaceEntry
 from .python_repl_tool import CustomPythonAstREPLTool
+from .sql_tool import DuckDBSQLTool
 
-__all__ = ['CustomStreamlitCallbackHandler', 'CustomPythonAstREPLTool']
+__all__ = [
+    'AnswerWithCodeTool', 'CustomStreamlitCallbackHandler', 'CodeValidator', 'CodeValidationError',
+    'CustomPythonAstREPLTool', 'DuckDBSQLTool', 'NamespaceManager', 'NamespaceEntry',
+]
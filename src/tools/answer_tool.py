@@ -0,0 +1,82 @@
+"""Tool that runs analysis code and fills in the final answer locally, in one LLM round trip"""
+
+import string
+from typing import Any, Optional, Type
+
+from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_core.tools import BaseTool, ToolException
+
+from ..utils import DataFrameUtils
+
+
+class AnswerWithCodeInput(BaseModel):
+    code: str = Field(description="Python code to run; assign every value the answer needs to a variable")
+    answer: str = Field(
+        description="The final answer, with {variable} or {variable:.2f} placeholders for values the code computes"
+    )
+
+
+class AnswerWithCodeTool(BaseTool):
+    """Run code in the REPL and answer from its variables, without a second LLM call.
+
+    The model sends the code together with the answer it will give, written
+    as a template whose {name} placeholders refer to variables the code
+    assigns. The code runs in the shared REPL tool (figures are shown and
+    recorded as usual), the placeholders are filled from its namespace and
+    the result is the final answer. If the code fails or a placeholder has
+    no variable, a ToolException tells the model what to fix.
+    """
+
+    name: str = "answer_with_code"
+    description: str = (
+        "Runs Python code with the pandas DataFrame 'df' and gives the final answer in the same step. "
+        "Write the answer as a template: {name} placeholders are replaced with the values of variables "
+        "the code assigns. Use it when you can phrase the answer before seeing the result."
+    )
+    args_schema: Type[BaseModel] = AnswerWithCodeInput
+    return_direct: bool = True
+    handle_tool_error: bool = False
+    repl_tool: Any = None
+    # Template of the last answer given since start_question(), so a saved plan can fill it again
+    last_template: Optional[str] = None
+
+    def start_question(self):
+        """Forget the template recorded for the previous question"""
+        self.last_template = None
+
+    def _run(self, code: str, answer: str, run_manager=None) -> str:
+        """Run the code, then fill the answer template from the REPL namespace."""
+        executed = len(self.repl_tool.executed_code)
+        output = self.repl_tool.run(code)
+        if len(self.repl_tool.executed_code) == executed:
+            raise ToolException(f"The code failed, so no answer was given. {output}")
+
+        filled = self.fill_template(answer, self.repl_tool.locals)
+        self.last_template = answer
+        print(f"[DEBUG] Answered from template: {filled[:100]}...")
+        return filled
+
+    @staticmethod
+    def fill_template(template, namespace):
+        """Replace {name} and {name:spec} placeholders with the values of variables in namespace"""
+        try:
+            fields = list(string.Formatter().parse(template))
+        except ValueError as e:
+            raise ToolException(f"The answer template is malformed ({str(e)}); use {{name}} placeholders") from e
+
+        parts = []
+        for literal, field, spec, _ in fields:
+            parts.append(literal)
+            if field is None:
+                continue
+            # Plain variable names only: no attribute or index lookups into the namespace
+            if not field.isidentifier() or field not in namespace:
+                raise ToolException(
+                    f"The answer refers to {{{field}}}, but the code did not assign a variable named {field!r}"
+                )
+            value = namespace[field]
+            try:
+                parts.append(format(value, spec) if spec else DataFrameUtils.format_value(value))
+            except (TypeError, ValueError) as e:
+                raise ToolException(f"Cannot format {field} with {spec!r}: {str(e)}") from e
+        return "".join(parts)
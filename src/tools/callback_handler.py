@@ -1,5 +1,7 @@
 """Custom callback handler for Streamlit UI"""
 
+import time
+
 import streamlit as st
 from langchain_core.callbacks import BaseCallbackHandler
 from typing import Dict, Any
@@ -8,9 +10,19 @@ from typing import Dict, Any
 class CustomStreamlitCallbackHandler(BaseCallbackHandler):
     """Custom callback handler for better Streamlit UI without thinking face emoji"""
 
-    def __init__(self):
+    # Redraw the streamed text at most this often; one websocket message per token is wasteful
+    STREAM_RENDER_INTERVAL = 0.05
+
+    def __init__(self, react_format=True):
+        # ReAct completions carry Thought/Action/Final Answer markers; tool-calling answers are plain text
+        self.react_format = react_format
         self.step_container = None
         self.current_step = 0
+        self.tools_used = []
+        self.token_placeholder = None
+        self.streamed_text = ""
+        self.llm_start_time = None
+        self.last_render_time = 0.0
 
     def on_chain_start(self, serialized: Dict[str, Any], inputs: Dict[str, Any], **kwargs) -> None:
         """Called when chain starts"""
@@ -24,6 +36,7 @@ class CustomStreamlitCallbackHandler(BaseCallbackHandler):
         """Called when tool starts - show what the agent is doing"""
         tool_name = serialized.get("name", "tool")
         self.current_step += 1
+        self.tools_used.append(tool_name)
 
         # Don't show python_repl_ast execution in status boxes to avoid blocking chart display
         if tool_name == "python_repl_ast":
@@ -39,8 +52,45 @@ class CustomStreamlitCallbackHandler(BaseCallbackHandler):
 
     def on_llm_start(self, serialized: Dict[str, Any], prompts: list[str], **kwargs) -> None:
         """Called when LLM starts"""
-        pass
+        self.token_placeholder = st.empty()
+        self.streamed_text = ""
+        self.llm_start_time = time.perf_counter()
+        self.last_render_time = 0.0
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        """Called for each streamed token - show the step's reasoning or answer as it is generated"""
+        if not self.streamed_text:
+            print(f"[DEBUG] First token after {time.perf_counter() - self.llm_start_time:.2f}s")
+        self.streamed_text += token
+
+        now = time.perf_counter()
+        if self.token_placeholder is None or now - self.last_render_time < self.STREAM_RENDER_INTERVAL:
+            return
+        self.last_render_time = now
+        self._render_streamed_text()
 
     def on_llm_end(self, response, **kwargs) -> None:
         """Called when LLM ends"""
-        pass
+        # The live preview is replaced by the tool steps or the processed final answer
+        if self.token_placeholder is not None:
+            self.token_placeholder.empty()
+            self.token_placeholder = None
+
+    def on_llm_error(self, error: BaseException, **kwargs) -> None:
+        """Called when LLM errors"""
+        self.on_llm_end(None)
+
+    def _render_streamed_text(self):
+        """Show the final answer once it starts, otherwise the current thought"""
+        text = self.streamed_text
+        if not self.react_format:
+            self.token_placeholder.markdown(text)
+            return
+
+        if "Final Answer:" in text:
+            self.token_placeholder.markdown(text.split("Final Answer:", 1)[1].strip())
+            return
+
+        thought = text.split("Action:", 1)[0].replace("Thought:", "").strip()
+        if thought:
+            self.token_placeholder.caption(thought)
@@ -0,0 +1,301 @@
+"""Static checks of generated code against the live dataset schema before it runs"""
+
+import ast
+import difflib
+import importlib.util
+
+import pandas as pd
+
+from ..config import CODE_VALIDATION_MIN_SIMILARITY, CODE_VALIDATION_MAX_LISTED_COLUMNS
+from ..data import LazyDataFrame
+
+# Methods that keep the columns of the frame they are called on
+_SAME_COLUMN_METHODS = {
+    'copy', 'dropna', 'fillna', 'sort_values', 'sort_index', 'head', 'tail', 'sample', 'query',
+    'drop_duplicates', 'nlargest', 'nsmallest', 'infer_objects', 'convert_dtypes', 'astype',
+}
+
+# Frame methods whose arguments name columns: method -> (positional index or None, keyword names)
+_COLUMN_ARGUMENTS = {
+    'groupby': (0, ('by',)),
+    'sort_values': (0, ('by',)),
+    'dropna': (None, ('subset',)),
+    'drop_duplicates': (0, ('subset',)),
+    'value_counts': (0, ('subset',)),
+    'set_index': (0, ('keys',)),
+    'nlargest': (1, ('columns',)),
+    'nsmallest': (1, ('columns',)),
+    'pivot_table': (None, ('values', 'index', 'columns')),
+    'pivot': (None, ('index', 'columns', 'values')),
+    'drop': (None, ('columns',)),
+    'plot': (None, ('x', 'y')),
+}
+
+# plotly.express keywords that name columns of the data_frame argument
+_PLOTLY_COLUMN_KEYWORDS = {
+    'x', 'y', 'z', 'color', 'size', 'symbol', 'text', 'facet_row', 'facet_col', 'hover_name', 'names',
+    'values', 'line_group', 'animation_frame', 'path',
+}
+
+
+class CodeValidationError(ValueError):
+    """Generated code refers to columns, attributes or modules that do not exist"""
+
+
+class CodeValidator:
+    """Check generated code against the live schema before it runs.
+
+    Column references (df['x'], df[['x', 'y']], df.loc[:, 'x'], df.x,
+    column arguments such as groupby('x') or px.line(df, x='x')), frame
+    attributes and imports are checked against the DataFrames in the REPL
+    namespace, following columns the code itself adds and frames derived
+    from them (df_clean = df.dropna()). A misspelled column with exactly
+    one close match is corrected in place; anything else is rejected with
+    the exact problem, so a wrong name costs no execution and no KeyError
+    round trip.
+    """
+
+    def __init__(self, min_similarity=CODE_VALIDATION_MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self.checks = 0
+        self.corrections = 0
+        self.rejections = 0
+
+    def validate(self, code, namespace):
+        """Return (code, corrections), with near-miss columns fixed; raise CodeValidationError otherwise"""
+        self.checks += 1
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            # Let the REPL report it the usual way
+            return code, []
+
+        frames = {
+            name: list(value.columns) for name, value in (namespace or {}).items()
+            if isinstance(value, (pd.DataFrame, LazyDataFrame))
+        }
+        checker = _SchemaChecker(frames, self.min_similarity)
+        tree = checker.visit(tree)
+
+        if checker.errors:
+            self.rejections += 1
+            raise CodeValidationError("\n".join(dict.fromkeys(checker.errors)))
+        if not checker.corrections:
+            return code, []
+        self.corrections += len(checker.corrections)
+        return ast.unparse(ast.fix_missing_locations(tree)), list(dict.fromkeys(checker.corrections))
+
+    def stats(self):
+        """Return validation counters for display or logging"""
+        return {'checks': self.checks, 'corrections': self.corrections, 'rejections': self.rejections}
+
+
+class _SchemaChecker(ast.NodeTransformer):
+    """Walk the code in order, tracking frame columns and fixing or recording bad references"""
+
+    def __init__(self, frames, min_similarity):
+        self.frames = frames
+        self.min_similarity = min_similarity
+        self.errors = []
+        self.corrections = []
+
+    def visit_Assign(self, node):
+        node.value = self.visit(node.value)
+        columns = self._frame_columns(node.value)
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                # A derived frame keeps its source's columns; anything else stops being tracked
+                if columns is not None:
+                    self.frames[target.id] = list(columns)
+                else:
+                    self.frames.pop(target.id, None)
+            elif isinstance(target, ast.Subscript) and self._frame_columns(target.value) is not None:
+                # df['new'] = ... adds a column instead of reading one
+                self._add_columns(self._frame_columns(target.value), target, 'slice')
+            elif (isinstance(target, ast.Subscript) and isinstance(target.value, ast.Attribute)
+                    and target.value.attr in ('loc', 'at') and isinstance(target.slice, ast.Tuple)
+                    and len(target.slice.elts) == 2 and self._frame_columns(target.value.value) is not None):
+                # So does df.loc[mask, 'new'] = ...; the row selector is still checked
+                target.slice.elts[0] = self.visit(target.slice.elts[0])
+                self._add_columns(self._frame_columns(target.value.value), target.slice.elts, 1)
+            else:
+                self.visit(target)
+        return node
+
+    def _add_columns(self, columns, parent, field):
+        """Register the columns an assignment target creates, visiting any non-literal key"""
+        key = parent[field] if isinstance(parent, list) else getattr(parent, field)
+        names = self._string_keys(key)
+        if names is None:
+            key = self.visit(key)
+            if isinstance(parent, list):
+                parent[field] = key
+            else:
+                setattr(parent, field, key)
+            return
+        columns.extend(name for name in names if name not in columns)
+
+    def visit_Subscript(self, node):
+        self.generic_visit(node)
+        columns = self._frame_columns(node.value)
+        if columns is not None:
+            node.slice = self._check_keys(node.slice, columns, node.value)
+            return node
+
+        # df.loc[rows, 'col'] and df.at[row, 'col'] name columns in the second position
+        if (isinstance(node.value, ast.Attribute) and node.value.attr in ('loc', 'at')
+                and isinstance(node.slice, ast.Tuple) and len(node.slice.elts) == 2):
+            columns = self._frame_columns(node.value.value)
+            if columns is not None:
+                node.slice.elts[1] = self._check_keys(node.slice.elts[1], columns, node.value.value)
+        return node
+
+    def visit_Attribute(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.ctx, ast.Load) or not isinstance(node.value, ast.Name):
+            return node
+        columns = self.frames.get(node.value.id)
+        if (columns is None or node.attr in columns or hasattr(pd.DataFrame, node.attr)
+                or hasattr(LazyDataFrame, node.attr)):
+            return node
+
+        match = self._closest_column(node.attr, columns)
+        if match is not None:
+            # df.Rating -> df['RATING']
+            self.corrections.append(f"{node.value.id}.{node.attr} was corrected to {node.value.id}[{match!r}]")
+            return ast.copy_location(ast.Subscript(value=node.value, slice=ast.Constant(match), ctx=ast.Load()), node)
+        self.errors.append(
+            f"{node.value.id} has no attribute or column {node.attr!r}. {self._describe_columns(node.attr, columns)}"
+        )
+        return node
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if not isinstance(func, ast.Attribute):
+            return node
+
+        columns = self._frame_columns(func.value)
+        if columns is not None and func.attr in _COLUMN_ARGUMENTS:
+            position, keywords = _COLUMN_ARGUMENTS[func.attr]
+            if position is not None and len(node.args) > position:
+                node.args[position] = self._check_keys(node.args[position], columns, func.value)
+            for keyword in node.keywords:
+                if keyword.arg in keywords:
+                    keyword.value = self._check_keys(keyword.value, columns, func.value)
+            return node
+
+        # px.line(df, x='col', ...) and px.bar(data_frame=df, ...)
+        if isinstance(func.value, ast.Name) and func.value.id == 'px':
+            frame = node.args[0] if node.args else next(
+                (keyword.value for keyword in node.keywords if keyword.arg == 'data_frame'), None
+            )
+            columns = self._frame_columns(frame) if frame is not None else None
+            if columns is not None:
+                for keyword in node.keywords:
+                    if keyword.arg in _PLOTLY_COLUMN_KEYWORDS:
+                        keyword.value = self._check_keys(keyword.value, columns, frame)
+        return node
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self._check_module(alias.name)
+        return node
+
+    def visit_ImportFrom(self, node):
+        if node.module and not node.level:
+            self._check_module(node.module)
+        return node
+
+    def _check_module(self, module):
+        root = module.split('.')[0]
+        if importlib.util.find_spec(root) is None:
+            self.errors.append(
+                f"Module {root!r} is not installed. Use pandas, numpy, plotly or matplotlib instead."
+            )
+
+    def _frame_columns(self, node):
+        """Return the column list of the frame an expression evaluates to, or None when unknown"""
+        if isinstance(node, ast.Name):
+            return self.frames.get(node.id)
+        if isinstance(node, ast.Subscript):
+            columns = self._frame_columns(node.value)
+            if columns is None:
+                if isinstance(node.value, ast.Attribute) and node.value.attr in ('loc', 'iloc'):
+                    # df.loc[mask] keeps the columns; df.loc[mask, cols] is not tracked
+                    base = self._frame_columns(node.value.value)
+                    return base if base is not None and not isinstance(node.slice, ast.Tuple) else None
+                return None
+            keys = self._string_keys(node.slice)
+            if isinstance(node.slice, (ast.List, ast.Tuple)) and keys is not None:
+                return list(keys)
+            # A string key selects a Series; a mask or slice keeps every column
+            return None if keys is not None else columns
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr in _SAME_COLUMN_METHODS):
+            return self._frame_columns(node.func.value)
+        return None
+
+    @staticmethod
+    def _string_keys(node):
+        """Return the strings a key expression names ('a' or ['a', 'b']), or None if it is not all strings"""
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return [node.value]
+        if isinstance(node, (ast.List, ast.Tuple)) and node.elts and all(
+                isinstance(elt, ast.Constant) and isinstance(elt.value, str) for elt in node.elts):
+            return [elt.value for elt in node.elts]
+        return None
+
+    def _check_keys(self, node, columns, frame):
+        """Correct or reject the string column names in a key expression"""
+        constants = [node] if isinstance(node, ast.Constant) else (
+            node.elts if isinstance(node, (ast.List, ast.Tuple)) else []
+        )
+        frame_name = ast.unparse(frame)
+        for constant in constants:
+            if not isinstance(constant, ast.Constant) or not isinstance(constant.value, str):
+                continue
+            name = constant.value
+            if name in columns:
+                continue
+            match = self._closest_column(name, columns)
+            if match is not None:
+                self.corrections.append(f"column {name!r} of {frame_name} was corrected to {match!r}")
+                constant.value = match
+            else:
+                self.errors.append(f"Column {name!r} is not in {frame_name}. {self._describe_columns(name, columns)}")
+        return node
+
+    def _closest_column(self, name, columns):
+        """Return the only column that name is a near miss of, or None when there is none or several"""
+        names = [col for col in columns if isinstance(col, str)]
+        folded = [col for col in names if _fold(col) == _fold(name)]
+        if len(folded) == 1:
+            return folded[0]
+        if folded:
+            return None
+        candidates = self._similar_columns(name, names)
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _similar_columns(self, name, names):
+        lowered = {}
+        for col in names:
+            lowered.setdefault(col.lower(), []).append(col)
+        matches = difflib.get_close_matches(name.lower(), lowered, n=5, cutoff=self.min_similarity)
+        return [col for match in matches for col in lowered[match]]
+
+    def _describe_columns(self, name, columns):
+        """Suggest the closest columns, or list the available ones"""
+        names = [col for col in columns if isinstance(col, str)]
+        folded = [col for col in names if _fold(col) == _fold(name)]
+        candidates = folded or self._similar_columns(name, names) or difflib.get_close_matches(name, names, n=3)
+        if candidates:
+            return "Did you mean " + " or ".join(repr(col) for col in candidates) + "?"
+        listed = ", ".join(repr(col) for col in columns[:CODE_VALIDATION_MAX_LISTED_COLUMNS])
+        more = len(columns) - CODE_VALIDATION_MAX_LISTED_COLUMNS
+        return f"Available columns: {listed}" + (f" and {more:,} more" if more > 0 else "")
+
+
+def _fold(name):
+    """Compare column names ignoring case, spaces and punctuation"""
+    return "".join(char for char in str(name).lower() if char.isalnum())
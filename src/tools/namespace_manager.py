@@ -0,0 +1,252 @@
+"""Memory accounting for the persistent REPL namespace, spilling idle intermediates to disk"""
+
+import ast
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+import weakref
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import REPL_NAMESPACE_MAX_BYTES, REPL_NAMESPACE_MIN_SPILL_BYTES, REPL_NAMESPACE_SPILL_DIR
+from ..data import LazyDataFrame
+
+# One variable in the namespace: its size, seconds since code last used it, and whether it is in memory or spilled
+NamespaceEntry = namedtuple('NamespaceEntry', ['name', 'type', 'bytes', 'idle_seconds', 'state'])
+
+# Values that can be written to disk and read back unchanged
+_SPILLABLE_TYPES = (pd.DataFrame, pd.Series, pd.Index, np.ndarray)
+
+
+class NamespaceManager:
+    """Track the size and last use of every REPL variable and keep their total under a budget.
+
+    Before code runs, variables it refers to that were spilled are read
+    back from disk; after it runs, the variables it read or assigned are
+    marked used and the ones it assigned or wrote into (df_clean['x'] = ...)
+    are re-measured. Once the namespace holds more than max_bytes, the
+    least recently used variables of at least min_spill_bytes are spilled
+    (frames, series and arrays) or dropped (figures and other objects),
+    never touching protected names such as df and the imported modules.
+    Spill files go in a private directory created under spill_dir on the
+    first spill and removed with the manager; an empty spill_dir drops
+    instead. on_evict is called with the name of every variable spilled or
+    dropped, so other holders of its value (the execution cache) can let
+    it go too. report() is the live view of what the namespace holds.
+    """
+
+    def __init__(self, protected=('df',), max_bytes=REPL_NAMESPACE_MAX_BYTES,
+                 min_spill_bytes=REPL_NAMESPACE_MIN_SPILL_BYTES, spill_dir=REPL_NAMESPACE_SPILL_DIR, on_evict=None):
+        self.protected = set(protected)
+        self.max_bytes = max_bytes
+        self.min_spill_bytes = min_spill_bytes
+        self.spill_dir = spill_dir
+        self.on_evict = on_evict
+        self._directory = None
+        self._sizes = {}
+        self._types = {}
+        self._last_used = {}
+        self._spilled = {}
+        self._dropped = set()
+        self._lock = threading.Lock()
+        self.spills = 0
+        self.restores = 0
+        self.evictions = 0
+        self.bytes_spilled = 0
+        # Spill files go when the manager does
+        self._finalizer = weakref.finalize(self, _remove_files, self._spilled)
+
+    def before_run(self, code, namespace):
+        """Read back spilled variables the code refers to"""
+        loaded, _ = _referenced_names(code)
+        with self._lock:
+            for name in loaded & set(self._spilled):
+                path, _ = self._spilled.pop(name)
+                try:
+                    with open(path, 'rb') as f:
+                        namespace[name] = pickle.load(f)
+                    self.restores += 1
+                    print(f"[NAMESPACE] Restored {name} from disk")
+                except (OSError, pickle.UnpicklingError) as e:
+                    print(f"[NAMESPACE] Could not restore {name}: {str(e)}")
+                finally:
+                    _remove_files({name: (path, 0)})
+
+    def after_run(self, code, namespace):
+        """Record what the code used and assigned, then spill or drop idle variables over budget"""
+        loaded, stored = _referenced_names(code)
+        now = time.time()
+        with self._lock:
+            # Variables the code deleted, and names rebound since they were spilled
+            for name in [name for name in self._sizes if name not in namespace]:
+                self._forget(name)
+            for name in stored & set(self._spilled):
+                _remove_files({name: self._spilled.pop(name)})
+
+            for name, value in namespace.items():
+                if not self._is_tracked(name, value):
+                    continue
+                if name in stored or name not in self._sizes:
+                    self._sizes[name] = estimate_size(value)
+                    self._types[name] = type(value).__name__
+                    self._dropped.discard(name)
+                if name in stored or name in loaded or name not in self._last_used:
+                    self._last_used[name] = now
+
+            self._enforce_budget(namespace, keep=loaded | stored)
+
+    def was_dropped(self, name):
+        """Whether a variable was dropped from memory to stay under budget"""
+        return name in self._dropped
+
+    def _enforce_budget(self, namespace, keep):
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        candidates = sorted(
+            (name for name, size in self._sizes.items() if size >= self.min_spill_bytes and name not in keep),
+            key=lambda name: self._last_used.get(name, 0),
+        )
+        for name in candidates:
+            if total <= self.max_bytes:
+                break
+            value = namespace.pop(name)
+            size = self._sizes[name]
+            if self.spill_dir and isinstance(value, _SPILLABLE_TYPES) and self._spill(name, value, size):
+                print(f"[NAMESPACE] Spilled {name} ({size / (1024 * 1024):.1f} MB) to disk")
+            else:
+                self._dropped.add(name)
+                self.evictions += 1
+                print(f"[NAMESPACE] Dropped {name} ({size / (1024 * 1024):.1f} MB) to stay under budget")
+            del self._sizes[name]
+            total -= size
+            if self.on_evict is not None:
+                self.on_evict(name)
+
+    def _spill(self, name, value, size):
+        """Pickle a value to the spill directory; returns False if it could not be written"""
+        try:
+            path = os.path.join(self._spill_directory(), f"{uuid.uuid4().hex}-{name}.pkl")
+        except OSError as e:
+            print(f"[NAMESPACE] Could not spill {name}: {str(e)}")
+            return False
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError) as e:
+            print(f"[NAMESPACE] Could not spill {name}: {str(e)}")
+            _remove_files({name: (path, 0)})
+            return False
+        self._spilled[name] = (path, size)
+        self.spills += 1
+        self.bytes_spilled += size
+        return True
+
+    def _spill_directory(self):
+        """Create this manager's own spill directory on first use"""
+        if self._directory is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._directory = tempfile.mkdtemp(prefix="analyzia-spill-", dir=self.spill_dir)
+            weakref.finalize(self, shutil.rmtree, self._directory, True)
+        return self._directory
+
+    def _forget(self, name):
+        self._sizes.pop(name, None)
+        self._types.pop(name, None)
+        self._last_used.pop(name, None)
+
+    def _is_tracked(self, name, value):
+        """Intermediates only: not protected names, modules, functions or classes"""
+        return not (
+            name in self.protected or name.startswith('__')
+            or isinstance(value, (types.ModuleType, types.FunctionType, types.BuiltinFunctionType, type))
+        )
+
+    def report(self):
+        """Return a NamespaceEntry for every tracked variable, largest first"""
+        now = time.time()
+        with self._lock:
+            entries = [
+                NamespaceEntry(name, self._types.get(name, ''), size, now - self._last_used.get(name, now), 'memory')
+                for name, size in self._sizes.items()
+            ]
+            entries.extend(
+                NamespaceEntry(name, self._types.get(name, ''), size, now - self._last_used.get(name, now), 'disk')
+                for name, (_, size) in self._spilled.items()
+            )
+        return sorted(entries, key=lambda entry: entry.bytes, reverse=True)
+
+    def stats(self):
+        """Return namespace counters for display or logging"""
+        with self._lock:
+            return {
+                'variables': len(self._sizes),
+                'memory_bytes': sum(self._sizes.values()),
+                'max_bytes': self.max_bytes,
+                'spilled_variables': len(self._spilled),
+                'spilled_bytes': sum(size for _, size in self._spilled.values()),
+                'spills': self.spills,
+                'restores': self.restores,
+                'evictions': self.evictions,
+                'bytes_spilled': self.bytes_spilled,
+            }
+
+
+def _referenced_names(code):
+    """Return the names a snippet reads and the names it assigns, deletes or writes into"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return set(), set()
+    loaded, stored = set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            (loaded if isinstance(node.ctx, ast.Load) else stored).add(node.id)
+        elif isinstance(node, (ast.Subscript, ast.Attribute)) and not isinstance(node.ctx, ast.Load):
+            # df_clean['x'] = ... and df_clean.x = ... change the variable they write into
+            base = node.value
+            while isinstance(base, (ast.Subscript, ast.Attribute)):
+                base = base.value
+            if isinstance(base, ast.Name):
+                stored.add(base.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            stored.update((alias.asname or alias.name).split('.')[0] for alias in node.names)
+    return loaded, stored
+
+
+def estimate_size(value):
+    """Estimate the memory a value holds"""
+    try:
+        if isinstance(value, LazyDataFrame):
+            return value.loaded_bytes()
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(deep=True).sum())
+        if isinstance(value, (pd.Series, pd.Index)):
+            return int(value.memory_usage(deep=True))
+        if isinstance(value, np.ndarray):
+            return int(value.nbytes)
+        if hasattr(value, 'to_plotly_json'):
+            return len(value.to_json())
+        if isinstance(value, (list, tuple, set, dict)):
+            items = value.values() if isinstance(value, dict) else value
+            return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in items)
+        return sys.getsizeof(value)
+    except Exception:
+        return 0
+
+
+def _remove_files(spilled):
+    for path, _ in list(spilled.values()):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
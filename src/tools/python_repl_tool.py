@@ -1,21 +1,92 @@
 """Custom Python REPL tool for code execution with figure capture"""
 
+import ast
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Any, List
+
 import streamlit as st
 import matplotlib.pyplot as plt
 from langchain_experimental.tools import PythonAstREPLTool
+from langchain_experimental.tools.python.tool import sanitize_input
+
+from ..data import LazyDataFrame
+from ..utils import VisualizationHandler
+from .code_validator import CodeValidationError
+from .namespace_manager import _referenced_names
 
 
 class CustomPythonAstREPLTool(PythonAstREPLTool):
     """Custom Python AST REPL Tool that captures and displays matplotlib/plotly figures in Streamlit"""
 
+    # Code that ran without error and the figures it displayed, since the last start_question()
+    executed_code: List[str] = []
+    figures: List[Any] = []
+    # CodeValidator run before each execution, or None to run code unchecked
+    validator: Any = None
+    # NamespaceManager that keeps the variables code leaves behind under a memory budget, or None
+    namespace_manager: Any = None
+    # ExecutionCache that replays runs of unchanged code on unchanged inputs, or None
+    execution_cache: Any = None
+    # ExecutionLedger shared with the response processor, so code that already ran is not run again, or None
+    execution_ledger: Any = None
+
+    def start_question(self):
+        """Forget the code and figures recorded for the previous question"""
+        self.executed_code = []
+        self.figures = []
+
     def _run(self, query: str) -> str:
         """Run the query in the Python REPL and capture the result."""
         try:
             if self.locals is None:
                 self.locals = {}
 
+            if self.sanitize_input:
+                query = sanitize_input(query)
+
+            received = query
+            corrections = []
+            if self.validator is not None:
+                try:
+                    query, corrections = self.validator.validate(query, self.locals)
+                except CodeValidationError as e:
+                    # Rejected before running: nothing executed, so there is nothing to undo
+                    print(f"[DEBUG] Code rejected: {str(e)}")
+                    return f"CodeValidationError: the code was not run.\n{str(e)}"
+                if corrections:
+                    print(f"[DEBUG] Code corrected: {'; '.join(corrections)}")
+
+            self._materialize_passed_frames(query)
+            if self.namespace_manager is not None:
+                self.namespace_manager.before_run(query, self.locals)
+
+            run = None
+            if self.execution_cache is not None:
+                # Bypass markers are looked for in the code as received too: validation rewrites drop comments
+                run = self.execution_cache.prepare(query, self.locals, received=received)
+            cached = self.execution_cache.get(run, self.locals) if run is not None else None
+            if cached is not None:
+                return self._replay(received, query, run, cached)
+            figure_count = len(self.figures)
+            plotly_before = self._plotly_figures()
+            started = time.perf_counter()
+
             print(f"[DEBUG] Executing query: {query[:100]}...")
-            result = super()._run(query)
+            result, error = self._execute(query)
+            if error is not None:
+                result = f"{type(error).__name__}: {str(error)}"
+                if (isinstance(error, NameError) and self.namespace_manager is not None
+                        and self.namespace_manager.was_dropped(getattr(error, 'name', None))):
+                    result += f" ({error.name} was freed to save memory; compute it again)"
+            else:
+                self.executed_code.append(query)
+            if self.namespace_manager is not None:
+                self.namespace_manager.after_run(query, self.locals)
+            result = str(result) if result is not None else ""
+            if corrections:
+                result += "\n\nNote: " + "; ".join(corrections) + "."
             print(f"[DEBUG] Execution result: {result}")
 
             # Display matplotlib figures immediately
@@ -25,18 +96,29 @@ class CustomPythonAstREPLTool(PythonAstREPLTool):
                 current_fig = plt.gcf()
                 print(f"[DEBUG] Displaying matplotlib figure")
                 st.pyplot(current_fig, use_container_width=True)
+                self._capture_figure(current_fig)
                 plt.close(current_fig)
                 result += "\n\nVisualization successfully displayed."
 
-            # Display plotly figures immediately
-            print(f"[DEBUG] Checking locals for plotly: {list(self.locals.keys())}")
-            for var_name, var in self.locals.items():
-                var_type = str(type(var))
-                if 'plotly' in var_type.lower():
-                    print(f"[DEBUG] Found plotly figure: {var_name}")
-                    st.plotly_chart(var, use_container_width=True)
-                    result += "\n\nVisualization successfully displayed."
-                    break
+            # Display plotly figures immediately, if this code created, reassigned or used one
+            loaded, _ = _referenced_names(query)
+            for var_name, var in self._plotly_figures().items():
+                if plotly_before.get(var_name) is var and var_name not in loaded:
+                    # Left over from earlier code: already shown, and not part of this answer
+                    continue
+                print(f"[DEBUG] Found plotly figure: {var_name}")
+                st.plotly_chart(var, use_container_width=True)
+                self._capture_figure(var)
+                result += "\n\nVisualization successfully displayed."
+                break
+
+            if run is not None:
+                new_figures = self.figures[figure_count:]
+                # A figure that was shown but could not be captured cannot be replayed
+                replayable = new_figures or "Visualization successfully displayed." not in result
+                self.execution_cache.record(run, self.locals, error is None and replayable, result, new_figures)
+            if error is None:
+                self._record_in_ledger(received, query, result, self.figures[figure_count:], started)
 
             return result if result else ""
 
@@ -45,3 +127,89 @@ class CustomPythonAstREPLTool(PythonAstREPLTool):
             print(f"[DEBUG] Error: {error_message}")
             st.error(error_message)
             return error_message
+
+    def _plotly_figures(self):
+        """Return the plotly figures in the namespace by variable name"""
+        return {name: value for name, value in self.locals.items() if 'plotly' in str(type(value)).lower()}
+
+    def _materialize_passed_frames(self, query):
+        """Swap lazy frames the code hands to functions (pd.concat([df]), isinstance(df, ...)) for real ones"""
+        lazy_names = {name for name, value in self.locals.items() if isinstance(value, LazyDataFrame)}
+        if not lazy_names:
+            return
+        try:
+            tree = ast.parse(query)
+        except SyntaxError:
+            return
+        for name in _passed_frame_names(tree, lazy_names):
+            print(f"[DEBUG] Materializing {name}: the code uses it as a whole DataFrame")
+            self.locals[name] = self.locals[name].materialize()
+
+    def _replay(self, received, query, run, cached):
+        """Show a memoized run's figures and restore what it assigned instead of running it again"""
+        started = time.perf_counter()
+        self.execution_cache.replay(run, cached, self.locals)
+        for figure in cached.figures:
+            VisualizationHandler.display_artifact(figure)
+        self.figures.extend(cached.figures)
+        self.executed_code.append(query)
+        if self.namespace_manager is not None:
+            self.namespace_manager.after_run(query, self.locals)
+        self._record_in_ledger(received, query, cached.output, cached.figures, started)
+        return cached.output
+
+    def _record_in_ledger(self, received, query, output, figures, started):
+        """Record code that ran, as the model sent it and as corrected, so no other path runs it again"""
+        if self.execution_ledger is None:
+            return
+        seconds = time.perf_counter() - started
+        for code in dict.fromkeys((received, query)):
+            self.execution_ledger.record(code, output, figures, seconds)
+
+    def _execute(self, query):
+        """Run code like PythonAstREPLTool: exec all statements, then eval the last one.
+
+        The query is expected to be sanitized already. Returns (result, None),
+        or (None, exception) when the code raised.
+        """
+        try:
+            tree = ast.parse(query)
+            exec(ast.unparse(ast.Module(tree.body[:-1], type_ignores=[])), self.globals, self.locals)
+            last_statement = ast.unparse(ast.Module(tree.body[-1:], type_ignores=[]))
+            io_buffer = StringIO()
+            try:
+                with redirect_stdout(io_buffer):
+                    value = eval(last_statement, self.globals, self.locals)
+            except SyntaxError:
+                # The last statement is not an expression (an assignment, a loop)
+                with redirect_stdout(io_buffer):
+                    exec(last_statement, self.globals, self.locals)
+                value = None
+            return (io_buffer.getvalue() if value is None else value), None
+        except Exception as e:
+            return None, e
+
+    def _capture_figure(self, fig):
+        """Keep a serialized copy of a displayed figure so a cached answer can show it again"""
+        try:
+            self.figures.append(VisualizationHandler.capture_figure(fig))
+        except Exception as e:
+            print(f"[DEBUG] Could not capture figure: {str(e)}")
+
+
+def _passed_frame_names(tree, names):
+    """Return the names among names that code uses as whole objects rather than through columns and methods"""
+    passed = set()
+    for parent in ast.walk(tree):
+        for child in ast.iter_child_nodes(parent):
+            if not (isinstance(child, ast.Name) and child.id in names and isinstance(child.ctx, ast.Load)):
+                continue
+            # df['a'], df.a, df.groupby(...), len(df), 'a' in df, for col in df and df2 = df all stay lazy
+            if (isinstance(parent, (ast.Subscript, ast.Attribute)) and parent.value is child
+                    or isinstance(parent, ast.Call) and isinstance(parent.func, ast.Name) and parent.func.id == 'len'
+                    or isinstance(parent, ast.Compare) and all(isinstance(op, (ast.In, ast.NotIn)) for op in parent.ops)
+                    or isinstance(parent, (ast.For, ast.comprehension)) and parent.iter is child
+                    or isinstance(parent, ast.Assign) and parent.value is child):
+                continue
+            passed.add(child.id)
+    return passed
@@ -0,0 +1,105 @@
+"""DuckDB SQL tool for querying datasets without loading them into pandas"""
+
+import re
+from typing import Any, Optional
+
+import streamlit as st
+from langchain_core.tools import BaseTool
+
+from ..config import SQL_TOOL_MAX_ROWS, SQL_TOOL_MEMORY_LIMIT
+
+try:
+    import duckdb
+except ImportError:  # duckdb is optional; the agent then only gets the Python REPL
+    duckdb = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+READ_ONLY_PATTERN = re.compile(r"^\s*(select|with|describe|summarize|show|from)\b", re.IGNORECASE)
+
+
+class DuckDBSQLTool(BaseTool):
+    """Run read-only DuckDB SQL against the dataset as a table named df.
+
+    The query scans the memory-mapped Arrow file from the dataset store, so
+    DuckDB streams the data and spills to disk as needed instead of requiring
+    the whole dataset in pandas. Only the first max_rows result rows are
+    fetched and returned to the model.
+    """
+
+    name: str = "sql_query"
+    description: str = (
+        "Runs a DuckDB SQL query against the dataset, available as the table df. "
+        "Input should be a single SELECT statement. Use it for counts, filters, "
+        "GROUP BY aggregations and other queries over large data. "
+        "Only a limited number of result rows is returned, so aggregate or LIMIT."
+    )
+    file_path: Optional[str] = None
+    df: Any = None
+    max_rows: int = SQL_TOOL_MAX_ROWS
+
+    @staticmethod
+    def is_available():
+        """Whether duckdb is installed"""
+        return duckdb is not None
+
+    def _run(self, query: str, run_manager=None) -> str:
+        """Run the query and return the first max_rows rows as text."""
+        query = query.strip().strip('`').strip()
+        if query.lower().startswith('sql'):
+            query = query[3:].strip()
+        query = query.rstrip(';')
+
+        if not READ_ONLY_PATTERN.match(query):
+            return "Error: only read-only queries (SELECT, WITH, DESCRIBE, SUMMARIZE) are allowed."
+
+        try:
+            print(f"[DEBUG] Executing SQL: {query[:100]}...")
+            connection = self._connect()
+            try:
+                result = connection.execute(query)
+                columns = [column[0] for column in result.description]
+                rows = result.fetchmany(self.max_rows + 1)
+            finally:
+                connection.close()
+
+            return self._format_result(columns, rows)
+
+        except Exception as e:
+            error_message = f"Error executing SQL: {str(e)}"
+            print(f"[DEBUG] Error: {error_message}")
+            st.error(error_message)
+            return error_message
+
+    def _connect(self):
+        """Open an in-memory DuckDB connection with df registered as a table"""
+        connection = duckdb.connect(config={
+            'enable_external_access': False,
+            'memory_limit': SQL_TOOL_MEMORY_LIMIT,
+        })
+        if self.file_path and pa is not None:
+            # The mapped table is zero-copy: DuckDB reads pages straight from the file
+            table = pa.ipc.open_file(pa.memory_map(self.file_path, "r")).read_all()
+            connection.register('df', table)
+        elif self.df is not None:
+            connection.register('df', self.df)
+        else:
+            raise ValueError("No dataset is available to query")
+        return connection
+
+    def _format_result(self, columns, rows):
+        """Render result rows as a plain-text table for the model"""
+        if not rows:
+            return "Query returned no rows."
+
+        truncated = len(rows) > self.max_rows
+        rows = rows[:self.max_rows]
+
+        lines = [" | ".join(columns)]
+        lines.extend(" | ".join("" if value is None else str(value) for value in row) for row in rows)
+        if truncated:
+            lines.append(f"... (only the first {self.max_rows} rows are shown; aggregate or add LIMIT)")
+        return "\n".join(lines)
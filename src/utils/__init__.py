@@ -1,7 +1,8 @@
 """Utility modules for Analyzia"""
 
 from .code_utils import CodeUtils
-from .visualization_handler import VisualizationHandler
+from .visualization_handler import VisualizationHandler, FigureArtifact
 from .dataframe_utils import DataFrameUtils
+from .file_utils import FileUtils
 
-__all__ = ['CodeUtils', 'VisualizationHandler', 'DataFrameUtils']
+__all__ = ['CodeUtils', 'VisualizationHandler', 'FigureArtifact', 'DataFrameUtils', 'FileUtils']
@@ -1,5 +1,7 @@
 """DataFrame utility functions"""
 
+import numpy as np
+import pandas as pd
 import streamlit as st
 
 
@@ -10,6 +12,52 @@ class DataFrameUtils:
     def display_dataframe_info(df):
         """Display information about the dataframe."""
         st.markdown("<h3 style='text-align: center;'>Dataset Overview</h3>", unsafe_allow_html=True)
+
+        # Show the memory saved by dtype compaction at ingest
+        report = df.attrs.get('ingest_report')
+        if report:
+            st.caption(
+                f"{report['rows']:,} rows × {report['columns']:,} columns · "
+                f"{report['after_bytes'] / 1e6:,.1f} MB in memory "
+                f"(down from ~{report['before_bytes'] / 1e6:,.1f} MB with default dtypes)"
+            )
+
         # Show sample data in expander
         with st.expander("View sample data"):
             st.dataframe(df.head(), use_container_width=True)
+
+    @staticmethod
+    def format_value(value, max_rows=20):
+        """Format a computed result for an answer shown in the chat"""
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            return "\n\n" + value.head(max_rows).to_markdown() + "\n\n"
+        if isinstance(value, (bool, np.bool_)):
+            return str(bool(value))
+        if isinstance(value, (int, np.integer)):
+            return f"{int(value):,}"
+        if isinstance(value, (float, np.floating)):
+            if np.isnan(value):
+                return "not available (no values)"
+            if float(value).is_integer():
+                return f"{int(value):,}"
+            return f"{value:,.4f}".rstrip('0').rstrip('.')
+        if isinstance(value, pd.Timestamp) and value == value.normalize():
+            return str(value.date())
+        return str(value)
+
+    @staticmethod
+    def display_namespace_memory(entries, stats):
+        """Display the variables the analysis session holds and the memory they use."""
+        if not entries:
+            return
+        with st.expander(
+            f"Analysis memory: {stats['memory_bytes'] / 1e6:,.1f} MB of {stats['max_bytes'] / 1e6:,.0f} MB"
+            + (f" · {stats['spilled_bytes'] / 1e6:,.1f} MB on disk" if stats['spilled_variables'] else "")
+        ):
+            st.dataframe(pd.DataFrame({
+                'Variable': [entry.name for entry in entries],
+                'Type': [entry.type for entry in entries],
+                'MB': [round(entry.bytes / 1e6, 2) for entry in entries],
+                'Idle (s)': [int(entry.idle_seconds) for entry in entries],
+                'Stored in': [entry.state for entry in entries],
+            }), use_container_width=True, hide_index=True)
@@ -0,0 +1,37 @@
+"""Filesystem helpers for state kept between runs"""
+
+import os
+import stat
+
+
+class FileUtils:
+    """Utility class for the directories Analyzia keeps state in"""
+
+    @staticmethod
+    def ensure_private_directory(path):
+        """Create a directory only its owner can use, or check that an existing one is.
+
+        Stored datasets, completions and code plans are read back without
+        review, so their directory must not be writable by anyone else: a
+        directory owned by another user (for example one planted under a
+        shared /tmp) raises PermissionError, and one of ours that others can
+        reach is tightened to 0700. Its parent must not let anyone else
+        replace it: it has to belong to this user or root, and be sticky
+        (like /tmp) if others can write to it.
+        """
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode):
+            raise PermissionError(f"{path} is not a directory")
+        if not hasattr(os, "getuid"):
+            return path
+
+        parent = os.stat(os.path.dirname(os.path.abspath(path)))
+        if parent.st_uid not in (os.getuid(), 0) or (
+                parent.st_mode & 0o022 and not parent.st_mode & stat.S_ISVTX):
+            raise PermissionError(f"{path} is in a directory other users can change")
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"{path} belongs to another user")
+        if info.st_mode & 0o077:
+            os.chmod(path, 0o700)
+        return path
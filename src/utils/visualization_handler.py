@@ -1,13 +1,20 @@
 """Visualization handling and execution utilities"""
 
+import io
+from collections import namedtuple
+
 import streamlit as st
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import plotly.io as pio
 import seaborn as sns
 
 from .code_utils import CodeUtils
 
+# A displayed figure serialized for later display: plotly JSON or matplotlib PNG bytes
+FigureArtifact = namedtuple('FigureArtifact', ['kind', 'data'])
+
 
 class VisualizationHandler:
     """Centralized class to handle all visualization execution"""
@@ -60,3 +67,20 @@ class VisualizationHandler:
                 st.error(error_message)
                 st.code(code, language="python")
             return False, error_message
+
+    @staticmethod
+    def capture_figure(fig):
+        """Serialize a matplotlib or plotly figure so it can be shown again without running code"""
+        if hasattr(fig, 'to_plotly_json'):
+            return FigureArtifact('plotly', fig.to_json())
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+        return FigureArtifact('matplotlib', buffer.getvalue())
+
+    @staticmethod
+    def display_artifact(artifact):
+        """Show a captured figure in Streamlit"""
+        if artifact.kind == 'plotly':
+            st.plotly_chart(pio.from_json(artifact.data), use_container_width=True)
+        else:
+            st.image(artifact.data, use_container_width=True)